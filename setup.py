@@ -44,6 +44,12 @@ setup(
             "soundfile",
             "nemo-toolkit[asr]",
         ],
+        "onnx": [
+            "sounddevice",
+            "soundfile",
+            "onnx",
+            "onnxruntime",
+        ],
         "whisper": [
             "sounddevice",
             "soundfile",
@@ -1,44 +1,162 @@
+import contextlib
+import dataclasses
+import functools
+import json
 import logging
+import threading
 from types import SimpleNamespace
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Union
 
 import numpy as np
-from flask import Flask, Response, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 
-from cltl.asr.wav2vec_asr import Wav2Vec2ASR
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+from cltl.asr.backends import create_backend
+from cltl.asr.cpu import available_cpus, configure_process
+from cltl.asr.warm_start import ModelCache
 
-logger = logging.getLogger(__name__)
+from app.workers import BatchingWorkerPool, PoolFull, ProcessWorkerPool, StreamingWorker
 
+if TYPE_CHECKING:
+    from cltl.asr.parakeet_stream import MultiStreamParakeetRNNTStreamingASR
 
-CONTENT_TYPE_SEPARATOR = ';'
+logger = logging.getLogger(__name__)
 
 
-def asr_app(model_id, sampling_rate=16000, storage=None):
+CONTENT_TYPE_SEPARATOR = ';'
+# Two bytes per sample for 16bit audio
+SAMPLE_WIDTH = 2
+
+
+def asr_app(model_id, sampling_rate=16000, storage=None,
+            stream_asr: Optional[Union[Callable[[], BufferedASR], "MultiStreamParakeetRNNTStreamingASR"]] = None,
+            replicas: int = 1, batch_size: int = 1, batch_wait: float = 0.01, max_queue: int = 32,
+            threads: Optional[int] = None, pin_cpus: bool = False, model_cache: Optional[ModelCache] = None):
+    """
+    Create the ASR app.
+
+    Parameters
+    ----------
+    model_id : str
+        The Wav2Vec2 model used by the `/transcribe` endpoint.
+    sampling_rate : int
+        The sampling rate of the Wav2Vec2 model.
+    storage : str, optional
+        Directory to store the transcribed audio for debugging.
+    stream_asr : Union[Callable[[], BufferedASR], MultiStreamParakeetRNNTStreamingASR], optional
+        ASR for the sessions of the `/stream` endpoint. If not provided, the `/stream`
+        endpoint is not available.
+
+        For concurrent sessions pass a multi-stream ASR, e.g.
+        `MultiStreamParakeetRNNTStreamingASR()`. Each session is then a stream of a single
+        :class:`~app.workers.StreamingWorker` that owns the model and decodes the audio
+        of concurrent sessions together in batches.
+
+        Alternatively a factory for a new BufferedASR, called for each session, e.g.
+        `LocalParakeetRNNTStreamingASR().new_stream`. The sessions share the model of
+        the factory, which is not safe for concurrent use, so sessions are decoded one
+        at a time: all sessions wait for each other's decode steps and throughput does
+        not grow with the number of sessions or cores. Use this for a single session.
+    replicas : int
+        Number of model replicas for the `/transcribe` endpoint. With more than one
+        replica, each replica runs in a separate worker process, see :class:`ProcessWorkerPool`.
+        With a single replica, the replica runs in the app process and requests are transcribed
+        in batches of up to `batch_size` requests, waiting at most `batch_wait` seconds for a
+        batch to fill.
+    batch_size : int
+        Maximum number of requests transcribed together by a single replica.
+    batch_wait : float
+        Maximum time in seconds to wait for a batch of a single replica to fill.
+    max_queue : int
+        Maximum number of queued requests, further requests are rejected with 503.
+    threads : int, optional
+        Number of torch intra-op threads of each replica process, or of the app process with
+        a single replica. If not set, the process setting is used, or one thread per CPU of
+        the replica if `pin_cpus` is set.
+    pin_cpus : bool
+        Pin each replica process to its own share of the CPUs, see :class:`ProcessWorkerPool`.
+        With a single replica and `threads=None`, the app process runs one torch thread per
+        available CPU.
+    model_cache : ModelCache, optional
+        Cache of the prepared Wav2Vec2 model, see :class:`~cltl.asr.warm_start.ModelCache`.
+        Replica processes memory-map the cached model instead of each loading the checkpoint.
+    """
     app = Flask(__name__)
 
-    asr = Wav2Vec2ASR(model_id, sampling_rate, storage=storage)
+    if replicas > 1:
+        pool = ProcessWorkerPool(functools.partial(create_backend, "wav2vec2", model_id=model_id,
+                                                   sampling_rate=sampling_rate, storage=storage,
+                                                   model_cache=model_cache),
+                                 replicas=replicas, max_queue=max_queue, threads=threads, pin_cpus=pin_cpus)
+    else:
+        if threads or pin_cpus:
+            configure_process(threads=threads, cpus=available_cpus() if pin_cpus else None)
+        pool = BatchingWorkerPool(create_backend("wav2vec2", model_id=model_id, sampling_rate=sampling_rate,
+                                                 storage=storage, model_cache=model_cache),
+                                  max_queue=max_queue, batch_size=batch_size, batch_wait=batch_wait)
+    if stream_asr is not None and hasattr(stream_asr, "open_stream"):
+        stream_worker = StreamingWorker(stream_asr)
+        # The worker serializes calls to the model
+        stream_lock = contextlib.nullcontext()
+    else:
+        stream_worker = None
+        stream_lock = threading.Lock()
+        if stream_asr is not None:
+            logger.warning("Sessions of the /stream endpoint are decoded one at a time, "
+                           "use a multi-stream ASR for concurrent sessions")
 
     @app.route('/transcribe', methods=['POST'])
     def transcribe():
-        content_type = request.headers['content-type'].split(CONTENT_TYPE_SEPARATOR)
-        if not content_type[0].strip() == 'audio/L16' or len(content_type) != 4:
-            # Only support 16bit audio for now
-            raise ValueError(f"Unsupported content type {request.headers['content-type']}, "
-                             "expected audio/L16 with rate, channels and frame_size paramters")
-
-        parameters = SimpleNamespace(**{p.split('=')[0].strip(): int(p.split('=')[1].strip())
-                                        for p in content_type[1:]})
-
-        logger.debug("Transcribe from (%s, %s)", content_type[0], parameters)
+        parameters = _audio_parameters(request.headers['content-type'])
 
         # Two bytes per sample for 16bit audio
         content = np.frombuffer(request.data, np.int16)
         logger.debug("Transcribed speech [%s, %s]", content.shape, parameters.channels)
         content = content.reshape(content.shape[0] // parameters.channels, parameters.channels)
-        transcript = asr.speech_to_text(content, parameters.rate)
+        try:
+            transcript = pool.submit(content, parameters.rate).result()
+        except PoolFull as e:
+            logger.warning("Rejected request: %s", e)
+            return Response("Server busy", status=503, headers={'Retry-After': '1'})
 
         logger.debug("Transcribed speech (%s) to: %s", content.shape, transcript)
 
-        return Response("{'transcript': " + str(transcript) + "}", mimetype='application/json')
+        return jsonify({'transcript': transcript})
+
+    @app.route('/stream', methods=['POST'])
+    def stream():
+        """
+        Transcribe a stream of audio/L16 frames sent as chunked request body.
+
+        Partial and final transcripts are streamed back as newline-delimited JSON
+        while the audio is received. The request body is read in frames of
+        `frame_size` samples from the content type.
+        """
+        if stream_asr is None:
+            return Response("Streaming is not configured", status=404)
+
+        parameters = _audio_parameters(request.headers['content-type'])
+        stream_asr_session = stream_worker.open_stream() if stream_worker else stream_asr()
+        audio = request.stream
+
+        def transcripts():
+            try:
+                frame_bytes = parameters.frame_size * parameters.channels * SAMPLE_WIDTH
+                for frame in _read_frames(audio, frame_bytes, parameters.channels):
+                    with stream_lock:
+                        results = stream_asr_session.push_audio([frame], parameters.rate)
+                    yield from _to_json_lines(results)
+
+                if hasattr(stream_asr_session, "finish"):
+                    with stream_lock:
+                        final = stream_asr_session.finish()
+                    yield from _to_json_lines([final])
+            finally:
+                if stream_worker:
+                    # Release the stream on the worker if the client disconnected
+                    stream_asr_session.close()
+
+        return Response(stream_with_context(transcripts()), mimetype='application/x-ndjson')
 
     @app.after_request
     def set_cache_control(response):
@@ -49,3 +167,38 @@ def asr_app(model_id, sampling_rate=16000, storage=None):
         return response
 
     return app
+
+
+def _audio_parameters(header: str) -> SimpleNamespace:
+    content_type = header.split(CONTENT_TYPE_SEPARATOR)
+    if not content_type[0].strip() == 'audio/L16' or len(content_type) != 4:
+        # Only support 16bit audio for now
+        raise ValueError(f"Unsupported content type {header}, "
+                         "expected audio/L16 with rate, channels and frame_size paramters")
+
+    parameters = SimpleNamespace(**{p.split('=')[0].strip(): int(p.split('=')[1].strip())
+                                    for p in content_type[1:]})
+
+    logger.debug("Transcribe from (%s, %s)", content_type[0], parameters)
+
+    return parameters
+
+
+def _read_frames(stream, frame_bytes: int, channels: int) -> Iterable[np.ndarray]:
+    remainder = b''
+    while True:
+        data = stream.read(frame_bytes - len(remainder))
+        if not data:
+            break
+
+        data = remainder + data
+        complete = len(data) - len(data) % (channels * SAMPLE_WIDTH)
+        remainder = data[complete:]
+        if complete:
+            frame = np.frombuffer(data[:complete], np.int16)
+            yield frame.reshape(frame.shape[0] // channels, channels)
+
+
+def _to_json_lines(transcripts: Iterable[StreamTranscription]) -> Iterable[str]:
+    for transcript in transcripts:
+        yield json.dumps(dataclasses.asdict(transcript)) + '\n'
@@ -0,0 +1,134 @@
+"""
+Test client for the `/stream` endpoint of the ASR app.
+
+Streams a WAV file to the endpoint from a number of concurrent sessions, in
+frames paced at real time, and reports for each session the time to the first
+partial transcript, the time from the end of the audio to the final transcript
+and the final text.
+
+Usage:
+    python -m app.stream_client recording.wav --url http://localhost:8000/stream --sessions 16
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SessionResult:
+    first_partial: Optional[float]
+    final: Optional[float]
+    transcripts: int
+    text: str
+
+
+def stream_audio(url: str, audio: np.ndarray, sampling_rate: int, frame_ms: int = 20,
+                 realtime: bool = True) -> SessionResult:
+    """
+    Stream int16 audio of shape (n, channels) to the `/stream` endpoint and collect the transcripts.
+
+    Times in the result are in seconds, the time to the first partial is measured from the
+    start of the session, the time to the final from the end of the audio.
+    """
+    target = urlparse(url)
+    frame_size = sampling_rate * frame_ms // 1000
+    channels = audio.shape[1]
+
+    # http.client does not support reading the response while the request body is sent,
+    # use a plain socket for the request and parse the response with http.client
+    connection = socket.create_connection((target.hostname, target.port or 80))
+    connection.sendall((f"POST {target.path} HTTP/1.1\r\n"
+                        f"Host: {target.netloc}\r\n"
+                        f"Content-Type: audio/L16; rate={sampling_rate}; channels={channels}; frame_size={frame_size}\r\n"
+                        "Transfer-Encoding: chunked\r\n\r\n").encode("latin1"))
+
+    start = time.monotonic()
+    audio_end = []
+    sender = threading.Thread(target=_send_frames,
+                              args=(connection, audio, frame_size, frame_ms / 1000 if realtime else 0, audio_end))
+    sender.start()
+
+    response = http.client.HTTPResponse(connection)
+    response.begin()
+    first_partial, final, transcripts, text = None, None, 0, ""
+    for line in response:
+        transcript = json.loads(line)
+        transcripts += 1
+        if first_partial is None and transcript["text"]:
+            first_partial = time.monotonic() - start
+        if transcript["is_final"]:
+            text = transcript["text"]
+            final = time.monotonic()
+
+    sender.join()
+    response.close()
+    connection.close()
+
+    if response.status != 200:
+        raise ValueError(f"Streaming failed with status {response.status}")
+
+    return SessionResult(first_partial, final - audio_end[0] if final and audio_end else None, transcripts, text)
+
+
+def _send_frames(connection: socket.socket, audio: np.ndarray, frame_size: int,
+                 interval: float, audio_end: List[float]) -> None:
+    next_frame = time.monotonic()
+    for offset in range(0, len(audio), frame_size):
+        data = audio[offset:offset + frame_size].tobytes()
+        connection.sendall(b"%x\r\n%s\r\n" % (len(data), data))
+        next_frame += interval
+        time.sleep(max(0.0, next_frame - time.monotonic()))
+    audio_end.append(time.monotonic())
+    connection.sendall(b"0\r\n\r\n")
+
+
+def _percentiles(values: List[float]) -> str:
+    if not values:
+        return "-"
+    if len(values) == 1:
+        return f"p50={values[0]:.3f}s"
+
+    quantiles = statistics.quantiles(values, n=100, method="inclusive")
+
+    return f"p50={quantiles[49]:.3f}s p95={quantiles[94]:.3f}s p99={quantiles[98]:.3f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the streaming endpoint of the ASR app.")
+    parser.add_argument("audio", help="WAV file with 16bit audio")
+    parser.add_argument("--url", default="http://localhost:8000/stream", help="URL of the streaming endpoint")
+    parser.add_argument("--sessions", type=int, default=1, help="Number of concurrent sessions")
+    parser.add_argument("--frame-ms", type=int, default=20, help="Frame duration in milliseconds")
+    parser.add_argument("--no-realtime", action="store_true", help="Send frames as fast as possible")
+    args = parser.parse_args()
+
+    audio, sampling_rate = sf.read(args.audio, dtype=np.int16, always_2d=True)
+
+    with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+        futures = [executor.submit(stream_audio, args.url, audio, sampling_rate, args.frame_ms, not args.no_realtime)
+                   for _ in range(args.sessions)]
+        results = [future.result() for future in futures]
+
+    for idx, result in enumerate(results):
+        print(f"Session {idx}: {result.transcripts} transcripts, final: {result.text!r}")
+    print(f"Time to first partial: {_percentiles([r.first_partial for r in results if r.first_partial is not None])}")
+    print(f"Time to final:         {_percentiles([r.final for r in results if r.final is not None])}")
+
+
+if __name__ == '__main__':
+    main()
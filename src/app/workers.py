@@ -0,0 +1,333 @@
+import abc
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import StreamTranscription
+from cltl.asr.cpu import configure_process, partition_cpus
+
+logger = logging.getLogger(__name__)
+
+
+class PoolFull(Exception):
+    """Raised when a request is submitted to a worker pool with a full request queue."""
+    pass
+
+
+class WorkerPool(abc.ABC):
+    """
+    Pool of inference workers with a bounded request queue.
+    """
+    def submit(self, audio: np.ndarray, sampling_rate: int) -> Future:
+        """
+        Submit audio for transcription.
+
+        Returns
+        -------
+        Future
+            Future of the transcript.
+
+        Raises
+        ------
+        PoolFull
+            If the request queue of the pool is full.
+        """
+        raise NotImplementedError()
+
+    def shutdown(self) -> None:
+        raise NotImplementedError()
+
+
+class BatchingWorkerPool(WorkerPool):
+    """
+    Single model replica that transcribes queued requests in batches.
+
+    A worker thread takes up to `batch_size` requests from the queue, waiting at most
+    `batch_wait` seconds for the batch to fill, and transcribes them with a single call
+    to :meth:`ASR.speech_to_texts`.
+    """
+    def __init__(self, asr: ASR, max_queue: int = 32, batch_size: int = 8, batch_wait: float = 0.01):
+        self._asr = asr
+        self._batch_size = batch_size
+        self._batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = False
+        self._stopped = False
+
+        self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio: np.ndarray, sampling_rate: int) -> Future:
+        if self._stopping:
+            raise RuntimeError("Worker pool is shut down")
+
+        future = Future()
+        try:
+            self._queue.put_nowait((audio, sampling_rate, future))
+        except queue.Full:
+            raise PoolFull(f"Request queue full ({self._queue.maxsize})")
+
+        return future
+
+    def shutdown(self) -> None:
+        """Stop the worker after the queued requests are transcribed."""
+        self._stopping = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            # The worker stops when it has drained the queue
+            pass
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped and not (self._stopping and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._transcribe(batch)
+
+    def _next_batch(self) -> List[Tuple[np.ndarray, int, Future]]:
+        request = self._queue.get()
+        if request is None:
+            self._stopped = True
+            return []
+
+        batch = [request]
+        deadline = time.monotonic() + self._batch_wait
+        while len(batch) < self._batch_size:
+            try:
+                request = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if request is None:
+                self._stopped = True
+                break
+            batch.append(request)
+
+        return [request for request in batch if request[2].set_running_or_notify_cancel()]
+
+    def _transcribe(self, batch: List[Tuple[np.ndarray, int, Future]]) -> None:
+        by_rate = defaultdict(list)
+        for audio, sampling_rate, future in batch:
+            by_rate[sampling_rate].append((audio, future))
+
+        for sampling_rate, requests in by_rate.items():
+            audios, futures = zip(*requests)
+            try:
+                transcripts = self._asr.speech_to_texts(audios, sampling_rate)
+            except Exception as e:
+                logger.exception("Failed to transcribe batch of %s requests", len(futures))
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            logger.debug("Transcribed batch of %s requests", len(futures))
+            for future, transcript in zip(futures, transcripts):
+                future.set_result(transcript)
+
+
+class StreamingWorker:
+    """
+    Worker thread that owns a multi-stream ASR and decodes concurrent streams together.
+
+    The ASR must provide `open_stream()`, `close_stream()` and `push_audio()` for a dictionary
+    of streams, e.g. :class:`~cltl.asr.parakeet_stream.MultiStreamParakeetRNNTStreamingASR`.
+    Audio pushed to the streams from different threads is queued, the worker takes all queued
+    audio and advances the streams with a single call to `push_audio()`, which decodes them
+    in batches.
+    """
+    def __init__(self, asr):
+        self._asr = asr
+        self._queue = queue.Queue()
+        self._stream_ids = itertools.count()
+
+        self._thread = threading.Thread(target=self._run, name="asr-streams", daemon=True)
+        self._thread.start()
+
+    def open_stream(self) -> "WorkerStream":
+        """Open a new stream on the worker."""
+        stream_id = next(self._stream_ids)
+        self._submit("open", stream_id).result()
+
+        return WorkerStream(self, stream_id)
+
+    def push_audio(self, stream_id: Hashable, audio: Iterable[np.ndarray], sampling_rate: int) -> Future:
+        """Queue audio for a stream. Returns the future of the transcriptions of the stream."""
+        return self._submit("push", stream_id, (list(audio), sampling_rate))
+
+    def close_stream(self, stream_id: Hashable) -> Future:
+        """Close a stream. Returns the future of its final transcription."""
+        return self._submit("close", stream_id)
+
+    def shutdown(self) -> None:
+        """Stop the worker after the queued requests are processed."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _submit(self, call: str, stream_id: Hashable, args=None) -> Future:
+        future = Future()
+        self._queue.put((call, stream_id, args, future))
+
+        return future
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            requests = [self._queue.get()]
+            while True:
+                try:
+                    requests.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopped = None in requests
+            self._process([request for request in requests
+                           if request is not None and request[3].set_running_or_notify_cancel()])
+
+    def _process(self, requests: List[Tuple[str, Hashable, tuple, Future]]) -> None:
+        pushes = {}
+        sampling_rate = None
+        for call, stream_id, args, future in requests:
+            # Requests of a stream are processed in order, audio of streams is decoded together
+            if pushes and (call != "push" or stream_id in pushes or args[1] != sampling_rate):
+                self._push(pushes, sampling_rate)
+                pushes = {}
+
+            if call == "push":
+                audio, sampling_rate = args
+                pushes[stream_id] = (audio, future)
+            elif call == "open":
+                self._complete(future, self._asr.open_stream, stream_id)
+            else:
+                self._complete(future, self._asr.close_stream, stream_id)
+
+        if pushes:
+            self._push(pushes, sampling_rate)
+
+    def _push(self, pushes: Dict[Hashable, Tuple[List[np.ndarray], Future]], sampling_rate: int) -> None:
+        try:
+            results = self._asr.push_audio({stream_id: audio for stream_id, (audio, _) in pushes.items()},
+                                           sampling_rate)
+        except Exception as e:
+            logger.exception("Failed to decode %s streams", len(pushes))
+            for _, future in pushes.values():
+                future.set_exception(e)
+            return
+
+        logger.debug("Decoded %s streams", len(pushes))
+        for stream_id, (_, future) in pushes.items():
+            future.set_result(results[stream_id])
+
+    @staticmethod
+    def _complete(future: Future, call: Callable, stream_id: Hashable) -> None:
+        try:
+            future.set_result(call(stream_id))
+        except Exception as e:
+            logger.exception("Failed to %s stream %s", call.__name__, stream_id)
+            future.set_exception(e)
+
+
+class WorkerStream:
+    """
+    Stream of a :class:`StreamingWorker` with the streaming interface of
+    :class:`~cltl.asr.api_streaming.BufferedASR`.
+    """
+    def __init__(self, worker: StreamingWorker, stream_id: Hashable):
+        self._worker = worker
+        self._stream_id = stream_id
+        self.closed = False
+
+    def push_audio(self, audio: Iterable[np.ndarray], sampling_rate: int) -> List[StreamTranscription]:
+        return self._worker.push_audio(self._stream_id, audio, sampling_rate).result()
+
+    def finish(self) -> StreamTranscription:
+        """Close the stream on the worker and return its final transcription."""
+        self.closed = True
+
+        return self._worker.close_stream(self._stream_id).result()
+
+    def close(self) -> None:
+        """Close the stream on the worker if it is not finished."""
+        if not self.closed:
+            self.closed = True
+            self._worker.close_stream(self._stream_id)
+
+
+_process_asr: Optional[ASR] = None
+
+
+def _init_process(asr_factory: Callable[[], ASR], threads: Optional[int],
+                  cpu_sets: Optional[multiprocessing.Queue]) -> None:
+    global _process_asr
+
+    cpus = None
+    if cpu_sets is not None:
+        try:
+            cpus = cpu_sets.get(timeout=1)
+        except queue.Empty:
+            logger.warning("No free CPUs to pin worker process %s to", os.getpid())
+
+    if threads or cpus:
+        configure_process(threads=threads, cpus=cpus)
+
+    _process_asr = asr_factory()
+
+
+def _transcribe_in_process(audio: np.ndarray, sampling_rate: int) -> str:
+    return _process_asr.speech_to_text(audio, sampling_rate)
+
+
+class ProcessWorkerPool(WorkerPool):
+    """
+    Model replicas in separate worker processes.
+
+    Each process creates its replica with `asr_factory`, which must be picklable, e.g. a
+    `functools.partial` of the ASR class, and holds its own copy of the model weights. If
+    the factory passes a `model_cache` to the ASR, the replicas memory-map the cached model,
+    see :class:`~cltl.asr.warm_start.ModelCache`.
+
+    Each process runs with `threads` torch threads, the torch default if not set. With
+    `pin_cpus` the available CPUs are split into `replicas` disjoint sets and each process is
+    pinned to one of them, with `threads=None` each process then runs one torch thread per
+    CPU in its set, see :mod:`cltl.asr.cpu`. Pinning avoids that replicas compete for the
+    same cores; replicas times threads should not exceed the CPUs.
+
+    At most `replicas + max_queue` requests are accepted at a time.
+    """
+    def __init__(self, asr_factory: Callable[[], ASR], replicas: int = 2, max_queue: int = 32,
+                 threads: Optional[int] = None, pin_cpus: bool = False):
+        cpu_sets = None
+        if pin_cpus:
+            cpu_sets = multiprocessing.Queue()
+            for cpus in partition_cpus(replicas):
+                cpu_sets.put(cpus)
+
+        self._executor = ProcessPoolExecutor(max_workers=replicas, initializer=_init_process,
+                                             initargs=(asr_factory, threads, cpu_sets))
+        self._capacity = replicas + max_queue
+        self._slots = threading.BoundedSemaphore(self._capacity)
+
+    def submit(self, audio: np.ndarray, sampling_rate: int) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise PoolFull(f"Request queue full ({self._capacity})")
+
+        try:
+            future = self._executor.submit(_transcribe_in_process, audio, sampling_rate)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        return future
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
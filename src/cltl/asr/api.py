@@ -1,6 +1,6 @@
 import abc
 from dataclasses import dataclass
-from typing import Iterable, Optional
+from typing import Iterable, List, Optional
 
 import numpy as np
 
@@ -34,3 +34,28 @@ class ASR(abc.ABC):
             transcription of an uttereance.
         """
         raise NotImplementedError()
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        """
+        Transcribe a batch of audio samples to text.
+
+        Implementations that support batched inference should override this
+        method to process the batch in a single forward pass. The default
+        implementation transcribes the samples one by one using
+        :meth:`speech_to_text`.
+
+        Parameters
+        ----------
+        audios : Iterable[np.array]
+            The audio samples containing speech, each in the format accepted by
+            :meth:`speech_to_text`. All samples must share the same sampling rate.
+        sampling_rate : int
+            The sampling rate of the audio data, see :meth:`speech_to_text`.
+
+        Returns
+        -------
+        List[str]
+            Text transcripts of the audio inputs, in the same order as the input.
+            See :meth:`speech_to_text` for the semantics of ASR.GAP_INDICATOR.
+        """
+        return [self.speech_to_text(audio, sampling_rate) for audio in audios]
@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional
+
+import numpy as np
+
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+
+logger = logging.getLogger(__name__)
+
+
+_END_OF_STREAM = object()
+
+
+class AsyncBufferedASR:
+    """
+    Asyncio adapter for a :class:`BufferedASR`.
+
+    All calls to the wrapped ASR run on a dedicated executor, by default a single
+    worker thread, so that the event loop is never blocked by inference. With a
+    single worker the calls to the (stateful) ASR are also serialized.
+
+    While a decode step runs, frames from the input stream continue to be read
+    into a queue. All frames that arrived in the meantime are pushed together
+    with the next call to the ASR.
+
+    Example
+    -------
+        async with AsyncBufferedASR(LocalParakeetRNNTStreamingASR()) as asr:
+            async for transcript in asr.transcribe(frames, sampling_rate=16000):
+                ...
+    """
+
+    def __init__(self, asr: BufferedASR, executor: Optional[Executor] = None):
+        """
+        Parameters
+        ----------
+        asr : BufferedASR
+            The ASR that transcribes the audio.
+        executor : Executor, optional
+            Executor to run the ASR on. If not provided, a single thread executor is
+            created and shut down on :meth:`close`.
+        """
+        self._asr = asr
+        self._own_executor = executor is None
+        self._executor = executor if executor else ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr")
+
+    @property
+    def asr(self) -> BufferedASR:
+        return self._asr
+
+    async def push_audio(self, audio_frames: Iterable[np.ndarray], sampling_rate: int = None) -> List[StreamTranscription]:
+        """
+        Run :meth:`BufferedASR.push_audio` on the executor.
+
+        Returns
+        -------
+        List[StreamTranscription]
+            The transcripts returned by the ASR for the provided audio frames.
+        """
+        loop = asyncio.get_running_loop()
+
+        return list(await loop.run_in_executor(self._executor, self._push_audio, list(audio_frames), sampling_rate))
+
+    async def finish(self) -> Optional[StreamTranscription]:
+        """
+        Flush the remaining audio of the wrapped ASR, if it supports finishing a stream.
+
+        Returns
+        -------
+        Optional[StreamTranscription]
+            The final transcript, or None if the ASR does not support finishing a stream.
+        """
+        if not hasattr(self._asr, "finish"):
+            return None
+
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(self._executor, self._asr.finish)
+
+    async def transcribe(self, audio_frames: AsyncIterable[np.ndarray],
+                         sampling_rate: int = None) -> AsyncIterator[StreamTranscription]:
+        """
+        Transcribe an asynchronous stream of audio frames.
+
+        Parameters
+        ----------
+        audio_frames : AsyncIterable[np.ndarray]
+            Stream of audio frames, see :meth:`BufferedASR.push_audio` for the supported formats.
+        sampling_rate : int
+            The sampling rate of the audio frames.
+
+        Yields
+        ------
+        StreamTranscription
+            Partial and final transcripts in the order they are produced by the ASR.
+            When the input stream ends, the ASR is finished and its final transcript
+            is yielded if it contains text.
+        """
+        queue = asyncio.Queue()
+        reader = asyncio.ensure_future(self._read_frames(audio_frames, queue))
+
+        try:
+            end_of_stream = False
+            while not end_of_stream:
+                frames = [await queue.get()]
+                while not queue.empty():
+                    frames.append(queue.get_nowait())
+
+                end_of_stream = frames[-1] is _END_OF_STREAM
+                if end_of_stream:
+                    frames = frames[:-1]
+                if frames:
+                    for transcript in await self.push_audio(frames, sampling_rate):
+                        yield transcript
+
+            # Propagate errors raised by the input stream
+            await reader
+
+            final = await self.finish()
+            if final is not None and final.text.strip():
+                yield final
+        finally:
+            reader.cancel()
+
+    async def close(self) -> None:
+        """Shut down the executor, if it was created by this adapter.
+
+        Waits for running ASR calls to complete without blocking the event loop.
+        """
+        if self._own_executor:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+
+    async def __aenter__(self) -> "AsyncBufferedASR":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def _push_audio(self, audio_frames: List[np.ndarray], sampling_rate: Optional[int]) -> List[StreamTranscription]:
+        return list(self._asr.push_audio(audio_frames, sampling_rate))
+
+    @staticmethod
+    async def _read_frames(audio_frames: AsyncIterable[np.ndarray], queue: asyncio.Queue) -> None:
+        try:
+            async for frame in audio_frames:
+                queue.put_nowait(frame)
+        finally:
+            queue.put_nowait(_END_OF_STREAM)
@@ -0,0 +1,108 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class AudioRingBuffer:
+    """
+    Pre-allocated ring buffer of mono float32 audio samples.
+
+    The backing array holds the samples twice: every sample is written at its
+    position and mirrored at position + capacity. Any window of at most `capacity`
+    samples is therefore available as a contiguous view, without copying.
+
+    Frames are downmixed to mono and int16 samples are normalised to [-1, 1] while
+    they are written, without intermediate arrays.
+
+    Views returned by :meth:`peek` and :meth:`consume` are only valid until the next
+    call to :meth:`write`.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, was {capacity}")
+
+        self._capacity = capacity
+        self._samples = np.zeros(2 * capacity, dtype=np.float32)
+        self._start = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        self._start = 0
+        self._size = 0
+
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Append an audio frame of shape (n), (n, 1) or (n, channels).
+
+        If the frame does not fit into the remaining capacity, the buffer is
+        reallocated with at least twice its capacity.
+        """
+        length = frame.shape[0]
+        if length == 0:
+            return
+
+        if frame.ndim > 2:
+            raise ValueError(f"audio must have at most two dimensions, shape was {frame.shape}")
+
+        if self._size + length > self._capacity:
+            self._grow(self._size + length)
+
+        end = (self._start + self._size) % self._capacity
+        head = min(length, self._capacity - end)
+        self._write_at(end, frame[:head])
+        if head < length:
+            self._write_at(0, frame[head:])
+
+        self._size += length
+
+    def peek(self, length: int = None) -> np.ndarray:
+        """Return a view of the oldest `length` samples, by default of all samples in the buffer."""
+        length = self._size if length is None else length
+        if length > self._size:
+            raise ValueError(f"Requested {length} samples, buffer contains {self._size}")
+
+        return self._samples[self._start:self._start + length]
+
+    def consume(self, length: int = None) -> np.ndarray:
+        """Remove the oldest `length` samples, by default all samples, and return a view of them."""
+        samples = self.peek(length)
+
+        self._start = (self._start + samples.shape[0]) % self._capacity
+        self._size -= samples.shape[0]
+
+        return samples
+
+    def _write_at(self, position: int, frame: np.ndarray) -> None:
+        length = frame.shape[0]
+        target = self._samples[position:position + length]
+
+        scale = np.float32(1 / 32768) if frame.dtype == np.int16 else np.float32(1)
+        if frame.ndim == 2 and frame.shape[1] > 1:
+            np.sum(frame, axis=1, dtype=np.float32, out=target)
+            target *= scale / frame.shape[1]
+        else:
+            np.multiply(frame.reshape(length), scale, out=target)
+
+        self._samples[position + self._capacity:position + self._capacity + length] = target
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(2 * self._capacity, min_capacity)
+        logger.debug("Grow audio buffer from %s to %s samples", self._capacity, capacity)
+
+        samples = np.zeros(2 * capacity, dtype=np.float32)
+        samples[:self._size] = self.peek()
+        samples[capacity:capacity + self._size] = samples[:self._size]
+
+        self._samples = samples
+        self._capacity = capacity
+        self._start = 0
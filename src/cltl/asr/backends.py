@@ -0,0 +1,213 @@
+"""
+Registry of ASR backends.
+
+Backends are registered by name with the `module:Class` path of their implementation,
+the module is only imported when the backend is created. This keeps heavy frameworks
+(torch, NeMo, transformers, ...) out of applications that don't use them.
+
+:func:`create_backend_from_settings` creates a backend from flat string settings, e.g.
+a section of a configuration file.
+"""
+
+import collections.abc
+import importlib
+import inspect
+import logging
+import typing
+from typing import Any, Callable, Dict, Mapping, Union
+
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR
+from cltl.asr.cache import CachedASR
+from cltl.asr.cpu import configure_process
+from cltl.asr.warm_start import ModelCache, warm_up
+
+logger = logging.getLogger(__name__)
+
+
+_BACKENDS: Dict[str, str] = {
+    "google": "cltl.asr.google_asr:GoogleASR",
+    "parakeet": "cltl.asr.parakeet_asr:ParakeetASR",
+    "parakeet_stream": "cltl.asr.parakeet_stream:LocalParakeetRNNTStreamingASR",
+    "parakeet_multistream": "cltl.asr.parakeet_stream:MultiStreamParakeetRNNTStreamingASR",
+    "parakeet_onnx": "cltl.asr.parakeet_onnx:OnnxParakeetRNNTStreamingASR",
+    "speechbrain": "cltl.asr.speechbrain_asr:SpeechbrainASR",
+    "wav2vec2": "cltl.asr.wav2vec_asr:Wav2Vec2ASR",
+    "whisper": "cltl.asr.whisper_asr:WhisperASR",
+    "whisper_api": "cltl.asr.whisper_api_asr:WhisperApiASR",
+    "whisper_cpp": "cltl.asr.whisper_cpp_asr:WhisperCppASR",
+}
+
+
+def register_backend(name: str, path: str) -> None:
+    """Register the implementation at `path` (`module:Class`) as backend `name`."""
+    _validate(path)
+    _BACKENDS[name] = path
+
+
+def backends() -> Dict[str, str]:
+    """Return the registered backend names and their implementation paths."""
+    return dict(_BACKENDS)
+
+
+def backend_class(backend: str) -> type:
+    """
+    Import and return the implementation of `backend`.
+
+    Parameters
+    ----------
+    backend : str
+        Name of a registered backend, or the `module:Class` path of an implementation.
+
+    Raises
+    ------
+    ValueError
+        If the backend is not registered and not a `module:Class` path.
+    """
+    path = _BACKENDS.get(backend, backend)
+    module_name, class_name = _validate(path)
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_backend(backend: str, **kwargs) -> Union[ASR, BufferedASR]:
+    """Create an instance of `backend` (see :func:`backend_class`) with the keyword arguments."""
+    logger.debug("Create ASR backend %s (%s)", backend, kwargs)
+
+    return backend_class(backend)(**kwargs)
+
+
+def _validate(path: str):
+    module_name, _, class_name = path.partition(":")
+    if not module_name or not class_name:
+        raise ValueError(f"Unknown backend {path}, expected one of {sorted(_BACKENDS)} or module:Class")
+
+    return module_name, class_name
+
+
+# Generic settings and the constructor parameters they are passed to, the first parameter accepted by the backend is used
+SETTING_PARAMETERS = {
+    "model": ("model_id", "model_name", "model_dir"),
+    "sample_rate": ("sampling_rate", "sample_rate"),
+    "dtype": ("compute_dtype", "dtype"),
+    "batch_size": ("max_batch_size", "batch_size"),
+    "threads": ("threads", "num_threads"),
+}
+
+
+def _torch_dtype(value: str):
+    import torch
+
+    dtype = getattr(torch, value.strip(), None)
+    if not isinstance(dtype, torch.dtype):
+        raise ValueError(f"Unknown torch dtype {value}")
+
+    return dtype
+
+
+_CONVERTERS: Dict[str, Callable[[str], Any]] = {
+    "compute_dtype": _torch_dtype,
+    "dtype": _torch_dtype,
+    "model_cache": lambda value: ModelCache(value.strip() or None),
+}
+
+
+def create_backend_from_settings(settings: Mapping[str, Any], **kwargs) -> Union[ASR, BufferedASR]:
+    """
+    Create a backend from flat settings, e.g. a section of a configuration file.
+
+    Settings that match a parameter of the backend constructor are passed to it and
+    converted from strings according to the parameter type, other settings are ignored.
+
+    Parameters
+    ----------
+    settings : Mapping[str, Any]
+        Settings of the backend:
+
+        * `implementation`: registered backend name or `module:Class` path.
+        * `model`, `sample_rate`, `device`, `dtype` (e.g. `bfloat16`), `batch_size`:
+          passed to the matching constructor parameter, see :data:`SETTING_PARAMETERS`.
+        * `threads`: passed to the backend if supported (e.g. the onnxruntime sessions of
+          `parakeet_onnx`), otherwise the torch intra-op threads of the process, see
+          :func:`~cltl.asr.cpu.configure_process`.
+        * `cpus` (e.g. `0-3`), `numa_node`, `interop_threads`: process wide CPU affinity and
+          inter-op threads, applied before the backend is created, see
+          :func:`~cltl.asr.cpu.configure_process`.
+        * `model_cache`: directory of a :class:`~cltl.asr.warm_start.ModelCache`.
+        * `warm_up`: seconds of silence transcribed after the backend is created, see
+          :func:`~cltl.asr.warm_start.warm_up`. Not set or 0 disables the warm up.
+        * `transcript_cache`, `transcript_cache_path`: maximum number of transcripts in memory
+          and optional sqlite database of a :class:`~cltl.asr.cache.CachedASR` wrapping the backend.
+        * backend specific constructor parameters, e.g. `url` or `chunk_secs`.
+    kwargs
+        Constructor arguments that take precedence over the settings, e.g. a metrics sink,
+        ignored if not accepted by the backend. A `metrics` sink is also passed to the
+        transcript cache.
+    """
+    settings = dict(settings)
+    backend = settings.pop("implementation", None)
+    if not backend:
+        raise ValueError("No implementation in the backend settings")
+
+    cls = backend_class(backend)
+    parameters = inspect.signature(cls).parameters
+
+    metrics = kwargs.get("metrics")
+    kwargs = {name: value for name, value in kwargs.items() if name in parameters}
+
+    for key, value in settings.items():
+        name = next((name for name in SETTING_PARAMETERS.get(key, (key,)) if name in parameters), None)
+        if name is None or name in kwargs:
+            continue
+        kwargs[name] = _convert(value, parameters[name])
+
+    cpus = settings.get("cpus") or None
+    numa_node = int(settings["numa_node"]) if settings.get("numa_node") not in (None, "") else None
+    interop_threads = int(settings.get("interop_threads") or 0) or None
+    threads = None
+    if not any(name in kwargs for name in SETTING_PARAMETERS["threads"]):
+        threads = int(settings.get("threads") or 0) or None
+    if threads or cpus or numa_node is not None or interop_threads:
+        configure_process(threads=threads, interop_threads=interop_threads, cpus=cpus, numa_node=numa_node)
+
+    asr = create_backend(backend, **kwargs)
+
+    warm_up_secs = float(settings.get("warm_up") or 0)
+    if warm_up_secs > 0:
+        warm_up(asr, seconds=warm_up_secs)
+
+    max_entries = int(settings.get("transcript_cache") or 0)
+    path = settings.get("transcript_cache_path") or None
+    if max_entries or path:
+        if not isinstance(asr, ASR):
+            raise ValueError(f"Transcript cache is not supported for {type(asr).__name__}")
+        asr = CachedASR(asr, model_id=f"{backend}:{settings.get('model', '')}", language=settings.get("language"),
+                        max_entries=max_entries or 1024, path=path, metrics=metrics)
+
+    return asr
+
+
+def _convert(value: Any, parameter: inspect.Parameter) -> Any:
+    if not isinstance(value, str):
+        return value
+
+    converter = _CONVERTERS.get(parameter.name)
+    if converter:
+        return converter(value)
+
+    annotation = parameter.annotation
+    if annotation is inspect.Parameter.empty:
+        annotation = type(parameter.default) if parameter.default not in (None, inspect.Parameter.empty) else str
+    types = typing.get_args(annotation) if typing.get_origin(annotation) is Union else (annotation,)
+
+    if bool in types:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if int in types:
+        return int(value)
+    if float in types:
+        return float(value)
+    if any(typing.get_origin(type_) in (list, tuple, collections.abc.Sequence) for type_ in types) \
+            and (str not in types or "," in value):
+        return [item.strip() for item in value.split(",")]
+
+    return value
@@ -0,0 +1,427 @@
+"""
+Benchmark harness for ASR implementations.
+
+Runs an :class:`ASR` or :class:`BufferedASR` implementation over a corpus of WAV files
+and reports the real-time factor, latency percentiles per utterance and per streaming
+chunk, time to first partial and to final transcript, peak memory and word error rate.
+
+Reference transcripts are read from a text file with the same name as the WAV file
+(e.g. `test.txt` for `test.wav`). Utterances without reference are not included in
+the word error rate.
+
+Usage:
+    python -m cltl.asr.bench tests/resources --backend wav2vec2 \\
+        --kwargs '{"model_id": "facebook/wav2vec2-base-960h", "sampling_rate": 16000}' --output bench.json
+
+Remote backends can be run against a local stub server, the URL of the server is
+passed to the backend as keyword argument `url`:
+    python -m cltl.asr.bench tests/resources --backend whisper_cpp --stub whispercpp
+
+Reduced precision inference is compared against the first precision as baseline, the
+precision is passed to the backend as keyword argument `precision`:
+    python -m cltl.asr.bench tests/resources --backend parakeet_stream --precisions float32,int8,bfloat16 \\
+        --max-baseline-wer 0.05
+"""
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import resource
+import string
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import jiwer
+import numpy as np
+import soundfile as sf
+
+from cltl.asr import backends
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR
+
+logger = logging.getLogger(__name__)
+
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Utterance:
+    name: str
+    audio: np.ndarray
+    sampling_rate: int
+    reference: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return self.audio.shape[0] / self.sampling_rate
+
+
+@dataclass
+class UtteranceResult:
+    name: str
+    duration: float
+    latency: float
+    transcript: str
+    reference: Optional[str] = None
+    chunk_latencies: List[float] = field(default_factory=list)
+    first_partial: Optional[float] = None
+    final: Optional[float] = None
+
+
+def load_corpus(directory: Union[str, Path]) -> List[Utterance]:
+    """Load all WAV files in `directory` as int16 audio, with references from matching `.txt` files."""
+    corpus = []
+    for wav in sorted(Path(directory).glob("*.wav")):
+        audio, sampling_rate = sf.read(wav, dtype=np.int16, always_2d=True)
+        reference_file = wav.with_suffix(".txt")
+        reference = reference_file.read_text().strip() if reference_file.exists() else None
+        corpus.append(Utterance(wav.stem, audio, sampling_rate, reference))
+
+    return corpus
+
+
+def run_batch(asr: ASR, corpus: Iterable[Utterance]) -> List[UtteranceResult]:
+    """Transcribe each utterance with :meth:`ASR.speech_to_text` and measure its latency."""
+    results = []
+    for utterance in corpus:
+        start = time.perf_counter()
+        transcript = asr.speech_to_text(utterance.audio, utterance.sampling_rate)
+        latency = time.perf_counter() - start
+
+        logger.debug("Transcribed %s (%.2fs) in %.3fs: %s", utterance.name, utterance.duration, latency, transcript)
+        results.append(UtteranceResult(utterance.name, utterance.duration, latency, transcript, utterance.reference))
+
+    return results
+
+
+def run_streaming(asr: BufferedASR, corpus: Iterable[Utterance], chunk_secs: float = 0.1,
+                  realtime: bool = False) -> List[UtteranceResult]:
+    """
+    Stream each utterance in chunks of `chunk_secs` through :meth:`BufferedASR.push_audio`.
+
+    Each utterance is transcribed on a new stream if the ASR provides `new_stream()`. The
+    transcript of an utterance is the concatenation of its final transcripts. With `realtime`
+    the chunks are pushed at the pace of the audio, otherwise as fast as possible.
+
+    The time to first partial is measured from the first pushed chunk, the time to final
+    from the end of the audio to the last final transcript.
+    """
+    results = []
+    for utterance in corpus:
+        stream = asr.new_stream() if hasattr(asr, "new_stream") else asr
+        chunk_size = max(1, int(chunk_secs * utterance.sampling_rate))
+
+        finals = []
+        chunk_latencies = []
+        first_partial = None
+        start = time.perf_counter()
+        for idx, offset in enumerate(range(0, utterance.audio.shape[0], chunk_size)):
+            if realtime:
+                time.sleep(max(0.0, start + idx * chunk_secs - time.perf_counter()))
+
+            chunk_start = time.perf_counter()
+            transcripts = list(stream.push_audio([utterance.audio[offset:offset + chunk_size]],
+                                                 utterance.sampling_rate))
+            chunk_latencies.append(time.perf_counter() - chunk_start)
+
+            if first_partial is None and any(transcript.text.strip() for transcript in transcripts):
+                first_partial = time.perf_counter() - start
+            finals.extend(transcript.text for transcript in transcripts if transcript.is_final)
+
+        audio_end = start + utterance.duration if realtime else time.perf_counter()
+        if hasattr(stream, "finish"):
+            final = stream.finish()
+            finals.append(final.text)
+            if first_partial is None and final.text.strip():
+                first_partial = time.perf_counter() - start
+        end = time.perf_counter()
+
+        transcript = " ".join(text.strip() for text in finals if text.strip())
+        logger.debug("Transcribed %s (%.2fs) in %.3fs: %s", utterance.name, utterance.duration, end - start, transcript)
+        results.append(UtteranceResult(utterance.name, utterance.duration, end - start, transcript,
+                                       utterance.reference, chunk_latencies, first_partial, end - audio_end))
+
+    return results
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().translate(str.maketrans("", "", string.punctuation)).split())
+
+
+def word_error_rate(results: Iterable[UtteranceResult]) -> Optional[float]:
+    """Word error rate over all results with a reference, ignoring case and punctuation."""
+    with_reference = [result for result in results if result.reference is not None]
+    if not with_reference:
+        return None
+
+    return float(jiwer.wer([normalize_text(result.reference) for result in with_reference],
+                           [normalize_text(result.transcript) for result in with_reference]))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def percentiles(values: Iterable[float]) -> Optional[Dict[str, float]]:
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+
+    return {f"p{p}": float(np.percentile(values, p)) for p in PERCENTILES}
+
+
+def summarize(results: List[UtteranceResult]) -> Dict[str, Any]:
+    """Aggregate the metrics of a benchmark run."""
+    duration = sum(result.duration for result in results)
+    latency = sum(result.latency for result in results)
+
+    return {
+        "utterances": len(results),
+        "audio_secs": duration,
+        "processing_secs": latency,
+        "rtf": latency / duration if duration else None,
+        "latency": percentiles(result.latency for result in results),
+        "chunk_latency": percentiles(latency for result in results for latency in result.chunk_latencies),
+        "first_partial": percentiles(result.first_partial for result in results),
+        "final": percentiles(result.final for result in results),
+        "peak_rss_mb": peak_rss_mb(),
+        "wer": word_error_rate(results),
+    }
+
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare a benchmark report with a baseline report on the same corpus, e.g. of float32 inference.
+
+    Returns the word error rate of the transcripts against the transcripts of the baseline
+    (`wer_vs_baseline`, over utterances with a non-empty baseline transcript), the change of the
+    word error rate against the references (`wer_delta`) and the `speedup` of the processing time.
+    """
+    pairs = [(normalize_text(expected["transcript"]), normalize_text(actual["transcript"]))
+             for expected, actual in zip(baseline["utterances"], report["utterances"])]
+    pairs = [(expected, actual) for expected, actual in pairs if expected]
+
+    baseline_summary, summary = baseline["summary"], report["summary"]
+    has_wer = summary["wer"] is not None and baseline_summary["wer"] is not None
+
+    return {
+        "wer_vs_baseline": float(jiwer.wer([expected for expected, _ in pairs], [actual for _, actual in pairs]))
+                           if pairs else None,
+        "wer_delta": summary["wer"] - baseline_summary["wer"] if has_wer else None,
+        "speedup": baseline_summary["processing_secs"] / summary["processing_secs"]
+                   if summary["processing_secs"] else None,
+    }
+
+
+def create_backend(spec: str, kwargs: Dict[str, Any]) -> Union[ASR, BufferedASR]:
+    """Create an ASR from a registered backend name or `module:Class` specification and keyword arguments."""
+    return backends.create_backend(spec, **kwargs)
+
+
+class StubServer:
+    """
+    Local HTTP server that stubs remote transcription services.
+
+    Serves the whisper.cpp server endpoint (`/inference`) and the OpenAI transcription
+    endpoint (`/v1/audio/transcriptions`). Requests are answered with `transcript` after
+    `latency` seconds, the first `failures` requests fail with `503 Service Unavailable`.
+    Requests are handled on separate threads, connections are kept alive.
+    """
+    ENDPOINTS = {
+        "whispercpp": "/inference",
+        "openai": "/v1",
+    }
+
+    def __init__(self, transcript: str = "", latency: float = 0.0, failures: int = 0):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.latency)
+                with stub._lock:
+                    stub.in_flight -= 1
+                    stub.requests += 1
+                    failed = stub.requests <= stub.failures
+
+                if failed:
+                    self.send_response(503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body = json.dumps({"text": stub.transcript}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self.transcript = transcript
+        self.latency = latency
+        self.failures = failures
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def url(self, service: str) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{self.ENDPOINTS[service]}"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="asr-stub", daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+
+def benchmark(asr: Union[ASR, BufferedASR], corpus: List[Utterance], chunk_secs: float = 0.1,
+              realtime: bool = False) -> Dict[str, Any]:
+    """Run the benchmark for `asr`, streaming if it is a :class:`BufferedASR`, and return summary and results."""
+    if isinstance(asr, BufferedASR):
+        results = run_streaming(asr, corpus, chunk_secs, realtime)
+    else:
+        results = run_batch(asr, corpus)
+
+    return {
+        "backend": type(asr).__name__,
+        "mode": "streaming" if isinstance(asr, BufferedASR) else "batch",
+        "summary": summarize(results),
+        "utterances": [dataclasses.asdict(result) for result in results],
+    }
+
+
+def _format_percentiles(values: Optional[Dict[str, float]]) -> str:
+    if values is None:
+        return "-"
+
+    return " ".join(f"{name}={value * 1000:.1f}ms" for name, value in values.items())
+
+
+def _print_summary(report: Dict[str, Any], label: str = "") -> None:
+    summary = report["summary"]
+    print(f"{report['backend']}{label} ({report['mode']}): {summary['utterances']} utterances, "
+          f"{summary['audio_secs']:.1f}s audio")
+    print(f"  RTF:           {summary['rtf']:.3f}")
+    print(f"  Latency:       {_format_percentiles(summary['latency'])}")
+    print(f"  Chunk latency: {_format_percentiles(summary['chunk_latency'])}")
+    print(f"  First partial: {_format_percentiles(summary['first_partial'])}")
+    print(f"  Final:         {_format_percentiles(summary['final'])}")
+    print(f"  Peak RSS:      {summary['peak_rss_mb']:.0f}MB")
+    print(f"  WER:           {'-' if summary['wer'] is None else format(summary['wer'], '.3f')}")
+
+    comparison = report.get("comparison")
+    if comparison:
+        wer = comparison["wer_vs_baseline"]
+        speedup = comparison["speedup"]
+        print(f"  WER vs base:   {'-' if wer is None else format(wer, '.3f')}")
+        print(f"  Speedup:       {'-' if speedup is None else format(speedup, '.2f')}x")
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Benchmark an ASR implementation on a corpus of WAV files.")
+    parser.add_argument("corpus", help="Directory with WAV files and optional .txt reference transcripts")
+    parser.add_argument("--backend", required=True, help="Registered ASR backend name or implementation as module:Class")
+    parser.add_argument("--kwargs", default="{}", help="JSON object with keyword arguments for the backend")
+    parser.add_argument("--chunk-secs", type=float, default=0.1, help="Chunk duration for streaming backends")
+    parser.add_argument("--realtime", action="store_true", help="Stream chunks at the pace of the audio")
+    parser.add_argument("--stub", choices=sorted(StubServer.ENDPOINTS),
+                        help="Run the backend against a local stub server, passed as 'url' argument")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Response latency of the stub server")
+    parser.add_argument("--precisions",
+                        help="Comma separated precisions passed as 'precision' argument to the backend, e.g. "
+                             "float32,int8,bfloat16. Each is benchmarked and compared with the first one. "
+                             "Peak RSS accumulates over the runs, benchmark one precision per process for memory.")
+    parser.add_argument("--max-baseline-wer", type=float,
+                        help="Fail if the WER of a precision against the transcripts of the first one exceeds this")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parsed = parser.parse_args(args)
+
+    corpus = load_corpus(parsed.corpus)
+    if not corpus:
+        raise ValueError(f"No WAV files found in {parsed.corpus}")
+
+    kwargs = json.loads(parsed.kwargs)
+    precisions = [precision.strip() for precision in parsed.precisions.split(",")] if parsed.precisions else [None]
+
+    reports = {}
+    stub = StubServer(latency=parsed.stub_latency).start() if parsed.stub else None
+    try:
+        if parsed.stub == "openai":
+            # The OpenAI client reads its endpoint from the environment
+            os.environ["OPENAI_BASE_URL"] = stub.url("openai")
+            kwargs.setdefault("api_key", "stub")
+        elif stub:
+            kwargs["url"] = stub.url(parsed.stub)
+
+        for precision in precisions:
+            rss_before_load = peak_rss_mb()
+            asr = create_backend(parsed.backend, dict(kwargs, precision=precision) if precision else kwargs)
+            report = benchmark(asr, corpus, parsed.chunk_secs, parsed.realtime)
+            report["summary"]["peak_rss_mb_before_load"] = rss_before_load
+            if reports:
+                report["comparison"] = compare(next(iter(reports.values())), report)
+            reports[precision] = report
+            del asr
+    finally:
+        if stub:
+            stub.stop()
+
+    for precision, report in reports.items():
+        _print_summary(report, f" [{precision}]" if precision else "")
+
+    if parsed.output:
+        with open(parsed.output, "w") as output:
+            json.dump(reports[None] if None in reports else {"precisions": reports}, output, indent=2)
+
+    if parsed.max_baseline_wer is not None:
+        failed = [precision for precision, report in reports.items()
+                  if (report.get("comparison") or {}).get("wer_vs_baseline") is not None
+                  and report["comparison"]["wer_vs_baseline"] > parsed.max_baseline_wer]
+        if failed:
+            parser.exit(1, f"WER against {precisions[0]} exceeds {parsed.max_baseline_wer} for {', '.join(failed)}\n")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
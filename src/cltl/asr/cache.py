@@ -0,0 +1,154 @@
+"""
+Content-addressed cache of transcripts.
+
+:class:`CachedASR` wraps any :class:`~cltl.asr.api.ASR` implementation and caches its
+transcripts by a hash of the audio samples, sampling rate, model and language, in a
+bounded in-memory LRU tier and an optional sqlite tier on disk.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from cltl.asr.api import ASR
+from cltl.asr.metrics import MetricsSink
+
+logger = logging.getLogger(__name__)
+
+
+class CachedASR(ASR):
+    def __init__(self, asr: ASR, model_id: str = None, language: str = None, max_entries: int = 1024,
+                 path: str = None, max_disk_entries: int = 100_000, metrics: Optional[MetricsSink] = None):
+        """
+        Parameters
+        ----------
+        asr : ASR
+            The ASR implementation whose transcripts are cached.
+        model_id : str
+            Identifier of the model used by `asr`, part of the cache key. Defaults to the
+            class name of `asr`.
+        language : str
+            Language of the audio, part of the cache key.
+        max_entries : int
+            Maximum number of transcripts in memory, least recently used transcripts are evicted.
+        path : str
+            Optional path of an sqlite database to store transcripts on disk, shared across
+            restarts and processes.
+        max_disk_entries : int
+            Maximum number of transcripts on disk, least recently used transcripts are evicted.
+        metrics : MetricsSink
+            Optional sink for the counters `cache_hits` (from memory), `cache_disk_hits` and `cache_misses`.
+        """
+        self._asr = asr
+        self._model_id = model_id if model_id is not None else f"{type(asr).__module__}.{type(asr).__qualname__}"
+        self._language = language or ""
+        self._max_entries = max_entries
+        self._max_disk_entries = max_disk_entries
+        self._metrics = metrics
+
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS transcripts "
+                             "(key TEXT PRIMARY KEY, transcript TEXT NOT NULL, accessed REAL NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS transcripts_accessed ON transcripts (accessed)")
+
+    @property
+    def asr(self) -> ASR:
+        return self._asr
+
+    def key(self, audio: np.ndarray, sampling_rate: int) -> str:
+        """Cache key of the audio, a hash of the samples, their format, the sampling rate, model and language."""
+        audio = np.ascontiguousarray(audio)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{self._model_id}|{self._language}|{sampling_rate}|{audio.dtype.str}|{audio.shape}|".encode())
+        digest.update(memoryview(audio).cast("B"))
+
+        return digest.hexdigest()
+
+    def speech_to_text(self, audio: np.ndarray, sampling_rate: int) -> str:
+        key = self.key(audio, sampling_rate)
+        transcript = self._get(key)
+        if transcript is None:
+            transcript = self._asr.speech_to_text(audio, sampling_rate)
+            self._put(key, transcript)
+
+        return transcript
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        audios = list(audios)
+        keys = [self.key(audio, sampling_rate) for audio in audios]
+        transcripts = [self._get(key) for key in keys]
+
+        missing = [idx for idx, transcript in enumerate(transcripts) if transcript is None]
+        if missing:
+            for idx, transcript in zip(missing, self._asr.speech_to_texts([audios[idx] for idx in missing],
+                                                                          sampling_rate)):
+                transcripts[idx] = transcript
+                self._put(keys[idx], transcript)
+
+        return transcripts
+
+    def clear(self) -> None:
+        """Remove all transcripts from the cache."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM transcripts")
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _get(self, key: str) -> Optional[str]:
+        with self._lock:
+            transcript = self._entries.get(key)
+            if transcript is not None:
+                self._entries.move_to_end(key)
+                self._count("cache_hits")
+                return transcript
+
+            if self._db is not None:
+                row = self._db.execute("SELECT transcript FROM transcripts WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE transcripts SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._add_entry(key, row[0])
+                    self._count("cache_disk_hits")
+                    return row[0]
+
+            self._count("cache_misses")
+
+            return None
+
+    def _put(self, key: str, transcript: Optional[str]) -> None:
+        if transcript is None:
+            return
+
+        with self._lock:
+            self._add_entry(key, transcript)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO transcripts VALUES (?, ?, ?)", (key, transcript, time.time()))
+                self._db.execute("DELETE FROM transcripts WHERE key IN "
+                                 "(SELECT key FROM transcripts ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                                 (self._max_disk_entries,))
+
+    def _add_entry(self, key: str, transcript: str) -> None:
+        self._entries[key] = transcript
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _count(self, name: str) -> None:
+        if self._metrics is not None:
+            self._metrics.increment(name)
@@ -0,0 +1,329 @@
+"""
+Turn tracking of streaming ASR that decodes audio in fixed-size chunks with left and right context.
+
+:class:`ChunkedStreamingASR` implements `push_audio()` and `finish()` of streaming
+implementations that advance one chunk per decode step and look ahead by a right
+context, e.g. :class:`~cltl.asr.parakeet_stream.LocalParakeetRNNTStreamingASR`. It
+collects audio until a step can be decoded, tracks the sample positions of turns and
+finalizes transcripts. Implementations provide the model specific decode step.
+"""
+
+import abc
+import copy
+import logging
+import string
+from collections import deque
+from typing import Any, Iterable, List, Optional, Union
+
+import numpy as np
+
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+from cltl.asr.audio_buffer import AudioRingBuffer
+
+logger = logging.getLogger(__name__)
+
+
+# SentencePiece marker of word pieces that start a new word, shared by the implementations
+_WORD_START = "\u2581"
+
+
+class ChunkedStreamingASR(BufferedASR):
+    """
+    Streaming ASR loop that decodes audio chunk by chunk.
+
+    Implementations set the attributes
+
+    - `sample_rate`: sample rate of the model.
+    - `context_samples`: left, chunk and right context of a decode step in samples.
+    - `_turn_threshold_chunks`: number of unchanged partial transcripts after which a turn is finalized.
+    - `_vad`, `_vad_silence_threshold`: optional VAD and the samples of silence that end a turn.
+    - `_metrics`: optional :class:`~cltl.asr.metrics.MetricsSink`.
+
+    and implement :meth:`reset`, :meth:`_run_step`, :meth:`_speculative_finish` and
+    :meth:`_decode_text`. :meth:`reset` must call :meth:`_reset_turn`.
+    """
+
+    @abc.abstractmethod
+    def reset(self, keep_recent: bool = False) -> None:
+        """Reset the stream, with `keep_recent` the recent audio is replayed at the start of the new turn."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _run_step(self, new_audio: Any, is_final: bool) -> str:
+        """Add the audio of one decode step to the stream, decode it and return the transcript of the turn."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _speculative_finish(self) -> str:
+        """Return the transcript of the turn including the right context, without changing the stream state."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _decode_text(self) -> str:
+        """Return the transcript of the turn."""
+        raise NotImplementedError()
+
+    def _as_step_audio(self, samples: np.ndarray) -> Any:
+        """Convert samples taken from the pending audio to the input of :meth:`_run_step`."""
+        return samples
+
+    def _reset_turn(self, recent_audio: np.ndarray, keep_recent: bool) -> None:
+        """Reset the turn tracking, with `keep_recent` `recent_audio` is replayed at the start of the new turn."""
+        if keep_recent:
+            self.pending_audio.clear()
+        else:
+            # Pending audio never exceeds one decode step plus the last pushed packet
+            self.pending_audio = AudioRingBuffer(2 * (self.context_samples.chunk + self.context_samples.right))
+        self.pending_audio.write(recent_audio)
+        self.partial_transcripts = deque([], maxlen=self._turn_threshold_chunks)
+        self.started = False
+        self.closed = False
+        self._consecutive_silence_samples = 0
+
+        self._transcript_onset_sample: Optional[int] = None
+
+        if not keep_recent:
+            self._total_samples_consumed = 0
+            self._replay_offset = 0
+        else:
+            # pending_audio carries samples already counted in _total_samples_consumed.
+            # Track the overcount so stream-position calculations stay accurate.
+            self._replay_offset += recent_audio.size
+
+    def new_stream(self, vad=None) -> "ChunkedStreamingASR":
+        """Create an independent stream that shares the loaded model with this instance."""
+        stream = copy.copy(self)
+        stream._vad = vad
+        stream._vad_silence_threshold = self.context_samples.right if vad else None
+        stream.reset()
+
+        return stream
+
+    def get_current_sample_position(self) -> int:
+        """Return the total number of samples consumed since the last full reset."""
+        return self._total_samples_consumed - self._replay_offset
+
+    def _stream_position(self, consumed: int) -> int:
+        """Convert an internal consumed-sample count to a true stream position.
+
+        _total_samples_consumed inflates by the size of replayed audio on each
+        keep_recent reset; _replay_offset tracks that cumulative overcount.
+        """
+        return consumed - self._replay_offset
+
+    def _turn_start(self) -> int:
+        """Return the start sample of the current turn.
+
+        _transcript_onset_sample is set to (_total_samples_consumed - chunk_samples) at the
+        step that first produces a non-empty transcript.  That value equals
+        chunk_start_in_stream + right_context (in the internal counter space), so
+        subtracting right_context and correcting for the replay offset recovers the
+        absolute stream position of the decoded chunk that first contained speech.
+        """
+        onset = self._transcript_onset_sample if self._transcript_onset_sample is not None \
+            else self._total_samples_consumed
+        return max(self._stream_position(onset) - self.context_samples.right, 0)
+
+    def _speech_end(self) -> int:
+        """Return the end sample of the current turn.
+
+        The decoder was running right_context samples ahead of the true speech position;
+        subtracting right_context (and correcting for replay offset) gives the stream
+        position of the last decoded audio.
+        """
+        return max(self._stream_position(self._total_samples_consumed) - self.context_samples.right, 0)
+
+    def _try_speculative_finalize(self, current: str, results: List[StreamTranscription]) -> bool:
+        """Speculatively decode right context; finalize if transcript is stable."""
+        speculative_text = self._speculative_finish()
+
+        current_normalised    = current.strip().strip(string.punctuation)
+        speculative_normalised = speculative_text.strip().strip(string.punctuation)
+        if current_normalised != speculative_normalised:
+            return False
+
+        results.append(StreamTranscription(
+            speculative_text.strip(),
+            is_final=True,
+            start=self._turn_start(),
+            end=self._speech_end(),
+        ))
+        self.reset(keep_recent=True)
+        if self._metrics is not None:
+            self._metrics.increment("speculative_finals")
+
+        return True
+
+    def _is_right_context_silent(self) -> bool:
+        """Return True when consecutive silence has reached the right-context threshold."""
+        return (
+            self._vad is not None
+            and self._consecutive_silence_samples >= self._vad_silence_threshold
+        )
+
+    def push_audio(self, audio_frames: Union[np.ndarray, Iterable[np.ndarray]],
+                   sampling_rate: int = None) -> List[StreamTranscription]:
+        """
+        Feed more mono audio samples. Returns zero or more partial results.
+
+        The caller can feed arbitrary chunk sizes (e.g. 20 ms, 100 ms, 500 ms).
+        Internally, decoding happens only when enough audio has accumulated.
+        """
+        self._add_pending_audio(audio_frames, sampling_rate)
+
+        decoded_this_call = False
+        results: List[StreamTranscription] = []
+
+        while True:
+            step_audio = self._next_step_audio()
+            if step_audio is None:
+                break
+
+            decoded_this_call = True
+            current = self._run_step(step_audio, is_final=False)
+            self._process_step(current, results)
+
+        if decoded_this_call:
+            self._add_partial(results)
+
+        return results
+
+    def _add_pending_audio(self, audio_frames: Union[np.ndarray, Iterable[np.ndarray]],
+                           sampling_rate: Optional[int]) -> None:
+        if self.closed:
+            raise RuntimeError("Stream is already closed. Call reset() for a new stream.")
+
+        if sampling_rate and sampling_rate != self.sample_rate:
+            raise ValueError(f"Sampling rate {sampling_rate} is not supported (expected {self.sample_rate}).")
+
+        if isinstance(audio_frames, np.ndarray):
+            audio_frames = (audio_frames,)
+
+        audio_frames = list(audio_frames)
+        self._detect_silence(audio_frames)
+
+        for frame in audio_frames:
+            self.pending_audio.write(frame)
+
+    def _next_step_audio(self) -> Optional[Any]:
+        """Take the audio for the next decode step from the pending audio, if enough audio is available."""
+        # First decode step needs chunk + right_context; subsequent steps need one chunk.
+        needed = (
+            self.context_samples.chunk + self.context_samples.right
+            if not self.started
+            else self.context_samples.chunk
+        )
+
+        if len(self.pending_audio) < needed:
+            return None
+
+        # Zero-copy view, consumed by the decode step before new audio is written
+        step_audio = self._as_step_audio(self.pending_audio.consume(needed))
+        self._total_samples_consumed += needed
+
+        return step_audio
+
+    def _process_step(self, current: str, results: List[StreamTranscription]) -> None:
+        """Track the turn onset and finalize the transcript of a decode step if possible."""
+        if current.strip() and self._transcript_onset_sample is None:
+            # Always encode chunk_start_in_stream + right_context so that
+            # _turn_start() can recover the stream position by subtracting right_context,
+            # regardless of whether this is the first step (needed = chunk + right) or not.
+            self._transcript_onset_sample = self._total_samples_consumed - self.context_samples.chunk
+
+        finalized = self._try_finalize(current, results)
+        if not finalized:
+            self.partial_transcripts.append(current)
+
+    def _add_partial(self, results: List[StreamTranscription]) -> None:
+        if self.partial_transcripts:
+            results.append(StreamTranscription(
+                self.partial_transcripts[-1],
+                is_final=False,
+                start=self._turn_start(),
+            ))
+
+    def _try_finalize(self, current: str, results: List[StreamTranscription]) -> bool:
+        """Attempt to finalize the current transcript by one of two strategies.
+
+        Speculative finish is always tried first — it uses the right-context
+        lookahead to confirm the transcript is stable before committing.
+        The turn-threshold acts as a fallback: when the deque is full and the
+        transcript has not changed for that many chunks, we try speculative
+        finish once more and only force a final if it also agrees.
+        """
+        if current.strip() and (
+            current.strip().endswith((".", "?", "!")) or self._is_right_context_silent()
+        ):
+            return self._try_speculative_finalize(current, results)
+
+        if (
+            len(self.partial_transcripts) == self.partial_transcripts.maxlen
+            and current.strip()
+            and current == self.partial_transcripts[0]
+        ):
+            # Use speculative finish to confirm before forcing a final, so we
+            # don't emit a truncated transcript when the sentence is still growing.
+            if self._try_speculative_finalize(current, results):
+                return True
+
+            # Speculative finish disagreed (sentence still changing): emit the
+            # current text as a forced final and reset so the deque doesn't keep
+            # re-firing on the same stale transcript.
+            results.append(StreamTranscription(
+                current,
+                is_final=True,
+                start=self._turn_start(),
+                end=self._speech_end(),
+            ))
+            self.reset(keep_recent=True)
+            if self._metrics is not None:
+                self._metrics.increment("forced_finals")
+            return True
+
+        return False
+
+    def _detect_silence(self, audio_frames: List[np.ndarray]) -> None:
+        if self._vad is None:
+            return
+
+        for frame in audio_frames:
+            if self._vad.is_vad(frame, self.sample_rate):
+                self._consecutive_silence_samples = 0
+            else:
+                self._consecutive_silence_samples += frame.size
+
+    def finish(self) -> StreamTranscription:
+        """Flush the tail and close the stream."""
+        if self.closed:
+            return StreamTranscription(
+                text=self._decode_text(),
+                is_final=True,
+                start=self._turn_start(),
+                end=self._total_samples_consumed,
+            )
+
+        self.closed = True
+
+        if not self.started and len(self.pending_audio) == 0:
+            return StreamTranscription(text="", is_final=True, start=0, end=0)
+
+        if len(self.pending_audio) > 0:
+            tail = self.pending_audio.consume()
+            onset = self._total_samples_consumed
+            self._total_samples_consumed += len(tail)
+            transcript_text = self._run_step(self._as_step_audio(tail), is_final=True)
+        else:
+            # No tail, but buffered right-context must be promoted into the final chunk.
+            onset = self._total_samples_consumed
+            transcript_text = self._run_step(self._as_step_audio(np.zeros(0, dtype=np.float32)), is_final=True)
+
+        if transcript_text.strip() and self._transcript_onset_sample is None:
+            self._transcript_onset_sample = onset
+
+        return StreamTranscription(
+            transcript_text,
+            is_final=True,
+            start=self._turn_start(),
+            end=self._speech_end(),
+        )
@@ -0,0 +1,58 @@
+"""
+Concurrent transcription for ASR implementations that call remote services.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
+import numpy as np
+
+from cltl.asr.api import ASR
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrentASR(ASR):
+    """
+    ASR that keeps up to `max_concurrency` requests in flight in :meth:`speech_to_texts`.
+
+    Intended for implementations that call a remote service, where the throughput of
+    sequential transcription is limited by the request latency. Requests are issued from
+    a thread pool that is shared by all calls to :meth:`speech_to_texts` of the instance,
+    i.e. the limit applies per instance. Transcripts are returned in the order of the
+    input, if a request fails the exception of the first failed request is raised.
+
+    Implementations must call :meth:`__init__` and their :meth:`speech_to_text` must be
+    thread-safe.
+    """
+
+    def __init__(self, max_concurrency: int = 4):
+        """
+        Parameters
+        ----------
+        max_concurrency : int
+            Maximum number of concurrent requests. If set to 1, audio is transcribed sequentially.
+        """
+        self._max_concurrency = max(max_concurrency, 1)
+        self._executor = None
+        if self._max_concurrency > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency,
+                                                thread_name_prefix=f"{type(self).__name__}-request")
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        if self._executor is None:
+            return super().speech_to_texts(audios, sampling_rate)
+
+        futures = [self._executor.submit(self.speech_to_text, audio, sampling_rate) for audio in audios]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+
+    def close(self):
+        """Shut down the request threads."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
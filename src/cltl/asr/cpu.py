@@ -0,0 +1,118 @@
+"""
+CPU threads and affinity of local inference.
+
+Torch runs operators on a pool of intra-op threads, by default one per physical core,
+and runs independent operators in parallel on a pool of inter-op threads. Both pools are
+process wide:
+
+* :func:`configure_process` pins the process to a set of CPUs, optionally those of a NUMA
+  node, and sets the sizes of both thread pools. Call it once at process start, before models
+  are loaded: threads inherit the affinity when they are created, memory is allocated on the
+  NUMA node of the CPU that first touches it, and the inter-op pool can only be sized before
+  it is used. For strict memory binding start the process with `numactl --membind`.
+
+Engines in the same process share the thread pools. To run engines with different thread
+counts, or to use all cores of a host with several model replicas, run each in its own process,
+pinned to a disjoint set of CPUs with as many intra-op threads as CPUs, see :func:`partition_cpus`.
+Running more threads than CPUs in total oversubscribes the cores and increases latency.
+"""
+
+import logging
+import os
+from typing import List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cpu_list(cpus: str) -> List[int]:
+    """Parse a CPU list in the Linux format, e.g. `0-3,8,10-11`."""
+    parsed = []
+    for part in cpus.strip().split(","):
+        if not part.strip():
+            continue
+        start, _, end = part.partition("-")
+        parsed.extend(range(int(start), int(end or start) + 1))
+
+    return parsed
+
+
+def numa_node_cpus(node: int) -> List[int]:
+    """CPUs of the NUMA `node` (Linux only)."""
+    try:
+        with open(f"/sys/devices/system/node/node{node}/cpulist") as cpulist:
+            return parse_cpu_list(cpulist.read())
+    except FileNotFoundError:
+        raise ValueError(f"NUMA node {node} not found")
+
+
+def available_cpus() -> List[int]:
+    """CPUs the current process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cpus(parts: int, cpus: Sequence[int] = None) -> List[List[int]]:
+    """Split `cpus` (by default the available CPUs) into `parts` disjoint groups of consecutive CPUs."""
+    cpus = list(cpus) if cpus is not None else available_cpus()
+    if not 0 < parts <= len(cpus):
+        raise ValueError(f"Cannot split {len(cpus)} CPUs into {parts} parts")
+
+    size, remainder = divmod(len(cpus), parts)
+    bounds = [idx * size + min(idx, remainder) for idx in range(parts + 1)]
+
+    return [cpus[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def configure_process(threads: Optional[int] = None, interop_threads: Optional[int] = None,
+                      cpus: Union[str, Sequence[int], None] = None, numa_node: Optional[int] = None) -> List[int]:
+    """
+    Pin the process to CPUs and set the torch thread pools, see the module documentation.
+
+    Parameters
+    ----------
+    threads : int
+        Number of intra-op threads, defaults to the number of CPUs if the process is pinned.
+    interop_threads : int
+        Number of inter-op threads, ignored with a warning if the pool is already in use.
+    cpus : Union[str, Sequence[int]]
+        CPUs to pin the process to, as sequence or CPU list string (e.g. `0-3,8`).
+    numa_node : int
+        Pin the process to the CPUs of this NUMA node, or the given `cpus` on this node.
+
+    Returns
+    -------
+    List[int]
+        The CPUs the process runs on.
+    """
+    if isinstance(cpus, str):
+        cpus = parse_cpu_list(cpus)
+    if numa_node is not None:
+        node_cpus = numa_node_cpus(numa_node)
+        cpus = [cpu for cpu in cpus if cpu in node_cpus] if cpus else node_cpus
+        if not cpus:
+            raise ValueError(f"No CPUs selected on NUMA node {numa_node}")
+
+    if cpus:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpus)
+            logger.info("Pinned process %s to CPUs %s", os.getpid(), cpus)
+        else:
+            logger.warning("CPU affinity is not supported on this platform")
+        if threads is None:
+            threads = len(cpus)
+
+    if threads or interop_threads:
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        if interop_threads:
+            try:
+                torch.set_num_interop_threads(interop_threads)
+            except RuntimeError as e:
+                logger.warning("Failed to set %s inter-op threads: %s", interop_threads, e)
+
+    return available_cpus()
+
@@ -3,13 +3,16 @@ from typing import List
 import numpy as np
 from google.cloud import speech_v1 as speech
 
-from cltl.asr.api import ASR
+from cltl.asr.concurrent import ConcurrentASR
 
 
-class GoogleASR(ASR):
+class GoogleASR(ConcurrentASR):
     MAX_ALTERNATIVES = 10
 
-    def __init__(self, language: str, sampling_rate: int, internal_language: str = None, hints: List[str] = ()):
+    def __init__(self, language: str, sampling_rate: int, internal_language: str = None, hints: List[str] = (),
+                 max_concurrency: int = 4):
+        super().__init__(max_concurrency)
+
         self._sampling_rate = sampling_rate
         self._language = language
         self._hints = hints
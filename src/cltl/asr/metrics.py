@@ -0,0 +1,203 @@
+"""
+Lightweight timing and counter instrumentation.
+
+Instrumented components report to a :class:`MetricsSink`. If no sink is configured,
+instrumentation is skipped with negligible overhead.
+"""
+
+import abc
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import ContextManager, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsSink(abc.ABC):
+    """Receiver of timing and counter measurements."""
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Record a duration in seconds for the metric `name`."""
+        raise NotImplementedError()
+
+    def increment(self, name: str, count: int = 1) -> None:
+        """Increment the counter `name` by `count`."""
+        raise NotImplementedError()
+
+    def gauge(self, name: str, value: float) -> None:
+        """Set the current value of the gauge `name`."""
+        raise NotImplementedError()
+
+
+class _Timer:
+    __slots__ = ("_sink", "_name", "_start")
+
+    def __init__(self, sink: MetricsSink, name: str):
+        self._sink = sink
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._sink.observe(self._name, time.perf_counter() - self._start)
+
+
+_NO_TIMER = contextlib.nullcontext()
+
+
+def timed(sink: Optional[MetricsSink], name: str) -> ContextManager:
+    """Context manager that reports the duration of its block to `sink`, if a sink is provided."""
+    return _NO_TIMER if sink is None else _Timer(sink, name)
+
+
+class LoggingSink(MetricsSink):
+    """Log every measurement."""
+
+    def __init__(self, level: int = logging.DEBUG, log: logging.Logger = logger):
+        self._level = level
+        self._logger = log
+
+    def observe(self, name: str, seconds: float) -> None:
+        self._logger.log(self._level, "%s took %.2f ms", name, seconds * 1000)
+
+    def increment(self, name: str, count: int = 1) -> None:
+        self._logger.log(self._level, "%s +%s", name, count)
+
+    def gauge(self, name: str, value: float) -> None:
+        self._logger.log(self._level, "%s = %s", name, value)
+
+
+@dataclass
+class Histogram:
+    buckets: Sequence[float]
+    counts: List[int]
+    count: int = 0
+    sum: float = 0.0
+    max: float = 0.0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Approximate the percentile by the upper bound of its bucket, or the maximum for the last bucket."""
+        if not self.count:
+            return None
+
+        rank = percentile / 100 * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max)
+
+        return self.max
+
+
+class HistogramSink(MetricsSink):
+    """Keep measurements in memory as histograms with fixed buckets, counters and gauges."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                # The last bucket collects values above the largest bound
+                histogram = Histogram(self._buckets, [0] * (len(self._buckets) + 1))
+                self._histograms[name] = histogram
+            histogram.counts[bisect.bisect_left(self._buckets, seconds)] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            histogram.max = max(histogram.max, seconds)
+
+    def increment(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + count
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def histograms(self) -> Dict[str, Histogram]:
+        """Return a copy of the current histograms."""
+        with self._lock:
+            return {name: Histogram(histogram.buckets, list(histogram.counts), histogram.count, histogram.sum,
+                                    histogram.max)
+                    for name, histogram in self._histograms.items()}
+
+    def counters(self) -> Dict[str, int]:
+        """Return a copy of the current counters."""
+        with self._lock:
+            return dict(self._counters)
+
+    def gauges(self) -> Dict[str, float]:
+        """Return a copy of the current gauges."""
+        with self._lock:
+            return dict(self._gauges)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+
+class PrometheusSink(HistogramSink):
+    """In-memory histograms, counters and gauges that can be exposed in the Prometheus text format."""
+
+    def __init__(self, namespace: str = "cltl_asr", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(buckets)
+        self._namespace = namespace
+
+    def exposition(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, histogram in sorted(self.histograms().items()):
+            metric = f"{self._namespace}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+            lines.append(f"{metric}_sum {histogram.sum}")
+            lines.append(f"{metric}_count {histogram.count}")
+        for name, count in sorted(self.counters().items()):
+            metric = f"{self._namespace}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {count}")
+        for name, value in sorted(self.gauges().items()):
+            metric = f"{self._namespace}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MultiSink(MetricsSink):
+    """Report to several sinks."""
+
+    def __init__(self, *sinks: MetricsSink):
+        self.sinks = list(sinks)
+
+    def observe(self, name: str, seconds: float) -> None:
+        for sink in self.sinks:
+            sink.observe(name, seconds)
+
+    def increment(self, name: str, count: int = 1) -> None:
+        for sink in self.sinks:
+            sink.increment(name, count)
+
+    def gauge(self, name: str, value: float) -> None:
+        for sink in self.sinks:
+            sink.gauge(name, value)
@@ -2,44 +2,84 @@ import logging
 import numpy as np
 import os
 import shutil
-import tempfile
 import time
+from typing import Iterable, List
 
 import nemo.collections.asr as nemo_asr
 
 from cltl.combot.infra.time_util import timestamp_now
 
 from cltl.asr.api import ASR
-from cltl.asr.util import store_wav, sanitize_whisper_result
+from cltl.asr.util import store_wav, sanitize_whisper_result, temporary_wav, to_mono_float32
+from cltl.asr.warm_start import ModelCache, cached
 
 logger = logging.getLogger(__name__)
 
 
 class ParakeetASR(ASR):
-    def __init__(self, model_id: str = "nvidia/parakeet-tdt-0.6b-v3", language: str = 'en', storage: str = None):
-        self._model = nemo_asr.models.ASRModel.from_pretrained(model_name=model_id)
+    def __init__(self, model_id: str = "nvidia/parakeet-tdt-0.6b-v3", language: str = 'en', storage: str = None,
+                 model_cache: ModelCache = None):
+        """
+        Parameters
+        ----------
+        model_id : str
+            NeMo model to load.
+        language : str
+            Language of the audio input.
+        storage : str
+            Optional directory to store the transcribed audio for debugging.
+            Audio is passed to the model in memory, if not set no audio is
+            written to disk.
+        model_cache : ModelCache
+            Optional cache to load the model from, see :class:`~cltl.asr.warm_start.ModelCache`.
+        """
+        self._model = cached(model_cache, lambda: nemo_asr.models.ASRModel.from_pretrained(model_name=model_id),
+                             backend="parakeet", model_id=model_id)
         self._language = language
-        self._storage = storage if storage else tempfile.mkdtemp()
-        self._clean_storage = storage is None
+        self._storage = storage
 
     def clean(self):
-        shutil.rmtree(self._storage)
+        if self._storage:
+            shutil.rmtree(self._storage)
 
     def speech_to_text(self, audio: np.ndarray, sampling_rate: int) -> str:
-        wav_file = str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav"))
-        try:
-            store_wav(audio, sampling_rate, wav_file)
+        if self._storage:
+            store_wav(audio, sampling_rate, str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav")))
 
-            start = time.time()
-            transcription = self._model.transcribe([wav_file])
+        start = time.time()
+        if sampling_rate == self._model.cfg.sample_rate:
+            transcription = self._model.transcribe([to_mono_float32(audio)], verbose=False)
+        else:
+            # Let NeMo resample the audio from file
+            with temporary_wav(audio, sampling_rate) as wav_file:
+                transcription = self._model.transcribe([wav_file], verbose=False)
 
-            audio_duration = audio.shape[0] / sampling_rate
-            transcription = sanitize_whisper_result(audio_duration, transcription[0].text)
+        audio_duration = audio.shape[0] / sampling_rate
+        transcription = sanitize_whisper_result(audio_duration, transcription[0].text)
 
-            logger.debug("Transcribed audio (%s sec) in %s to %s",
-                         audio_duration, time.time() - start, transcription)
+        logger.debug("Transcribed audio (%s sec) in %s to %s",
+                     audio_duration, time.time() - start, transcription)
 
-            return transcription
-        finally:
-            if self._clean_storage:
-                os.remove(wav_file)
+        return transcription
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        """
+        Transcribe the batch from memory in a single call to the NeMo model.
+
+        Batching requires audio at the sample rate of the model, otherwise the
+        samples are transcribed one by one.
+        """
+        audios = list(audios)
+        if not audios or sampling_rate != self._model.cfg.sample_rate:
+            return super().speech_to_texts(audios, sampling_rate)
+
+        start = time.time()
+        hypotheses = self._model.transcribe([to_mono_float32(audio) for audio in audios],
+                                            batch_size=len(audios), verbose=False)
+
+        transcripts = [sanitize_whisper_result(audio.shape[0] / sampling_rate, hypothesis.text)
+                       for audio, hypothesis in zip(audios, hypotheses)]
+
+        logger.debug("Transcribed batch of %s audio samples in %s", len(audios), time.time() - start)
+
+        return transcripts
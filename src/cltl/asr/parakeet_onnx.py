@@ -0,0 +1,468 @@
+"""
+ONNX Runtime execution of the Parakeet streaming ASR.
+
+:func:`export_onnx` exports a Parakeet TDT / RNNT model from NeMo to a directory with
+
+* `encoder-model.onnx`: the Conformer encoder.
+* `decoder_joint-model.onnx`: prediction and joint network, optional.
+* `encoder-model.int8.onnx`: the encoder with dynamically quantized int8 weights, optional.
+* `features.npz`, `config.json`: window and mel filterbank of the preprocessor, the
+  vocabulary and the decoding parameters.
+
+Export requires NeMo and onnx (`cltl.asr[parakeet,onnx]`), also from the command line::
+
+    python -m cltl.asr.parakeet_onnx nvidia/parakeet-tdt-0.6b-v3 models/parakeet-tdt-0.6b-v3 --int8
+
+:class:`OnnxParakeetRNNTStreamingASR` runs the streaming loop of
+:class:`~cltl.asr.parakeet_stream.LocalParakeetRNNTStreamingASR` on an export with both
+encoder and decoder, using only onnxruntime and numpy. It provides the same
+`push_audio()` / `finish()` API and :class:`~cltl.asr.api_streaming.StreamTranscription`
+output, and starts without loading torch and NeMo. Differences to the NeMo loop:
+
+* Mel features are computed with numpy, following NeMo's `AudioToMelSpectrogramPreprocessor`.
+* Greedy TDT / RNNT decoding runs one joint step per frame and emitted token on the
+  exported decoder, instead of NeMo's batched label-looping decoder.
+* Each step encodes the full left context, cache-aware streaming is not supported.
+
+Transcripts may differ slightly from the NeMo loop, compare both with :mod:`cltl.asr.bench`
+before deploying.
+"""
+
+import argparse
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cltl.asr.chunked_stream import _WORD_START, ChunkedStreamingASR
+from cltl.asr.metrics import MetricsSink, timed
+
+logger = logging.getLogger(__name__)
+
+
+ENCODER_FILE = "encoder-model.onnx"
+QUANTIZED_ENCODER_FILE = "encoder-model.int8.onnx"
+DECODER_JOINT_FILE = "decoder_joint-model.onnx"
+FEATURES_FILE = "features.npz"
+CONFIG_FILE = "config.json"
+
+ONNX_PRECISIONS = ("float32", "int8")
+
+# Constant added to the standard deviation by NeMo's per_feature normalization
+_NORMALIZE_EPS = 1e-5
+
+
+def export_onnx(model: Any, directory: str, decoder: bool = True, quantize: bool = False) -> str:
+    """
+    Export a Parakeet TDT / RNNT model to ONNX.
+
+    Parameters
+    ----------
+    model : Union[str, ASRModel, LocalParakeetRNNTStreamingASR]
+        Name of a pretrained NeMo model, a loaded NeMo RNNT model, or a streaming ASR
+        whose model is exported. The model must not be cast to bfloat16 or quantized.
+    directory : str
+        Directory the files are written to, created if it does not exist.
+    decoder : bool
+        Also export the prediction and joint network, required by :class:`OnnxParakeetRNNTStreamingASR`.
+    quantize : bool
+        Also write the encoder with dynamically quantized int8 weights, used with `precision="int8"`.
+
+    Returns
+    -------
+    str
+        The export directory.
+    """
+    import torch
+    from nemo.collections.asr.models import ASRModel
+
+    from cltl.asr.parakeet_stream import LocalParakeetRNNTStreamingASR
+
+    if isinstance(model, str):
+        model = ASRModel.from_pretrained(model_name=model, map_location="cpu")
+    elif isinstance(model, LocalParakeetRNNTStreamingASR):
+        if model.precision != "float32":
+            raise ValueError(f"Cannot export a model in {model.precision}, load it in float32")
+        model = model.model
+
+    preprocessor = model._cfg.preprocessor
+    if str(preprocessor.normalize) != "per_feature":
+        raise ValueError("Only models trained with per_feature normalization are supported")
+
+    os.makedirs(directory, exist_ok=True)
+    model.eval()
+    if decoder:
+        # Writes the subnets encoder and decoder_joint to encoder-model.onnx and decoder_joint-model.onnx
+        model.export(os.path.join(directory, "model.onnx"))
+    else:
+        model.encoder.export(os.path.join(directory, ENCODER_FILE))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(os.path.join(directory, ENCODER_FILE), os.path.join(directory, QUANTIZED_ENCODER_FILE),
+                         weight_type=QuantType.QInt8)
+
+    featurizer = model.preprocessor.featurizer
+    np.savez(os.path.join(directory, FEATURES_FILE),
+             window=featurizer.window.detach().float().cpu().numpy(),
+             filterbank=featurizer.fb.detach().float().cpu().numpy()[0])
+
+    log_zero_guard = featurizer.log_zero_guard_value
+    if isinstance(log_zero_guard, str):
+        log_zero_guard = getattr(torch.finfo(torch.float32), log_zero_guard)
+
+    tokenizer = model.tokenizer
+    durations = model.cfg.get("model_defaults", {}).get("tdt_durations") or []
+    config = {
+        "sample_rate": int(preprocessor.sample_rate),
+        "window_stride": float(preprocessor.window_stride),
+        "subsampling_factor": int(model.encoder.subsampling_factor),
+        "n_fft": int(featurizer.n_fft),
+        "hop_length": int(featurizer.hop_length),
+        "preemph": float(featurizer.preemph or 0.0),
+        "mag_power": float(featurizer.mag_power),
+        "log": bool(featurizer.log),
+        "log_zero_guard": float(log_zero_guard),
+        "log_zero_guard_type": str(featurizer.log_zero_guard_type),
+        "vocabulary": tokenizer.ids_to_tokens(list(range(tokenizer.vocab_size))),
+        "blank_id": int(model.decoder.blank_idx),
+        "durations": [int(duration) for duration in durations],
+        "max_symbols": int(model.cfg.decoding.get("greedy", {}).get("max_symbols") or 10),
+    }
+    with open(os.path.join(directory, CONFIG_FILE), "w") as config_file:
+        json.dump(config, config_file, indent=2)
+
+    logger.info("Exported %s to %s", type(model).__name__, directory)
+
+    return directory
+
+
+@dataclass(frozen=True)
+class _Context:
+    """Left context, chunk and right context of a decode step."""
+    left: int
+    chunk: int
+    right: int
+
+    def subsample(self, factor: int) -> "_Context":
+        return _Context(self.left // factor, self.chunk // factor, self.right // factor)
+
+
+class _AudioWindow:
+    """Audio of the current decode step, the chunk with its left and right context."""
+
+    def __init__(self, context: _Context):
+        self._max_context = context
+        self.context = _Context(0, 0, 0)
+        self.samples = np.zeros(0, dtype=np.float32)
+
+    def add(self, audio: np.ndarray, is_final: bool) -> None:
+        """Add the audio of the next step, the chunk follows the previous chunk.
+
+        With `is_final` the right context becomes part of the chunk.
+        """
+        left = min(self.context.left + self.context.chunk, self._max_context.left)
+        new = self.context.right + len(audio)
+        right = 0 if is_final else min(self._max_context.right, new)
+        self.context = _Context(left, new - right, right)
+
+        total = left + new
+        samples = np.concatenate((self.samples, audio)) if len(audio) else self.samples
+        self.samples = samples[len(samples) - total:]
+
+
+class _LogMelFeatures:
+    """Log mel spectrogram of NeMo's `FilterbankFeatures` with per_feature normalization, in numpy.
+
+    Frames are centered with zero padding, dithering is not applied (as in NeMo inference).
+    """
+
+    def __init__(self, window: np.ndarray, filterbank: np.ndarray, n_fft: int, hop_length: int,
+                 preemph: float = 0.97, mag_power: float = 2.0, log: bool = True,
+                 log_zero_guard: float = 2 ** -24, log_zero_guard_type: str = "add"):
+        # As torch.stft, pad the window to n_fft on both sides
+        padding = n_fft - len(window)
+        self._window = np.pad(window.astype(np.float32), (padding // 2, padding - padding // 2))
+        self._filterbank = filterbank.astype(np.float32)
+        self._n_fft = n_fft
+        self._hop_length = hop_length
+        self._preemph = preemph
+        self._mag_power = mag_power
+        self._log = log
+        self._log_zero_guard = log_zero_guard
+        self._log_zero_guard_type = log_zero_guard_type
+
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        """Return the features [features, frames] of the mono float32 samples."""
+        signal = samples.astype(np.float32, copy=False)
+        if self._preemph:
+            signal = np.concatenate((signal[:1], signal[1:] - self._preemph * signal[:-1]))
+        signal = np.pad(signal, self._n_fft // 2)
+
+        frames = np.lib.stride_tricks.sliding_window_view(signal, self._n_fft)[::self._hop_length]
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=-1)) ** self._mag_power
+        features = self._filterbank @ spectrum.T
+
+        if self._log:
+            if self._log_zero_guard_type == "clamp":
+                features = np.log(np.maximum(features, self._log_zero_guard))
+            else:
+                features = np.log(features + self._log_zero_guard)
+
+        mean = features.mean(axis=1, keepdims=True)
+        std = np.sqrt(((features - mean) ** 2).sum(axis=1, keepdims=True) / max(features.shape[1] - 1, 1))
+
+        return ((features - mean) / (std + _NORMALIZE_EPS)).astype(np.float32)
+
+
+@dataclass
+class _DecoderState:
+    """State of greedy decoding carried over between decode steps."""
+    rnn_states: Tuple[np.ndarray, ...]
+    last_token: int
+    tokens: List[int]
+    # Frames of the next step skipped by the duration of the last decoded frame
+    skip: int = 0
+
+
+# Returns the logits of tokens (and durations) and the prediction network states for a frame, token and states
+JointStep = Callable[[np.ndarray, int, Tuple[np.ndarray, ...]], Tuple[np.ndarray, Tuple[np.ndarray, ...]]]
+
+
+def _greedy_decode(joint: JointStep, frames: np.ndarray, state: _DecoderState, blank_id: int,
+                   durations: Sequence[int] = (), max_symbols: int = 10) -> _DecoderState:
+    """Greedy TDT decoding of the encoder `frames` [frames, dim], RNNT decoding without `durations`.
+
+    Returns the state after the frames, `state` is not modified.
+    """
+    rnn_states, last_token, tokens = state.rnn_states, state.last_token, list(state.tokens)
+    num_classes = blank_id + 1
+
+    frame, emitted = state.skip, 0
+    while frame < len(frames):
+        logits, next_states = joint(frames[frame], last_token, rnn_states)
+        token = int(np.argmax(logits[:num_classes]))
+        duration = durations[int(np.argmax(logits[num_classes:]))] if durations else 0
+
+        if token != blank_id:
+            tokens.append(token)
+            last_token, rnn_states = token, next_states
+            emitted += 1
+
+        if duration > 0:
+            frame += duration
+            emitted = 0
+        elif token == blank_id or emitted >= max_symbols:
+            frame += 1
+            emitted = 0
+
+    return _DecoderState(rnn_states, last_token, tokens, skip=frame - len(frames))
+
+
+class OnnxParakeetRNNTStreamingASR(ChunkedStreamingASR):
+    """
+    Streaming ASR loop for Parakeet TDT / RNNT models exported with :func:`export_onnx`, on onnxruntime.
+
+    Notes:
+    - Same streaming behaviour and output as
+      :class:`~cltl.asr.parakeet_stream.LocalParakeetRNNTStreamingASR`, see the module
+      documentation for differences in decoding.
+    - The export must include the decoder (`export_onnx(..., decoder=True)`).
+    - `precision="int8"` runs the quantized encoder of an export with `quantize=True`.
+    - Sessions run with `threads` intra-op threads, with `threads=None` onnxruntime uses
+      one thread per physical core.
+    - Streams created with `new_stream()` share the onnxruntime sessions.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        chunk_secs: float = 0.5,
+        left_context_secs: float = 5.0,
+        right_context_secs: float = 2.0,
+        turn_threshold_sec: float = 1.0,
+        vad=None,
+        metrics: Optional[MetricsSink] = None,
+        precision: str = "float32",
+        threads: Optional[int] = 1,
+        providers: Sequence[str] = ("CPUExecutionProvider",),
+    ):
+        if precision not in ONNX_PRECISIONS:
+            raise ValueError(f"Unsupported precision {precision}, expected one of {ONNX_PRECISIONS}")
+        self.precision = precision
+        self._metrics = metrics
+        self._threads = threads
+        self._providers = list(providers)
+
+        with open(os.path.join(model_dir, CONFIG_FILE)) as config_file:
+            config = json.load(config_file)
+
+        decoder_path = os.path.join(model_dir, DECODER_JOINT_FILE)
+        if not os.path.exists(decoder_path):
+            raise ValueError(f"No decoder in {model_dir}, export the model with decoder=True")
+        encoder_path = os.path.join(model_dir, QUANTIZED_ENCODER_FILE if precision == "int8" else ENCODER_FILE)
+        if not os.path.exists(encoder_path):
+            raise ValueError(f"No {precision} encoder in {model_dir}"
+                             + (", export the model with quantize=True" if precision == "int8" else ""))
+
+        self._encoder = self._session(encoder_path)
+        self._encoder_inputs = [node.name for node in self._encoder.get_inputs()]
+        self._decoder_joint = self._session(decoder_path)
+        states_shape = {node.name: node.shape for node in self._decoder_joint.get_inputs()}["input_states_1"]
+        self._rnn_state_shape = (states_shape[0], 1, states_shape[2])
+
+        with np.load(os.path.join(model_dir, FEATURES_FILE)) as features:
+            self._features = _LogMelFeatures(features["window"], features["filterbank"],
+                                             n_fft=config["n_fft"], hop_length=config["hop_length"],
+                                             preemph=config["preemph"], mag_power=config["mag_power"],
+                                             log=config["log"], log_zero_guard=config["log_zero_guard"],
+                                             log_zero_guard_type=config["log_zero_guard_type"])
+
+        self._blank_id = config["blank_id"]
+        self._durations = config["durations"]
+        self._max_symbols = config["max_symbols"]
+        self._pieces = [_detokenize_piece(piece) for piece in config["vocabulary"]]
+
+        self.sample_rate = config["sample_rate"]
+        self._init_context_sizes(chunk_secs, left_context_secs, right_context_secs,
+                                 config["window_stride"], config["subsampling_factor"])
+
+        self._turn_threshold_chunks = int(turn_threshold_sec // chunk_secs + 1)
+
+        self._vad = vad
+        self._vad_silence_threshold = self.context_samples.right if vad else None
+
+        self.reset()
+
+    def _session(self, path: str):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        if self._threads:
+            options.intra_op_num_threads = self._threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        return onnxruntime.InferenceSession(path, sess_options=options, providers=self._providers)
+
+    def _init_context_sizes(self, chunk_secs: float, left_context_secs: float, right_context_secs: float,
+                            feature_stride_sec: float, subsampling_factor: int) -> None:
+        """Compute the context sizes in audio samples, multiples of the samples of an encoder frame."""
+        features_frame2audio_samples = (int(self.sample_rate * feature_stride_sec) // subsampling_factor
+                                        * subsampling_factor)
+        self.encoder_frame2audio_samples = features_frame2audio_samples * subsampling_factor
+
+        encoder_frames_per_sec = 1.0 / feature_stride_sec / subsampling_factor
+        self.context_samples = _Context(
+            left=int(left_context_secs * encoder_frames_per_sec) * self.encoder_frame2audio_samples,
+            chunk=int(chunk_secs * encoder_frames_per_sec) * self.encoder_frame2audio_samples,
+            right=int(right_context_secs * encoder_frames_per_sec) * self.encoder_frame2audio_samples,
+        )
+
+    def reset(self, keep_recent: bool = False) -> None:
+        recent_audio = self._collect_recent_audio() if keep_recent else np.zeros(0, dtype=np.float32)
+
+        self.window = _AudioWindow(self.context_samples)
+        self.state = _DecoderState(
+            rnn_states=(np.zeros(self._rnn_state_shape, dtype=np.float32),
+                        np.zeros(self._rnn_state_shape, dtype=np.float32)),
+            last_token=self._blank_id,
+            tokens=[],
+        )
+        self._right_context_frames = None
+
+        self._reset_turn(recent_audio, keep_recent)
+
+    def _collect_recent_audio(self) -> np.ndarray:
+        """Return up to right-context worth of the most recently seen audio."""
+        recent = np.concatenate((self.window.samples, self.pending_audio.peek()))
+
+        return recent[max(len(recent) - self.context_samples.right, 0):].copy()
+
+    def _run_step(self, new_audio: np.ndarray, is_final: bool) -> str:
+        with timed(self._metrics, "add_audio"):
+            self.window.add(new_audio, is_final)
+
+        with timed(self._metrics, "encoder"):
+            encoded = self._encode(self.window.samples)
+
+        context = self.window.context.subsample(self.encoder_frame2audio_samples)
+        frames = encoded[context.left:]
+        chunk_frames = len(frames) if is_final else context.chunk
+        # Kept for speculative finish
+        self._right_context_frames = frames[chunk_frames:]
+
+        with timed(self._metrics, "decoder"):
+            self.state = self._decode(frames[:chunk_frames], self.state)
+        self.started = True
+
+        return self._decode_text()
+
+    def _speculative_finish(self) -> str:
+        """Decode the right-context frames of the last step, without changing the decoder state."""
+        with timed(self._metrics, "speculative_finish"):
+            if self._right_context_frames is None or not len(self._right_context_frames):
+                return self._decode_text()
+
+            return self._detokenize(self._decode(self._right_context_frames, self.state).tokens)
+
+    def _decode_text(self) -> str:
+        with timed(self._metrics, "decode_text"):
+            return self._detokenize(self.state.tokens)
+
+    def _encode(self, samples: np.ndarray) -> np.ndarray:
+        """Return the encoder output [frames, dim] of the samples."""
+        features = self._features(samples)
+        encoded, encoded_len = self._encoder.run(None, {
+            self._encoder_inputs[0]: features[None],
+            self._encoder_inputs[1]: np.array([features.shape[1]], dtype=np.int64),
+        })[:2]
+
+        return encoded[0, :, :int(encoded_len[0])].T
+
+    def _decode(self, frames: np.ndarray, state: _DecoderState) -> _DecoderState:
+        return _greedy_decode(self._joint, frames, state, self._blank_id, self._durations, self._max_symbols)
+
+    def _joint(self, frame: np.ndarray, token: int,
+               rnn_states: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, Tuple[np.ndarray, ...]]:
+        logits, *next_states = self._decoder_joint.run(["outputs", "output_states_1", "output_states_2"], {
+            "encoder_outputs": frame[None, :, None],
+            "targets": np.array([[token]], dtype=np.int32),
+            "target_length": np.array([1], dtype=np.int32),
+            "input_states_1": rnn_states[0],
+            "input_states_2": rnn_states[1],
+        })
+
+        return logits.reshape(-1), tuple(next_states)
+
+    def _detokenize(self, tokens: List[int]) -> str:
+        return "".join(self._pieces[token] for token in tokens).strip()
+
+
+def _detokenize_piece(piece: str) -> str:
+    """Text of a SentencePiece word piece, special tokens (e.g. `<unk>`) are dropped."""
+    if piece.startswith("<") and piece.endswith(">"):
+        return ""
+
+    return piece.replace(_WORD_START, " ")
+
+
+def main(args: List[str] = None):
+    parser = argparse.ArgumentParser(description="Export a Parakeet TDT / RNNT model to ONNX.")
+    parser.add_argument("model", help="Name of a pretrained NeMo model, e.g. nvidia/parakeet-tdt-0.6b-v3")
+    parser.add_argument("directory", help="Output directory")
+    parser.add_argument("--encoder-only", action="store_true", help="Do not export the decoder and joint network")
+    parser.add_argument("--int8", action="store_true", help="Also write an encoder with int8 quantized weights")
+    parsed = parser.parse_args(args)
+
+    export_onnx(parsed.model, parsed.directory, decoder=not parsed.encoder_only, quantize=parsed.int8)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
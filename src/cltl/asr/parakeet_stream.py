@@ -1,7 +1,7 @@
 import copy
-import string
-from collections import deque
-from typing import Iterable, List, Optional, Union
+import dataclasses
+import logging
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 import torch
@@ -10,10 +10,16 @@ from nemo.collections.asr.parts.submodules.rnnt_decoding import RNNTDecodingConf
 from nemo.collections.asr.parts.utils.rnnt_utils import BatchedHyps
 from nemo.collections.asr.parts.utils.streaming_utils import ContextSize, StreamingBatchedAudioBuffer
 
-from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+from cltl.asr.api_streaming import StreamTranscription
+from cltl.asr.chunked_stream import _WORD_START, ChunkedStreamingASR
+from cltl.asr.metrics import MetricsSink, timed
+from cltl.asr.precision import apply_precision, autocast, check_precision
+from cltl.asr.warm_start import ModelCache, cached
 
+logger = logging.getLogger(__name__)
 
-class LocalParakeetRNNTStreamingASR(BufferedASR):
+
+class LocalParakeetRNNTStreamingASR(ChunkedStreamingASR):
     """
     Local single-stream streaming ASR loop for Parakeet TDT / RNNT-style NeMo models.
 
@@ -22,11 +28,25 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
 
     Notes:
     - This is for RNNT / hybrid-RNNT models, not pure CTC checkpoints.
+    - Turns are tracked by :class:`~cltl.asr.chunked_stream.ChunkedStreamingASR`.
     - Input audio must be mono and already resampled to the model sample rate.
     - `push_audio()` returns zero or more partial hypotheses.
     - `finish()` flushes the tail and returns the final hypothesis.
     - StreamTranscription.start and .end fields contain sample positions (not seconds)
       in the input audio stream, enabling accurate timestamp tracking.
+    - With `cache_encoder=True` each step only encodes chunk + right context and
+      attends to cached encoder activations of the left context, see
+      `_setup_encoder_cache()`.
+    - If a `metrics` sink is provided, step durations and the number of speculative
+      and forced finals are reported to it, see :mod:`cltl.asr.metrics`.
+    - With a `model_cache` the model is stored after it is prepared for streaming
+      (frozen, cast to `compute_dtype`, decoding configured) and memory-mapped from
+      the cache on the next start, see :class:`~cltl.asr.warm_start.ModelCache`.
+    - `precision="bfloat16"` (or `compute_dtype=torch.bfloat16`) casts the model to
+      bfloat16 and runs encoder and decoder under autocast, `precision="int8"` quantizes
+      the linear layers dynamically (CPU only), see :mod:`cltl.asr.precision`.
+    - The model runs on the torch thread pools of the process, configure them with
+      :func:`~cltl.asr.cpu.configure_process` or run engines in separate worker processes.
     """
 
     def __init__(
@@ -39,28 +59,28 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
         right_context_secs: float = 2.0,
         turn_threshold_sec: float = 1.0,
         vad=None,
+        cache_encoder: bool = False,
+        metrics: Optional[MetricsSink] = None,
+        model_cache: Optional[ModelCache] = None,
+        precision: str = "float32",
     ):
         self.device = torch.device(device)
+        self._metrics = metrics
+
+        self.precision = check_precision(precision, device)
+        if precision == "bfloat16" or compute_dtype == torch.bfloat16:
+            self.precision = "bfloat16"
+            compute_dtype = torch.bfloat16
+        elif precision == "int8" and compute_dtype != torch.float32:
+            raise ValueError(f"int8 quantization requires compute_dtype float32, not {compute_dtype}")
         self.compute_dtype = compute_dtype
 
-        model = ASRModel.from_pretrained(model_name=model_name, map_location=self.device)
-        if not isinstance(model, (EncDecRNNTModel, EncDecHybridRNNTCTCModel)):
-            raise TypeError(
-                f"{model_name} is not an RNNT / Hybrid RNNT model. "
-                "Use this class with Parakeet TDT / RNNT style checkpoints."
-            )
-
-        if device.startswith("cpu"):
-            torch.set_num_threads(1)
-            torch.set_num_interop_threads(1)
-
-        self.model = model.eval().to(self.device)
-        self.model.freeze()
-        self.model.to(self.compute_dtype)
-
-        self._configure_decoding()
+        self.model = cached(model_cache, lambda: self._load_model(model_name), map_location=self.device,
+                            backend="parakeet_stream", model_id=model_name, device=str(self.device),
+                            dtype=str(compute_dtype), precision=self.precision)
 
         self.decoding_computer = self.model.decoding.decoding.decoding_computer
+        self._word_starts = self._init_word_starts()
 
         preproc = copy.deepcopy(self.model._cfg.preprocessor)
         # Same streaming assumptions as the official NeMo example.
@@ -77,6 +97,10 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
         self._init_context_sizes(chunk_secs, left_context_secs, right_context_secs,
                                  feature_stride_sec)
 
+        self._cache_encoder = cache_encoder
+        if cache_encoder:
+            self._setup_encoder_cache()
+
         self._turn_threshold_chunks = int(turn_threshold_sec // chunk_secs + 1)
 
         self._vad = vad
@@ -84,6 +108,26 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
 
         self.reset()
 
+    def _load_model(self, model_name: str) -> ASRModel:
+        """Load the model and prepare it for streaming inference."""
+        model = ASRModel.from_pretrained(model_name=model_name, map_location=self.device)
+        if not isinstance(model, (EncDecRNNTModel, EncDecHybridRNNTCTCModel)):
+            raise TypeError(
+                f"{model_name} is not an RNNT / Hybrid RNNT model. "
+                "Use this class with Parakeet TDT / RNNT style checkpoints."
+            )
+
+        self.model = model.eval().to(self.device)
+        self.model.freeze()
+        self.model.to(self.compute_dtype)
+        if self.precision == "int8":
+            # The encoder spends most time in linear layers, the RNNT decoder state is left in float32
+            self.model = apply_precision(self.model, "int8", modules=(torch.nn.Linear,))
+
+        self._configure_decoding()
+
+        return self.model
+
     def _configure_decoding(self) -> None:
         """Apply greedy-batch RNNT decoding config matching the official NeMo example."""
         decoding_cfg = RNNTDecodingConfig()
@@ -100,6 +144,22 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
             # Hybrid model — decode through RNNT path.
             self.model.change_decoding_strategy(decoding_cfg, decoder_type="rnnt")
 
+    def _init_word_starts(self) -> Optional[List[bool]]:
+        """Mark the tokens of the vocabulary that start a new word, used for incremental decoding.
+
+        Returns None if the tokenizer does not expose its word pieces, in which case the
+        full hypothesis is decoded for every chunk.
+        """
+        tokenizer = self.model.tokenizer
+        if not hasattr(tokenizer, "ids_to_tokens"):
+            logger.warning("Tokenizer %s does not expose word pieces, decode full transcripts",
+                           type(tokenizer).__name__)
+            return None
+
+        pieces = tokenizer.ids_to_tokens(list(range(tokenizer.vocab_size)))
+
+        return [piece.startswith(_WORD_START) for piece in pieces]
+
     def _init_context_sizes(self, chunk_secs: float, left_context_secs: float,
                             right_context_secs: float, feature_stride_sec: float) -> None:
         """Compute encoder-frame and audio-sample context sizes from timing parameters."""
@@ -128,6 +188,31 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
             right=self.context_encoder_frames.right * samples_per_encoder_frame,
         )
 
+    def _setup_encoder_cache(self) -> None:
+        """Configure the encoder to cache its activations of the left context between steps.
+
+        Each step then encodes only chunk + right context. The right-context frames
+        are dropped from the cache (cache_drop_size) and encoded again in the next step.
+
+        Reuse is exact only for cache-aware streaming models. For models trained with
+        full attention (att_context_style "regular", e.g. Parakeet TDT) results are
+        approximate: cached frames were normalised (per_feature) over an earlier window
+        and did not attend to audio beyond the right context of the step they were
+        encoded in. Compare the output against the default mode before use.
+        """
+        encoder = self.model.encoder
+        if not hasattr(encoder, "setup_streaming_params"):
+            raise ValueError(f"Encoder {type(encoder).__name__} does not support cache-aware streaming")
+
+        if encoder.att_context_style == "regular":
+            logger.warning("Encoder was not trained for cache-aware streaming, "
+                           "cached encoder activations approximate full-context encoding")
+
+        chunk = self.context_encoder_frames.chunk
+        encoder.setup_streaming_params(chunk_size=chunk + self.context_encoder_frames.right,
+                                       shift_size=chunk, left_chunks=1)
+        encoder.streaming_cfg.last_channel_cache_size = self.context_encoder_frames.left
+
     def reset(self, keep_recent: bool = False) -> None:
         recent_audio = self._collect_recent_audio() if keep_recent else torch.empty(0, dtype=torch.float32)
 
@@ -137,32 +222,24 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
             dtype=torch.float32,
             device=self.device,
         )
-        self.pending_audio = recent_audio
-        self.partial_transcripts = deque([], maxlen=self._turn_threshold_chunks)
         self.current_batched_hyps: Optional[BatchedHyps] = None
         self.state = None
-        self.started = False
-        self.closed = False
-        self._consecutive_silence_samples = 0
+        self._decoded_tokens = 0
+        self._decoded_text = ""
 
         self._last_encoder_output = None
         self._last_encoder_output_len = None
         self._last_encoder_context = None
         self._last_encoder_context_batch = None
+        self._encoder_cache = (
+            self.model.encoder.get_initial_cache_state(batch_size=1, dtype=self.compute_dtype, device=self.device)
+            if self._cache_encoder else None
+        )
 
-        self._transcript_onset_sample: Optional[int] = None
-
-        if not keep_recent:
-            self._total_samples_consumed = 0
-            self._replay_offset = 0
-        else:
-            # pending_audio carries samples already counted in _total_samples_consumed.
-            # Track the overcount so stream-position calculations stay accurate.
-            self._replay_offset += recent_audio.numel()
+        self._reset_turn(recent_audio.numpy(), keep_recent)
 
-    def get_current_sample_position(self) -> int:
-        """Return the total number of samples consumed since the last full reset."""
-        return self._total_samples_consumed - self._replay_offset
+    def _as_step_audio(self, samples: np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(samples)
 
     def _collect_recent_audio(self) -> torch.Tensor:
         """
@@ -174,43 +251,51 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
         if self.buffer.samples is not None and self.buffer.samples.numel() > 0:
             pieces.append(self.buffer.samples[0].detach().cpu())
 
-        if self.pending_audio.numel() > 0:
-            pieces.append(self.pending_audio.detach().cpu())
+        if len(self.pending_audio) > 0:
+            pieces.append(torch.from_numpy(self.pending_audio.peek()))
 
         complete = torch.cat(pieces, dim=0) if pieces else torch.empty(0, dtype=torch.float32)
 
         return complete[-self.context_samples.right:].clone()
 
-    def _to_mono_float32(self, audio_frames: Iterable[np.ndarray]) -> torch.Tensor:
-        """Concatenate frames, downmix stereo to mono, and normalise to float32 [-1, 1]."""
-        audio = np.concatenate(list(audio_frames))
-
-        if audio.ndim == 2 and audio.shape[1] != 1:
-            audio = audio.mean(axis=1).astype(np.int16).ravel()
-
-        audio_tensor = torch.from_numpy(np.ascontiguousarray(audio)).flatten()
-
-        if audio_tensor.dtype == torch.int16:
-            return audio_tensor.to(torch.float32) / 32768.0
+    def _decode_text(self) -> str:
+        with timed(self._metrics, "decode_text"):
+            return self._decode_new_tokens()
 
-        return audio_tensor.to(torch.float32)
+    def _decode_new_tokens(self) -> str:
+        """Decode the current hypothesis, detokenizing only the tokens emitted since the last call.
 
-    def _decode_text(self) -> str:
+        Tokens up to the start of the last word are decoded once and kept in
+        `_decoded_text`, only the last (possibly incomplete) word is decoded again.
+        """
         if self.current_batched_hyps is None:
             return ""
 
         length = int(self.current_batched_hyps.current_lengths[0].item())
-        if length <= 0:
-            return ""
+        if self._word_starts is None or length < self._decoded_tokens:
+            self._decoded_tokens = 0
+            self._decoded_text = ""
+        if length <= self._decoded_tokens:
+            return self._decoded_text
 
         token_ids = (
-            self.current_batched_hyps.transcript[0, :length]
+            self.current_batched_hyps.transcript[0, self._decoded_tokens:length]
             .detach()
             .cpu()
             .tolist()
         )
 
-        return self.model.tokenizer.ids_to_text(token_ids)
+        if self._word_starts is None:
+            return self.model.tokenizer.ids_to_text(token_ids)
+
+        last_word = max((idx for idx, token_id in enumerate(token_ids)
+                         if token_id < len(self._word_starts) and self._word_starts[token_id]), default=0)
+        if last_word > 0:
+            self._decoded_text = _join_words(self._decoded_text,
+                                             self.model.tokenizer.ids_to_text(token_ids[:last_word]))
+            self._decoded_tokens += last_word
+
+        return _join_words(self._decoded_text, self.model.tokenizer.ids_to_text(token_ids[last_word:]))
 
     @torch.inference_mode()
     def _speculative_finish(self) -> str:
@@ -221,36 +306,74 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
         right-context frames.  Decoder state is saved before and restored after,
         so the stream can continue as if this call never happened.
         """
-        if self._last_encoder_output is None:
-            return self._decode_text()
+        with timed(self._metrics, "speculative_finish"), autocast(self.precision, self.device):
+            if self._last_encoder_output is None:
+                return self._decode_text()
 
-        out_len = self._last_encoder_output_len - self._last_encoder_context_batch.left
-        if out_len.item() <= 0:
-            return self._decode_text()
+            out_len = self._last_encoder_output_len - self._last_encoder_context_batch.left
+            if out_len.item() <= 0:
+                return self._decode_text()
 
-        # RNNT hidden states are contiguous; deepcopy safely clones all tensors.
-        saved_state = copy.deepcopy(self.state)
-        saved_hyps  = copy.deepcopy(self.current_batched_hyps)
+            snapshot = self._snapshot_decoder()
 
-        try:
-            encoder_output = self._last_encoder_output[:, self._last_encoder_context.left:]
+            try:
+                encoder_output = self._last_encoder_output[:, self._last_encoder_context.left:]
 
-            chunk_batched_hyps, _, self.state = self.decoding_computer(
-                x=encoder_output,
-                out_len=out_len,
-                prev_batched_state=self.state,
-                multi_biasing_ids=None,
-            )
+                chunk_batched_hyps, _, self.state = self.decoding_computer(
+                    x=encoder_output,
+                    out_len=out_len,
+                    prev_batched_state=self.state,
+                    multi_biasing_ids=None,
+                )
 
-            if self.current_batched_hyps is None:
-                self.current_batched_hyps = chunk_batched_hyps
-            else:
-                self.current_batched_hyps.merge_(chunk_batched_hyps)
+                if self.current_batched_hyps is None:
+                    self.current_batched_hyps = chunk_batched_hyps
+                else:
+                    self.current_batched_hyps.merge_(chunk_batched_hyps)
 
-            return self._decode_text()
-        finally:
-            self.state = saved_state
-            self.current_batched_hyps = saved_hyps
+                return self._decode_text()
+            finally:
+                self._restore_decoder(snapshot)
+
+    def _snapshot_decoder(self) -> Tuple[Any, Optional[BatchedHyps], Optional[Dict[str, torch.Tensor]], Tuple[int, str]]:
+        """Capture the decoder state and hypotheses such that `_restore_decoder` can undo a decode step.
+
+        Only the fixed-size decoder state and the per-hypothesis bookkeeping are cloned;
+        the transcript buffers, which grow with the turn, are truncated on restore instead.
+        """
+        decoded = (self._decoded_tokens, self._decoded_text)
+        if self.current_batched_hyps is None:
+            return _clone_state(self.state), None, None, decoded
+
+        hyps = self.current_batched_hyps
+        bookkeeping = {}
+        for name in _HYPS_BOOKKEEPING:
+            # Not every NeMo version has all bookkeeping fields
+            value = getattr(hyps, name, None)
+            if value is not None:
+                bookkeeping[name] = value.clone()
+
+        return _clone_state(self.state), hyps, bookkeeping, decoded
+
+    def _restore_decoder(self, snapshot: Tuple[Any, Optional[BatchedHyps], Optional[Dict[str, torch.Tensor]],
+                                               Tuple[int, str]]) -> None:
+        """Restore decoder state and truncate the hypotheses to the snapshot taken by `_snapshot_decoder`."""
+        state, hyps, bookkeeping, (self._decoded_tokens, self._decoded_text) = snapshot
+
+        self.state = state
+        self.current_batched_hyps = hyps
+        if hyps is None:
+            return
+
+        saved_length = int(bookkeeping["current_lengths"].max().item())
+        length = int(hyps.current_lengths.max().item())
+        # merge_ only appends behind current_lengths (possibly reallocating), clear the appended tokens
+        for name in _HYPS_TOKEN_BUFFERS:
+            buffer = getattr(hyps, name, None)
+            if buffer is not None and length > saved_length:
+                buffer[:, saved_length:length] = 0
+        for name, value in bookkeeping.items():
+            getattr(hyps, name).copy_(value)
 
     @torch.inference_mode()
     def _run_step(self, new_audio: torch.Tensor, is_final: bool) -> str:
@@ -266,32 +389,108 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
             * if there is no remaining tail, pass zero new audio with is_final=True
               to promote buffered right-context into the final chunk.
         """
+        is_last_chunk_batch = self._add_to_buffer(new_audio, is_final)
+
+        with timed(self._metrics, "encoder"), autocast(self.precision, self.device):
+            if self._encoder_cache is None:
+                encoder_output, encoder_output_len = self.model(
+                    input_signal=self.buffer.samples,
+                    input_signal_length=self.buffer.context_size_batch.total(),
+                )
+            else:
+                encoder_output, encoder_output_len = self._run_cached_encoder()
+
+        # NeMo example converts [B, C, T] -> [B, T, C]
+        encoder_output = encoder_output.transpose(1, 2)
+
+        chunk_encoder_output, out_len = self._chunk_encoder_output(
+            encoder_output, encoder_output_len, is_last_chunk_batch,
+            includes_left_context=self._encoder_cache is None)
+
+        with timed(self._metrics, "decoder"), autocast(self.precision, self.device):
+            chunk_batched_hyps, _, self.state = self.decoding_computer(
+                x=chunk_encoder_output,
+                out_len=out_len,
+                prev_batched_state=self.state,
+                multi_biasing_ids=None,
+            )
+
+        self._merge_hyps(chunk_batched_hyps)
+
+        return self._decode_text()
+
+    def _add_to_buffer(self, new_audio: torch.Tensor, is_final: bool) -> torch.Tensor:
+        """Add new audio to the streaming buffer and return the per-batch last-chunk flags."""
         new_audio = new_audio.to(self.device)
         audio_batch = new_audio.unsqueeze(0)  # [1, T]
         audio_lengths = torch.tensor([new_audio.numel()], dtype=torch.long, device=self.device)
         is_last_chunk_batch = torch.tensor([is_final], dtype=torch.bool, device=self.device)
 
-        self.buffer.add_audio_batch_(
-            audio_batch=audio_batch,
-            audio_lengths=audio_lengths,
-            is_last_chunk=is_final,
-            is_last_chunk_batch=is_last_chunk_batch,
-        )
+        with timed(self._metrics, "add_audio"):
+            self.buffer.add_audio_batch_(
+                audio_batch=audio_batch,
+                audio_lengths=audio_lengths,
+                is_last_chunk=is_final,
+                is_last_chunk_batch=is_last_chunk_batch,
+            )
+
+        return is_last_chunk_batch
 
-        encoder_output, encoder_output_len = self.model(
+    def _run_cached_encoder(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Encode chunk + right context of the buffer, attending to the cached left-context activations."""
+        encoder = self.model.encoder
+        streaming_cfg = encoder.streaming_cfg
+
+        features, features_len = self.model.preprocessor(
             input_signal=self.buffer.samples,
-            input_signal_length=self.buffer.context_size_batch.total(),
+            length=self.buffer.context_size_batch.total(),
         )
 
-        # NeMo example converts [B, C, T] -> [B, T, C]
-        encoder_output = encoder_output.transpose(1, 2)
+        # The pre-encoder (subsampling) needs some feature frames before the chunk,
+        # their encoder frames are dropped again by the encoder.
+        pre_encode_cache_size = streaming_cfg.pre_encode_cache_size
+        if isinstance(pre_encode_cache_size, list):
+            pre_encode_cache_size = pre_encode_cache_size[1]
+        chunk_start = self.buffer.context_size.left // self.features_frame2audio_samples
+        start = max(chunk_start - pre_encode_cache_size, 0)
+        pre_encoded = chunk_start - start
+
+        cache_last_channel, cache_last_time, cache_last_channel_len = self._encoder_cache
+        drop_extra_pre_encoded = streaming_cfg.drop_extra_pre_encoded
+        streaming_cfg.drop_extra_pre_encoded = (
+            1 + (pre_encoded - 1) // self.encoder_subsampling_factor if pre_encoded > 0 else 0
+        )
+        try:
+            encoder_output, encoder_output_len, cache_last_channel, cache_last_time, cache_last_channel_len = encoder(
+                audio_signal=features[:, :, start:],
+                length=features_len - start,
+                cache_last_channel=cache_last_channel,
+                cache_last_time=cache_last_time,
+                cache_last_channel_len=cache_last_channel_len,
+            )
+        finally:
+            streaming_cfg.drop_extra_pre_encoded = drop_extra_pre_encoded
 
+        if streaming_cfg.last_channel_cache_size > 0:
+            cache_last_channel = cache_last_channel[:, :, -streaming_cfg.last_channel_cache_size:, :]
+        self._encoder_cache = (cache_last_channel, cache_last_time, cache_last_channel_len)
+
+        return encoder_output, encoder_output_len
+
+    def _chunk_encoder_output(self, encoder_output: torch.Tensor, encoder_output_len: torch.Tensor,
+                              is_last_chunk_batch: torch.Tensor,
+                              includes_left_context: bool = True) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Cache the encoder output for speculative finish and return the frames to decode for the chunk."""
         encoder_context = self.buffer.context_size.subsample(
             factor=self.encoder_frame2audio_samples
         )
         encoder_context_batch = self.buffer.context_size_batch.subsample(
             factor=self.encoder_frame2audio_samples
         )
+        if not includes_left_context:
+            # Encoder output starts at the current chunk
+            encoder_context = dataclasses.replace(encoder_context, left=0)
+            encoder_context_batch = dataclasses.replace(encoder_context_batch, left=0)
 
         # Cache pre-slice encoder output for speculative finish
         self._last_encoder_output = encoder_output
@@ -308,13 +507,9 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
             encoder_context_batch.chunk,
         )
 
-        chunk_batched_hyps, _, self.state = self.decoding_computer(
-            x=chunk_encoder_output,
-            out_len=out_len,
-            prev_batched_state=self.state,
-            multi_biasing_ids=None,
-        )
+        return chunk_encoder_output, out_len
 
+    def _merge_hyps(self, chunk_batched_hyps: BatchedHyps) -> None:
         if self.current_batched_hyps is None:
             self.current_batched_hyps = chunk_batched_hyps
         else:
@@ -322,208 +517,193 @@ class LocalParakeetRNNTStreamingASR(BufferedASR):
 
         self.started = True
 
-        return self._decode_text()
 
-    def _stream_position(self, consumed: int) -> int:
-        """Convert an internal consumed-sample count to a true stream position.
+def _join_words(text: str, words: str) -> str:
+    """Join text decoded from consecutive tokens that were split at a word boundary."""
+    return " ".join(part for part in (text, words) if part)
 
-        _total_samples_consumed inflates by the size of replayed audio on each
-        keep_recent reset; _replay_offset tracks that cumulative overcount.
-        """
-        return consumed - self._replay_offset
 
-    def _turn_start(self) -> int:
-        """Return the start sample of the current turn.
+# Per-hypothesis fields of BatchedHyps that are updated by merge_, restored by _restore_decoder
+_HYPS_BOOKKEEPING = ("current_lengths", "scores", "last_nb_timestamp", "last_nb_timestamp_lasts", "last_nb_labels")
+# Token buffers of BatchedHyps that merge_ appends to, truncated by _restore_decoder
+_HYPS_TOKEN_BUFFERS = ("transcript", "timestamps", "token_durations", "step_confidence", "logits")
 
-        _transcript_onset_sample is set to (_total_samples_consumed - chunk_samples) at the
-        step that first produces a non-empty transcript.  That value equals
-        chunk_start_in_stream + right_context (in the internal counter space), so
-        subtracting right_context and correcting for the replay offset recovers the
-        absolute stream position of the decoded chunk that first contained speech.
-        """
-        onset = self._transcript_onset_sample if self._transcript_onset_sample is not None \
-            else self._total_samples_consumed
-        return max(self._stream_position(onset) - self.context_samples.right, 0)
 
-    def _speech_end(self) -> int:
-        """Return the end sample of the current turn.
+def _clone_state(state: Any) -> Any:
+    """Clone all tensors in a (nested) decoder state, sharing everything else."""
+    if isinstance(state, torch.Tensor):
+        return state.clone()
+    if isinstance(state, (list, tuple)):
+        return type(state)(_clone_state(value) for value in state)
+    if isinstance(state, dict):
+        return {key: _clone_state(value) for key, value in state.items()}
+    if dataclasses.is_dataclass(state) and not isinstance(state, type):
+        cloned = copy.copy(state)
+        for field in dataclasses.fields(state):
+            setattr(cloned, field.name, _clone_state(getattr(state, field.name)))
+        return cloned
 
-        The decoder was running right_context samples ahead of the true speech position;
-        subtracting right_context (and correcting for replay offset) gives the stream
-        position of the last decoded audio.
-        """
-        return max(self._stream_position(self._total_samples_consumed) - self.context_samples.right, 0)
-
-    def _try_speculative_finalize(self, current: str, results: List[StreamTranscription]) -> bool:
-        """Speculatively decode right context; finalize if transcript is stable."""
-        speculative_text = self._speculative_finish()
-
-        current_normalised    = current.strip().strip(string.punctuation)
-        speculative_normalised = speculative_text.strip().strip(string.punctuation)
-        if current_normalised != speculative_normalised:
-            return False
-
-        results.append(StreamTranscription(
-            speculative_text.strip(),
-            is_final=True,
-            start=self._turn_start(),
-            end=self._speech_end(),
-        ))
-        self.reset(keep_recent=True)
-
-        return True
-
-    def _is_right_context_silent(self) -> bool:
-        """Return True when consecutive silence has reached the right-context threshold."""
-        return (
-            self._vad is not None
-            and self._consecutive_silence_samples >= self._vad_silence_threshold
-        )
+    return state
 
-    def push_audio(self, audio_frames: Union[np.ndarray, Iterable[np.ndarray]],
-                   sampling_rate: int = None) -> List[StreamTranscription]:
-        """
-        Feed more mono audio samples. Returns zero or more partial results.
 
-        The caller can feed arbitrary chunk sizes (e.g. 20 ms, 100 ms, 500 ms).
-        Internally, decoding happens only when enough audio has accumulated.
-        """
-        if self.closed:
-            raise RuntimeError("Stream is already closed. Call reset() for a new stream.")
+def _select_hyps(batched_hyps: BatchedHyps, index: int) -> BatchedHyps:
+    """Return the hypothesis at `index` of a batch as BatchedHyps of batch size one."""
+    if batched_hyps.batch_size == 1:
+        return batched_hyps
 
-        if sampling_rate and sampling_rate != self.sample_rate:
-            raise ValueError(f"Sampling rate {sampling_rate} is not supported (expected {self.sample_rate}).")
+    selected = copy.copy(batched_hyps)
+    for name, value in vars(batched_hyps).items():
+        if isinstance(value, torch.Tensor) and value.dim() > 0 and value.shape[0] == batched_hyps.batch_size:
+            setattr(selected, name, value[index:index + 1].clone())
+    selected.batch_size = 1
+    if hasattr(selected, "_batch_indices"):
+        selected._batch_indices = torch.arange(1, device=batched_hyps.current_lengths.device)
+        selected._ones_batch = torch.ones_like(selected._batch_indices)
 
-        if isinstance(audio_frames, np.ndarray):
-            audio_frames = (audio_frames,)
+    return selected
 
-        audio_frames = list(audio_frames)
-        self._detect_silence(audio_frames)
 
-        audio = self._to_mono_float32(audio_frames)
-        if audio.numel() > 0:
-            self.pending_audio = torch.cat([self.pending_audio, audio], dim=0)
+class MultiStreamParakeetRNNTStreamingASR:
+    """
+    Streaming ASR for multiple independent audio streams that share a single Parakeet model.
 
-        decoded_this_call = False
-        results: List[StreamTranscription] = []
+    Each stream keeps its own audio buffer, hypotheses, decoder state and turn
+    tracking (see :class:`LocalParakeetRNNTStreamingASR`). On each call to
+    `push_audio()` all streams that have enough audio for a decode step are
+    advanced together, with a single batched encoder forward pass and a single
+    batched decoder call per step.
 
-        while True:
-            # First decode step needs chunk + right_context; subsequent steps need one chunk.
-            needed = (
-                self.context_samples.chunk + self.context_samples.right
-                if not self.started
-                else self.context_samples.chunk
-            )
+    Notes:
+    - Streams are identified by arbitrary hashable keys, see `open_stream()`.
+    - Speculative finalisation and the final flush in `close_stream()` run per stream.
+    - With `cache_encoder=True` encoder caches are kept per stream and steps are not batched.
+    """
 
-            if self.pending_audio.numel() < needed:
-                break
+    def __init__(
+        self,
+        model_name: str = "nvidia/parakeet-tdt-0.6b-v3",
+        device: str = "cpu",
+        compute_dtype: torch.dtype = torch.float32,
+        chunk_secs: float = 0.5,
+        left_context_secs: float = 5.0,
+        right_context_secs: float = 2.0,
+        turn_threshold_sec: float = 1.0,
+        max_batch_size: int = 8,
+        cache_encoder: bool = False,
+        metrics: Optional[MetricsSink] = None,
+        model_cache: Optional[ModelCache] = None,
+        precision: str = "float32",
+    ):
+        self._asr = LocalParakeetRNNTStreamingASR(
+            model_name=model_name,
+            device=device,
+            compute_dtype=compute_dtype,
+            chunk_secs=chunk_secs,
+            left_context_secs=left_context_secs,
+            right_context_secs=right_context_secs,
+            turn_threshold_sec=turn_threshold_sec,
+            cache_encoder=cache_encoder,
+            metrics=metrics,
+            model_cache=model_cache,
+            precision=precision,
+        )
+        self._max_batch_size = max_batch_size
+        self._streams: Dict[Hashable, LocalParakeetRNNTStreamingASR] = {}
 
-            decoded_this_call = True
-            step_audio = self.pending_audio[:needed]
-            self.pending_audio = self.pending_audio[needed:]
-            self._total_samples_consumed += needed
+    @property
+    def sample_rate(self) -> int:
+        return self._asr.sample_rate
 
-            current = self._run_step(step_audio, is_final=False)
+    @property
+    def streams(self) -> List[Hashable]:
+        return list(self._streams)
 
-            if current.strip() and self._transcript_onset_sample is None:
-                # Always encode chunk_start_in_stream + right_context so that
-                # _turn_start() can recover the stream position by subtracting right_context,
-                # regardless of whether this is the first step (needed = chunk + right) or not.
-                self._transcript_onset_sample = self._total_samples_consumed - self.context_samples.chunk
+    def open_stream(self, stream_id: Hashable, vad=None) -> LocalParakeetRNNTStreamingASR:
+        """Open a new stream. The returned stream must only be used through this instance."""
+        if stream_id in self._streams:
+            raise ValueError(f"Stream {stream_id} is already open")
 
-            finalized = self._try_finalize(current, results)
-            if not finalized:
-                self.partial_transcripts.append(current)
+        self._streams[stream_id] = self._asr.new_stream(vad=vad)
 
-        if decoded_this_call and self.partial_transcripts:
-            results.append(StreamTranscription(
-                self.partial_transcripts[-1],
-                is_final=False,
-                start=self._turn_start(),
-            ))
+        return self._streams[stream_id]
 
-        return results
+    def close_stream(self, stream_id: Hashable) -> StreamTranscription:
+        """Flush the tail of the stream, close it and return its final hypothesis."""
+        return self._streams.pop(stream_id).finish()
 
-    def _try_finalize(self, current: str, results: List[StreamTranscription]) -> bool:
-        """Attempt to finalize the current transcript by one of two strategies.
+    def push_audio(self, audio: Dict[Hashable, Union[np.ndarray, Iterable[np.ndarray]]],
+                   sampling_rate: int = None) -> Dict[Hashable, List[StreamTranscription]]:
+        """
+        Feed audio to one or more open streams.
 
-        Speculative finish is always tried first — it uses the right-context
-        lookahead to confirm the transcript is stable before committing.
-        The turn-threshold acts as a fallback: when the deque is full and the
-        transcript has not changed for that many chunks, we try speculative
-        finish once more and only force a final if it also agrees.
+        Returns the transcriptions per stream for the streams audio was provided for,
+        see :meth:`LocalParakeetRNNTStreamingASR.push_audio`.
         """
-        if current.strip() and (
-            current.strip().endswith((".", "?", "!")) or self._is_right_context_silent()
-        ):
-            return self._try_speculative_finalize(current, results)
-
-        if (
-            len(self.partial_transcripts) == self.partial_transcripts.maxlen
-            and current.strip()
-            and current == self.partial_transcripts[0]
-        ):
-            # Use speculative finish to confirm before forcing a final, so we
-            # don't emit a truncated transcript when the sentence is still growing.
-            if self._try_speculative_finalize(current, results):
-                return True
-
-            # Speculative finish disagreed (sentence still changing): emit the
-            # current text as a forced final and reset so the deque doesn't keep
-            # re-firing on the same stale transcript.
-            results.append(StreamTranscription(
-                current,
-                is_final=True,
-                start=self._turn_start(),
-                end=self._speech_end(),
-            ))
-            self.reset(keep_recent=True)
-            return True
-
-        return False
-
-    def _detect_silence(self, audio_frames: List[np.ndarray]) -> None:
-        if self._vad is None:
-            return
+        streams = {stream_id: self._streams[stream_id] for stream_id in audio}
+        for stream_id, audio_frames in audio.items():
+            streams[stream_id]._add_pending_audio(audio_frames, sampling_rate)
 
-        for frame in audio_frames:
-            if self._vad.is_vad(frame, self.sample_rate):
-                self._consecutive_silence_samples = 0
-            else:
-                self._consecutive_silence_samples += frame.size
-
-    def finish(self) -> StreamTranscription:
-        """Flush the tail and close the stream."""
-        if self.closed:
-            return StreamTranscription(
-                text=self._decode_text(),
-                is_final=True,
-                start=self._turn_start(),
-                end=self._total_samples_consumed,
+        results = {stream_id: [] for stream_id in streams}
+        decoded = set()
+
+        while True:
+            steps = [(stream_id, stream, stream._next_step_audio()) for stream_id, stream in streams.items()]
+            steps = [step for step in steps if step[2] is not None]
+            if not steps:
+                break
+
+            for batch_start in range(0, len(steps), self._max_batch_size):
+                batch = steps[batch_start:batch_start + self._max_batch_size]
+                transcripts = self._run_batched_step([(stream, step_audio) for _, stream, step_audio in batch])
+
+                for (stream_id, stream, _), current in zip(batch, transcripts):
+                    decoded.add(stream_id)
+                    stream._process_step(current, results[stream_id])
+
+        for stream_id in decoded:
+            streams[stream_id]._add_partial(results[stream_id])
+
+        return results
+
+    @torch.inference_mode()
+    def _run_batched_step(self, steps: List[Tuple[LocalParakeetRNNTStreamingASR, torch.Tensor]]) -> List[str]:
+        """Run one decode step for each stream with one batched encoder and decoder call."""
+        if len(steps) == 1 or self._asr._cache_encoder:
+            # Encoder caches are kept per stream, streams with cached encoders are decoded one by one
+            return [stream._run_step(step_audio, is_final=False) for stream, step_audio in steps]
+
+        streams = [stream for stream, _ in steps]
+        is_last_chunk = [stream._add_to_buffer(step_audio, False) for stream, step_audio in steps]
+
+        # Streams hold different amounts of context, pad to the longest buffer.
+        with timed(self._asr._metrics, "encoder"), autocast(self._asr.precision, self._asr.device):
+            encoder_output, encoder_output_len = self._asr.model(
+                input_signal=torch.nn.utils.rnn.pad_sequence([stream.buffer.samples[0] for stream in streams],
+                                                             batch_first=True),
+                input_signal_length=torch.cat([stream.buffer.context_size_batch.total() for stream in streams]),
             )
+        encoder_output = encoder_output.transpose(1, 2)
 
-        self.closed = True
+        chunks = [stream._chunk_encoder_output(encoder_output[idx:idx + 1], encoder_output_len[idx:idx + 1],
+                                               is_last_chunk[idx])
+                  for idx, stream in enumerate(streams)]
+
+        decoding_computer = self._asr.decoding_computer
+        state_items = [decoding_computer.split_batched_state(stream.state)[0] if stream.state is not None else None
+                       for stream in streams]
+        prev_batched_state = (decoding_computer.merge_to_batched_state(state_items)
+                              if any(item is not None for item in state_items) else None)
+
+        with timed(self._asr._metrics, "decoder"), autocast(self._asr.precision, self._asr.device):
+            chunk_batched_hyps, _, batched_state = decoding_computer(
+                x=torch.nn.utils.rnn.pad_sequence([chunk[0][0] for chunk in chunks], batch_first=True),
+                out_len=torch.cat([out_len for _, out_len in chunks]),
+                prev_batched_state=prev_batched_state,
+                multi_biasing_ids=None,
+            )
 
-        if not self.started and self.pending_audio.numel() == 0:
-            return StreamTranscription(text="", is_final=True, start=0, end=0)
+        for idx, (stream, state_item) in enumerate(zip(streams, decoding_computer.split_batched_state(batched_state))):
+            stream.state = decoding_computer.merge_to_batched_state([state_item])
+            stream._merge_hyps(_select_hyps(chunk_batched_hyps, idx))
 
-        if self.pending_audio.numel() > 0:
-            tail = self.pending_audio
-            self.pending_audio = torch.empty(0, dtype=torch.float32)
-            onset = self._total_samples_consumed
-            self._total_samples_consumed += tail.numel()
-            transcript_text = self._run_step(tail, is_final=True)
-        else:
-            # No tail, but buffered right-context must be promoted into the final chunk.
-            onset = self._total_samples_consumed
-            transcript_text = self._run_step(torch.empty(0, dtype=torch.float32), is_final=True)
-
-        if transcript_text.strip() and self._transcript_onset_sample is None:
-            self._transcript_onset_sample = onset
-
-        return StreamTranscription(
-            transcript_text,
-            is_final=True,
-            start=self._turn_start(),
-            end=self._speech_end(),
-        )
+        return [stream._decode_text() for stream in streams]
@@ -0,0 +1,66 @@
+"""
+Reduced precision inference of torch models on CPU.
+
+The supported precisions are
+
+* `float32`: full precision.
+* `bfloat16`: matrix multiplications and convolutions run in bfloat16 with CPU autocast,
+  weights are kept in float32. Fast on CPUs with native bfloat16 support (AVX512-BF16,
+  AMX, ARMv8.6+), elsewhere it may be slower than float32.
+* `int8`: dynamic quantization, the weights of linear and LSTM layers are stored as int8
+  and activations are quantized on the fly. Reduces the memory of these layers about
+  four times and typically speeds up their inference on x86 and ARM CPUs.
+
+Reduced precision changes the transcripts slightly, compare them against float32 with
+:mod:`cltl.asr.bench` (`--precisions`) before deploying.
+"""
+
+import contextlib
+import logging
+from typing import ContextManager, Iterable, Type
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+PRECISIONS = ("float32", "bfloat16", "int8")
+
+QUANTIZED_MODULES = (torch.nn.Linear, torch.nn.LSTM)
+
+
+def check_precision(precision: str, device: str = "cpu") -> str:
+    """Validate `precision` for inference on `device` and return it."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision {precision}, expected one of {PRECISIONS}")
+    if precision == "int8" and torch.device(device).type != "cpu":
+        raise ValueError(f"int8 dynamic quantization is only supported on CPU, not on {device}")
+
+    return precision
+
+
+def apply_precision(model: torch.nn.Module, precision: str,
+                    modules: Iterable[Type[torch.nn.Module]] = QUANTIZED_MODULES) -> torch.nn.Module:
+    """
+    Prepare the model for inference in `precision`.
+
+    With `int8` the `modules` of the model are replaced in place by dynamically quantized
+    modules. Subclasses of these modules are not quantized. Other precisions leave
+    the model unchanged, run inference within :func:`autocast`.
+    """
+    check_precision(precision)
+    if precision != "int8":
+        return model
+
+    quantized = torch.ao.quantization.quantize_dynamic(model.eval(), set(modules), dtype=torch.qint8, inplace=True)
+    logger.info("Quantized %s to int8", type(model).__name__)
+
+    return quantized
+
+
+def autocast(precision: str, device: str = "cpu") -> ContextManager:
+    """Context to run inference in `precision`, autocast for `bfloat16`, a no-op otherwise."""
+    if precision != "bfloat16":
+        return contextlib.nullcontext()
+
+    return torch.autocast(torch.device(device).type, dtype=torch.bfloat16)
@@ -1,30 +1,70 @@
 import os
 import shutil
-import tempfile
+from typing import Iterable, List
 
 import numpy as np
+import torch
 from speechbrain.pretrained import EncoderDecoderASR
 
 from cltl.combot.infra.time_util import timestamp_now
 from cltl.asr.api import ASR
-from cltl.asr.util import store_wav
+from cltl.asr.util import store_wav, temporary_wav, to_mono_float32
+from cltl.asr.warm_start import ModelCache, cached
 
 
 class SpeechbrainASR(ASR):
-    def __init__(self, model_id: str, storage: str = None, model_dir: str = None):
-        self.processor = EncoderDecoderASR.from_hparams(source=model_id, savedir=model_dir)
-        self._storage = storage if storage else tempfile.mkdtemp()
-        self._clean_storage = storage is None
+    def __init__(self, model_id: str, storage: str = None, model_dir: str = None, model_cache: ModelCache = None):
+        """
+        Parameters
+        ----------
+        model_id : str
+            Speechbrain model to load.
+        storage : str
+            Optional directory to store the transcribed audio for debugging.
+            Audio is passed to the model in memory, if not set no audio is
+            written to disk.
+        model_dir : str
+            Directory to store the model files.
+        model_cache : ModelCache
+            Optional cache to load the model from, see :class:`~cltl.asr.warm_start.ModelCache`.
+        """
+        self.processor = cached(model_cache, lambda: EncoderDecoderASR.from_hparams(source=model_id, savedir=model_dir),
+                                backend="speechbrain", model_id=model_id)
+        self._storage = storage
 
     def clean(self):
-        shutil.rmtree(self._storage)
+        if self._storage:
+            shutil.rmtree(self._storage)
 
     def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
-        wav_file = str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav"))
-        try:
-            store_wav(audio, sampling_rate, wav_file)
+        if self._storage:
+            store_wav(audio, sampling_rate, str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav")))
 
+        if sampling_rate == self.processor.audio_normalizer.sample_rate:
+            return self.speech_to_texts([audio], sampling_rate)[0]
+
+        # Let Speechbrain resample the audio from file
+        with temporary_wav(audio, sampling_rate) as wav_file:
             return self.processor.transcribe_file(wav_file)
-        finally:
-            if self._clean_storage:
-                os.remove(wav_file)
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        """
+        Transcribe the batch from memory in a single call to the Speechbrain model.
+
+        Batching requires audio at the sample rate of the model, otherwise the
+        samples are transcribed one by one.
+        """
+        audios = list(audios)
+        if not audios or sampling_rate != self.processor.audio_normalizer.sample_rate:
+            return super().speech_to_texts(audios, sampling_rate)
+
+        signals = [torch.from_numpy(to_mono_float32(audio)) for audio in audios]
+        max_length = max(signal.shape[0] for signal in signals)
+        batch = torch.zeros(len(signals), max_length)
+        for idx, signal in enumerate(signals):
+            batch[idx, :signal.shape[0]] = signal
+        relative_lengths = torch.tensor([signal.shape[0] / max_length for signal in signals])
+
+        transcripts, _ = self.processor.transcribe_batch(batch, relative_lengths)
+
+        return list(transcripts)
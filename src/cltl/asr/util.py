@@ -1,9 +1,12 @@
+import io
 import logging
+import os
 import re
+import tempfile
+from contextlib import contextmanager
 
 import numpy as np
 import soundfile
-import sounddevice as sd
 
 logger = logging.getLogger(__name__)
 
@@ -16,10 +19,49 @@ def store_wav(frames, sampling_rate, save=None):
     if save:
         soundfile.write(save, audio, sampling_rate)
     else:
+        # Requires PortAudio, only imported for playback
+        import sounddevice as sd
+
         sd.play(audio, sampling_rate)
         sd.wait()
 
 
+def wav_buffer(audio: np.ndarray, sampling_rate: int, name: str = "audio.wav") -> io.BytesIO:
+    """Encode the audio as WAV into an in-memory buffer."""
+    buffer = io.BytesIO()
+    soundfile.write(buffer, audio, sampling_rate, format="WAV")
+    buffer.seek(0)
+    buffer.name = name
+
+    return buffer
+
+
+@contextmanager
+def temporary_wav(audio: np.ndarray, sampling_rate: int):
+    """Store the audio in a temporary WAV file that is removed on exit."""
+    fd, wav_file = tempfile.mkstemp(prefix="asr-", suffix=".wav")
+    os.close(fd)
+    try:
+        store_wav(audio, sampling_rate, wav_file)
+        yield wav_file
+    finally:
+        os.remove(wav_file)
+
+
+def to_mono_float32(audio: np.ndarray) -> np.ndarray:
+    """Downmix to mono and normalise to float32 in [-1, 1]."""
+    if audio.ndim > 2:
+        raise ValueError(f"audio must have at most two dimensions, shape was {audio.shape}")
+
+    scale = 32768.0 if audio.dtype == np.int16 else 1.0
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1, dtype=np.float32) if audio.shape[1] > 1 else audio[:, 0]
+
+    audio = audio.astype(np.float32, copy=False)
+
+    return audio / scale if scale != 1.0 else audio
+
+
 def sanitize_whisper_result(audio_duration: float, transcription: str):
     # * 6 syllables per sec * 6 letters per syllable (which should be very fast)
     #   Set a minimum audio duration to avoid edge cases
@@ -0,0 +1,157 @@
+"""
+Warm start of local ASR models.
+
+:class:`ModelCache` stores a model after it is prepared for inference (weights loaded,
+dtype cast, decoding configured) as a single torch artifact in a local directory. On
+the next start the artifact is loaded with memory-mapped storages, i.e. weights are
+paged in lazily on first use and shared between processes through the page cache.
+
+:func:`warm_up` runs a short silent utterance through an ASR, such that the first real
+utterance does not pay for lazy initialisation, kernel selection and allocations.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import TYPE_CHECKING, Callable, Optional, TypeVar, Union
+
+import numpy as np
+
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR
+
+if TYPE_CHECKING:
+    import torch
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_DIR_ENV = "CLTL_ASR_MODEL_CACHE"
+# Bump to invalidate cached artifacts if the way models are prepared changes
+CACHE_FORMAT = 1
+
+M = TypeVar("M")
+
+
+class ModelCache:
+    def __init__(self, cache_dir: str = None):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+            Directory for the model artifacts. Defaults to the `CLTL_ASR_MODEL_CACHE`
+            environment variable or `~/.cache/cltl-asr`.
+        """
+        self._cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV) \
+                          or os.path.join(os.path.expanduser("~"), ".cache", "cltl-asr")
+
+    @property
+    def cache_dir(self) -> str:
+        return self._cache_dir
+
+    def path(self, **key) -> str:
+        """Path of the artifact for the model identified by `key`."""
+        import torch
+
+        key = dict(key, torch=torch.__version__, format=CACHE_FORMAT)
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:16]
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", str(key.get("model_id", "model")))
+
+        return os.path.join(self._cache_dir, f"{name}-{digest}.pt")
+
+    def load(self, create: Callable[[], M], map_location: Union[str, "torch.device"] = None, **key) -> M:
+        """
+        Load the model identified by `key` from the cache, or create and cache it.
+
+        Parameters
+        ----------
+        create : Callable[[], M]
+            Creates the model ready for inference if it is not cached. The model must be
+            picklable to be cached, otherwise it is created on every call.
+        map_location : Union[str, torch.device]
+            Device to load the cached model to.
+        key
+            Everything that determines the prepared model, e.g. the backend, model id,
+            device and dtype.
+        """
+        import torch
+
+        path = self.path(**key)
+        if os.path.exists(path):
+            start = time.time()
+            try:
+                model = torch.load(path, map_location=map_location, mmap=True, weights_only=False)
+                logger.info("Loaded cached model %s in %.2f sec", path, time.time() - start)
+                return model
+            except Exception:
+                logger.exception("Failed to load cached model %s, recreate it", path)
+                os.remove(path)
+
+        model = create()
+        self._save(model, path)
+
+        return model
+
+    def _save(self, model, path: str) -> None:
+        import torch
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            torch.save(model, tmp_path)
+            # Atomic, concurrent processes never see a partially written artifact
+            os.replace(tmp_path, path)
+            logger.info("Cached model at %s", path)
+        except Exception as e:
+            logger.warning("Failed to cache model %s: %s", type(model).__name__, e)
+            os.remove(tmp_path)
+
+
+def cached(model_cache: Optional[ModelCache], create: Callable[[], M],
+           map_location: Union[str, "torch.device"] = None, **key) -> M:
+    """Load the model from `model_cache`, or create it if no cache is provided."""
+    if model_cache is None:
+        return create()
+
+    return model_cache.load(create, map_location=map_location, **key)
+
+
+def warm_up(asr: Union[ASR, BufferedASR], sampling_rate: int = None, seconds: float = 1.0) -> float:
+    """
+    Transcribe `seconds` of silence with `asr` and return the time it took.
+
+    The sampling rate defaults to the `sample_rate` or `sampling_rate` of the ASR, or 16kHz.
+    Streaming ASR is warmed up on a new stream if it supports `new_stream()`, otherwise
+    it is reset afterwards if it supports `reset()`. Multi-stream ASR is warmed up on a
+    stream that is closed afterwards.
+    """
+    if not sampling_rate:
+        sampling_rate = getattr(asr, "sample_rate", None) or getattr(asr, "sampling_rate", None) or 16000
+
+    start = time.time()
+
+    silence = np.zeros((int(sampling_rate * seconds), 1), dtype=np.int16)
+    if hasattr(asr, "open_stream"):
+        stream_id = object()
+        asr.open_stream(stream_id)
+        asr.push_audio({stream_id: [silence]}, sampling_rate)
+        asr.close_stream(stream_id)
+    elif isinstance(asr, BufferedASR):
+        stream = asr.new_stream() if hasattr(asr, "new_stream") else asr
+        stream.push_audio([silence], sampling_rate)
+        if hasattr(stream, "finish"):
+            stream.finish()
+        if stream is asr and hasattr(asr, "reset"):
+            asr.reset()
+    else:
+        asr.speech_to_text(silence, sampling_rate)
+
+    elapsed = time.time() - start
+    logger.info("Warmed up %s in %.2f sec", type(asr).__name__, elapsed)
+
+    return elapsed
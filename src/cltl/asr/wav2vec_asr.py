@@ -1,17 +1,39 @@
 import os
+from typing import Iterable, List
 
 import numpy as np
+import torch
 from cltl.combot.infra.time_util import timestamp_now
 from transformers import Wav2Vec2Processor, Wav2Vec2ForCTC
 
 from cltl.asr.api import ASR
+from cltl.asr.precision import apply_precision, autocast, check_precision
 from cltl.asr.util import store_wav
+from cltl.asr.warm_start import ModelCache, cached
 
 
 class Wav2Vec2ASR(ASR):
-    def __init__(self, model_id: str, sampling_rate: int, storage: str = None):
+    def __init__(self, model_id: str, sampling_rate: int, storage: str = None, model_cache: ModelCache = None,
+                 precision: str = "float32"):
+        """
+        Parameters
+        ----------
+        model_id : str
+            Wav2Vec2 model to load.
+        sampling_rate : int
+            Sampling rate of the model.
+        storage : str
+            Optional directory to store the transcribed audio for debugging.
+        model_cache : ModelCache
+            Optional cache to load the model from, see :class:`~cltl.asr.warm_start.ModelCache`.
+        precision : str
+            Inference precision on CPU, `float32`, `bfloat16` or `int8`, see :mod:`cltl.asr.precision`.
+        """
+        self._precision = check_precision(precision)
         self.processor = Wav2Vec2Processor.from_pretrained(model_id)
-        self.model = Wav2Vec2ForCTC.from_pretrained(model_id)
+        self.model = cached(model_cache,
+                            lambda: apply_precision(Wav2Vec2ForCTC.from_pretrained(model_id), precision),
+                            backend="wav2vec2", model_id=model_id, precision=precision)
 
         self.sampling_rate = sampling_rate
 
@@ -26,11 +48,28 @@ class Wav2Vec2ASR(ASR):
             store_wav(raw_audio, sampling_rate, str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav")))
 
         representation = self.processor(raw_audio, sampling_rate=self.sampling_rate, return_tensors="pt").input_values
-        token_logits = self.model(representation).logits
-        predicted_tokens = np.argmax(token_logits.detach().numpy(), axis=2)
+        with torch.inference_mode(), autocast(self._precision):
+            token_logits = self.model(representation).logits
+        predicted_tokens = np.argmax(token_logits.float().numpy(), axis=2)
 
         return self.processor.decode(predicted_tokens[0])
 
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        if not sampling_rate:
+            sampling_rate = self.sampling_rate
+
+        raw_audios = [self._resample(audio, sampling_rate) for audio in audios]
+        if not raw_audios:
+            return []
+
+        # The processor only returns an attention mask for models that expect one
+        inputs = self.processor(raw_audios, sampling_rate=self.sampling_rate, padding=True, return_tensors="pt")
+        with torch.inference_mode(), autocast(self._precision):
+            token_logits = self.model(inputs.input_values, attention_mask=inputs.get("attention_mask")).logits
+        predicted_tokens = np.argmax(token_logits.float().numpy(), axis=2)
+
+        return self.processor.batch_decode(predicted_tokens)
+
     def _resample(self, audio, sampling_rate):
         if not audio.dtype == np.int16:
             raise ValueError(f"Invalid sample depth {audio.dtype}, expected np.int16")
@@ -2,42 +2,125 @@ import logging
 import numpy as np
 import os
 import shutil
-import tempfile
 import time
+from typing import Iterable, List
+
+import torch
 import whisper
 from cltl.combot.infra.time_util import timestamp_now
 
 from cltl.asr.api import ASR
-from cltl.asr.util import store_wav, sanitize_whisper_result
+from cltl.asr.precision import apply_precision, autocast, check_precision
+from cltl.asr.util import store_wav, sanitize_whisper_result, temporary_wav, to_mono_float32
+from cltl.asr.warm_start import ModelCache, cached
 
 logger = logging.getLogger(__name__)
 
 
 class WhisperASR(ASR):
-    def __init__(self, model_id: str = "base", language: str = 'en', storage: str = None):
-        self._model = whisper.load_model(model_id)
+    def __init__(self, model_id: str = "base", language: str = 'en', storage: str = None,
+                 model_cache: ModelCache = None, precision: str = "float32"):
+        """
+        Parameters
+        ----------
+        model_id : str
+            Whisper model to load.
+        language : str
+            Language of the audio input.
+        storage : str
+            Optional directory to store the transcribed audio for debugging.
+            Audio is passed to the model in memory, if not set no audio is
+            written to disk.
+        model_cache : ModelCache
+            Optional cache to load the model from, see :class:`~cltl.asr.warm_start.ModelCache`.
+        precision : str
+            Inference precision, `float32`, `bfloat16` or `int8`, see :mod:`cltl.asr.precision`.
+            Reduced precision runs on CPU.
+        """
+        self._precision = check_precision(precision)
+        self._model = cached(model_cache, lambda: self._load_model(model_id, precision),
+                             backend="whisper", model_id=model_id, precision=precision)
         self._language = language
-        self._storage = storage if storage else tempfile.mkdtemp()
-        self._clean_storage = storage is None
+        self._storage = storage
+
+    @staticmethod
+    def _load_model(model_id: str, precision: str):
+        if precision == "float32":
+            return whisper.load_model(model_id)
+
+        model = whisper.load_model(model_id, device="cpu")
+        if precision == "int8":
+            # Whisper's Linear casts its weights to the input dtype, equivalent to torch.nn.Linear
+            # in float32, but its subclass is not quantized.
+            for module in model.modules():
+                if isinstance(module, whisper.model.Linear):
+                    module.__class__ = torch.nn.Linear
+
+        return apply_precision(model, precision)
 
     def clean(self):
-        shutil.rmtree(self._storage)
+        if self._storage:
+            shutil.rmtree(self._storage)
 
     def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
-        wav_file = str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav"))
-        try:
-            store_wav(audio, sampling_rate, wav_file)
+        if self._storage:
+            store_wav(audio, sampling_rate, str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav")))
+
+        start = time.time()
+        if sampling_rate == whisper.audio.SAMPLE_RATE:
+            transcription = self._transcribe(to_mono_float32(audio))
+        else:
+            # Let whisper resample the audio from file
+            with temporary_wav(audio, sampling_rate) as wav_file:
+                transcription = self._transcribe(wav_file)
+
+        audio_duration = audio.shape[0] / sampling_rate
+        transcription = sanitize_whisper_result(audio_duration, transcription['text'])
+
+        logger.debug("Transcribed audio (%s sec) in %s to %s",
+                     audio_duration, time.time() - start, transcription)
+
+        return transcription
+
+    def _transcribe(self, audio):
+        with autocast(self._precision):
+            return self._model.transcribe(audio, fp16=False, language=self._language, task='transcribe')
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        """
+        Decode the batch in a single forward pass of the Whisper model.
+
+        Only audio of at most 30 seconds (the Whisper context window) at 16kHz
+        is batched, other samples are transcribed one by one. Batched decoding
+        runs a single greedy pass without temperature fallback.
+        """
+        audios = list(audios)
+        if sampling_rate != whisper.audio.SAMPLE_RATE:
+            return super().speech_to_texts(audios, sampling_rate)
+
+        batch = []
+        transcripts = []
+        for idx, audio in enumerate(audios):
+            if audio.shape[0] <= whisper.audio.N_SAMPLES:
+                batch.append(idx)
+                transcripts.append(None)
+            else:
+                transcripts.append(self.speech_to_text(audio, sampling_rate))
+        if not batch:
+            return transcripts
 
-            start = time.time()
-            transcription = self._model.transcribe(wav_file, fp16=False, language=self._language, task='transcribe')
+        start = time.time()
+        mels = [whisper.log_mel_spectrogram(whisper.pad_or_trim(to_mono_float32(audios[idx])),
+                                            n_mels=self._model.dims.n_mels)
+                for idx in batch]
+        options = whisper.DecodingOptions(language=self._language, task='transcribe', fp16=False)
+        with autocast(self._precision):
+            results = whisper.decode(self._model, torch.stack(mels).to(self._model.device), options)
 
-            audio_duration = audio.shape[0] / sampling_rate
-            transcription = sanitize_whisper_result(audio_duration, transcription['text'])
+        for idx, result in zip(batch, results):
+            audio_duration = audios[idx].shape[0] / sampling_rate
+            transcripts[idx] = sanitize_whisper_result(audio_duration, result.text)
 
-            logger.debug("Transcribed audio (%s sec) in %s to %s",
-                         audio_duration, time.time() - start, transcription)
+        logger.debug("Transcribed batch of %s audio samples in %s", len(batch), time.time() - start)
 
-            return transcription
-        finally:
-            if self._clean_storage:
-                os.remove(wav_file)
+        return transcripts
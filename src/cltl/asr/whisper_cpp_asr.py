@@ -1,76 +1,157 @@
 import logging
 import os
 import shutil
-import tempfile
+import threading
 import time
+from typing import Sequence, Tuple, Union
 
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from cltl.combot.infra.time_util import timestamp_now
 
-from cltl.asr.api import ASR
-from cltl.asr.util import store_wav, sanitize_whisper_result
+from cltl.asr.concurrent import ConcurrentASR
+from cltl.asr.util import store_wav, sanitize_whisper_result, wav_buffer
 
 logger = logging.getLogger(__name__)
 
 
-class WhisperCppASR(ASR):
-    def __init__(self, url: str, model_id: str = "base", language: str = 'en', storage: str = None):
-        self._url = url
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class WhisperCppASR(ConcurrentASR):
+    def __init__(self, url: Union[str, Sequence[str]], model_id: str = "base", language: str = 'en',
+                 storage: str = None, timeout: Union[float, Tuple[float, float]] = (3.05, 60.0),
+                 retries: int = 2, backoff: float = 0.5, dispatch: str = "least_loaded", pool_size: int = 10,
+                 max_concurrency: int = 4):
+        """
+        Parameters
+        ----------
+        url : Union[str, Sequence[str]]
+            Inference endpoint of the whisper.cpp server, or of several servers to distribute
+            requests over.
+        model_id : str
+            Model used for transcription.
+        language : str
+            Language of the audio input.
+        storage : str
+            Optional directory to store the transcribed audio for debugging.
+            Audio is uploaded from memory, if not set no audio is written to disk.
+        timeout : Union[float, Tuple[float, float]]
+            Timeout in seconds for requests, or a tuple of connect and read timeout.
+        retries : int
+            Number of retries of requests that fail with a connection error, a timeout or
+            a server error status. Retries are dispatched like new requests, i.e. with
+            several servers they are typically sent to a different server.
+        backoff : float
+            Delay in seconds before the first retry, doubled for each further retry.
+        dispatch : str
+            Either `least_loaded` to send requests to the server with the fewest requests
+            in flight, or `round_robin`.
+        pool_size : int
+            Maximum number of kept-alive connections per server.
+        max_concurrency : int
+            Maximum number of requests in flight when transcribing a batch of audio samples.
+        """
+        super().__init__(max_concurrency)
+
+        if dispatch not in ("least_loaded", "round_robin"):
+            raise ValueError(f"Unsupported dispatch strategy: {dispatch}")
+
+        self._urls = [url] if isinstance(url, str) else list(url)
+        if not self._urls:
+            raise ValueError("No whisper.cpp server URL provided")
+
         self._model_id = model_id
         self._language = language
-        self._storage = storage if storage else tempfile.mkdtemp()
-        self._clean_storage = storage is None
+        self._storage = storage
+        self._timeout = timeout
+        self._retries = retries
+        self._backoff = backoff
+        self._dispatch = dispatch
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self._urls), pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._in_flight = {url: 0 for url in self._urls}
+        self._next = 0
 
     def clean(self):
-        shutil.rmtree(self._storage)
+        if self._storage:
+            shutil.rmtree(self._storage)
+
+    def close(self):
+        """Close the connections to the whisper.cpp servers."""
+        super().close()
+        self._session.close()
 
     def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
-        wav_file = str(os.path.abspath(os.path.join(self._storage, f"asr-{timestamp_now()}.wav")))
-        try:
-            store_wav(audio, sampling_rate, wav_file)
-
-            start = time.time()
-
-            with open(wav_file, 'rb') as tmp_file:
-                form = {
-                    'file': (wav_file.split('/')[-1], tmp_file, 'audio/wav'),
-                    'response_format': 'json',
-                    'language': self._language
-                }
-                response = requests.post(self._url, files=form)
-                if not response.ok:
-                    logger.error("Is the whisper.cpp server started? Check the support setup script for info!")
-                    raise ValueError('Failed to transcribe audio for %s: %s (%s)', form, response.text, response.status_code)
-
-            transcription = response.json()['text'].strip()
-
-            audio_duration = audio.shape[0] / sampling_rate
-            transcription = sanitize_whisper_result(audio_duration, transcription)
-
-            logger.debug("Transcribed audio (%s sec) in %s to %s",
-                         audio_duration, time.time() - start, transcription)
-
-            return transcription
-        finally:
-            if self._clean_storage:
-                os.remove(wav_file)
-
-
-if __name__ == '__main__':
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s.%(msecs)03d %(levelname)s %(module)s - %(funcName)s: %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-    )
-
-    with open('/Users/thomasbaier/automatic/robot/spot-woz-parent/spot-woz/py-app/storage/audio/debug/asr/asr-1709730396913.wav', 'rb') as audio:
-        files = {'file': ('asr-1709730396913.wav', audio, 'audio/wav')}
-        start = time.time()
-        transcription = requests.post('http://127.0.0.1:8989/inference', files=files)
+        if self._storage:
+            store_wav(audio, sampling_rate, str(os.path.join(self._storage, f"asr-{timestamp_now()}.wav")))
 
-    print(transcription.json())
-    logger.debug("Transcribed audio in %s to %s",
-                 time.time() - start, transcription.json()['text'].strip())
+        start = time.time()
 
-    print(transcription.json()['text'].strip())
\ No newline at end of file
+        wav_name = f"asr-{timestamp_now()}.wav"
+        wav = wav_buffer(audio, sampling_rate, wav_name).getvalue()
+        form = {
+            'file': (wav_name, wav, 'audio/wav'),
+            'response_format': 'json',
+            'language': self._language
+        }
+        response = self._post(form)
+
+        transcription = response.json()['text'].strip()
+
+        audio_duration = audio.shape[0] / sampling_rate
+        transcription = sanitize_whisper_result(audio_duration, transcription)
+
+        logger.debug("Transcribed audio (%s sec) in %s to %s",
+                     audio_duration, time.time() - start, transcription)
+
+        return transcription
+
+    def _post(self, form) -> requests.Response:
+        for attempt in range(self._retries + 1):
+            if attempt:
+                time.sleep(self._backoff * 2 ** (attempt - 1))
+
+            url = self._acquire()
+            try:
+                response = self._session.post(url, files=form, timeout=self._timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                logger.warning("Request to %s failed (attempt %s): %s", url, attempt + 1, e)
+                error = e
+                continue
+            finally:
+                self._release(url)
+
+            if response.ok:
+                return response
+
+            error = ValueError(f"Failed to transcribe audio at {url}: {response.text} ({response.status_code})")
+            if response.status_code not in RETRY_STATUS:
+                break
+            logger.warning("Request to %s failed (attempt %s): %s", url, attempt + 1, response.status_code)
+
+        logger.error("Is the whisper.cpp server started? Check the support setup script for info!")
+        raise error
+
+    def _acquire(self) -> str:
+        with self._lock:
+            offset = self._next % len(self._urls)
+            self._next += 1
+            if self._dispatch == "round_robin":
+                url = self._urls[offset]
+            else:
+                # Fewest requests in flight, ties are broken in round-robin order
+                url = min(self._urls[offset:] + self._urls[:offset], key=self._in_flight.get)
+            self._in_flight[url] += 1
+
+            return url
+
+    def _release(self, url: str) -> None:
+        with self._lock:
+            self._in_flight[url] -= 1
@@ -1,6 +1,10 @@
+import itertools
 import logging
+import threading
 import uuid
-from typing import Callable
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple, Union
 
 import numpy as np
 from cltl.backend.api.storage import STORAGE_SCHEME
@@ -17,6 +21,9 @@ from emissor.representation.container import Index, TemporalRuler
 from emissor.representation.scenario import Modality, TextSignal
 
 from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR
+from cltl.asr.backends import create_backend_from_settings
+from cltl.asr.metrics import LoggingSink, MetricsSink, PrometheusSink, timed
 from cltl_service.asr.schema import AsrTextSignalEvent
 
 logger = logging.getLogger(__name__)
@@ -24,24 +31,73 @@ logger = logging.getLogger(__name__)
 
 CONTENT_TYPE_SEPARATOR = ';'
 
+METRICS_SINKS = {
+    "log": LoggingSink,
+    "prometheus": PrometheusSink,
+}
+
+# Settings of the [cltl.asr] section that configure the service and not the ASR backend
+SERVICE_SETTINGS = ("vad_topic", "asr_topic", "buffer", "gap_timeout", "batch_wait", "prefetch", "metrics", "instance")
+
+
+def asr_from_config(config_manager: ConfigurationManager, name: str = None,
+                    metrics: Optional[MetricsSink] = None) -> Union[ASR, BufferedASR]:
+    """
+    Create the ASR backend configured in the `cltl.asr` section.
+
+    Settings of a named instance are read from the `cltl.asr.<name>` section and override
+    the settings of the `cltl.asr` section, e.g. a small model for partial transcripts
+    and a large one for final transcripts. For the available settings see
+    :py:func:`~cltl.asr.backends.create_backend_from_settings`.
+
+    Parameters
+    ----------
+    config_manager: ConfigurationManager
+        Configuration of the application
+    name: str
+        Optional name of the instance
+    metrics: MetricsSink
+        Optional sink passed to backends that report metrics
+    """
+    settings = dict(config_manager.get_config("cltl.asr"))
+    for key in SERVICE_SETTINGS:
+        settings.pop(key, None)
+    if name:
+        settings.update(dict(config_manager.get_config(f"cltl.asr.{name}")))
+
+    logger.info("Create ASR %s from configuration: %s", name or "", settings)
+
+    return create_backend_from_settings(settings, metrics=metrics)
+
 
 class AsrService:
     @classmethod
-    def from_config(cls, asr: ASR, emissor_data: EmissorDataClient,
-                    event_bus: EventBus, resource_manager: ResourceManager, config_manager: ConfigurationManager):
+    def from_config(cls, asr: Optional[ASR], emissor_data: EmissorDataClient,
+                    event_bus: EventBus, resource_manager: ResourceManager, config_manager: ConfigurationManager,
+                    metrics: Optional[MetricsSink] = None):
         config = config_manager.get_config("cltl.asr")
         buffer = config.get_int("buffer") if "buffer" in config else 0
         gap_timeout = config.get_int("gap_timeout") / 1000 if "gap_timeout" in config else 0
+        batch_size = config.get_int("batch_size") if "batch_size" in config else 1
+        batch_wait = config.get_int("batch_wait") / 1000 if "batch_wait" in config else 0
+        prefetch = config.get_int("prefetch") if "prefetch" in config else 0
+        if metrics is None and "metrics" in config:
+            metrics = METRICS_SINKS[config.get("metrics")]()
+        if asr is None:
+            asr = asr_from_config(config_manager, config.get("instance") if "instance" in config else None, metrics)
 
         def audio_loader(url, offset, length) -> AudioSource:
             return ClientAudioSource.from_config(config_manager, url, offset, length)
 
         return cls(config.get("vad_topic"), config.get("asr_topic"), asr, gap_timeout, buffer,
-                   emissor_data, audio_loader, event_bus, resource_manager)
+                   emissor_data, audio_loader, event_bus, resource_manager,
+                   batch_size=batch_size, batch_wait=batch_wait, metrics=metrics, prefetch=prefetch)
 
     def __init__(self, vad_topic: str, asr_topic: str, asr: ASR, gap_timeout: float, buffer: int,
                  emissor_data: EmissorDataClient, audio_loader: Callable[[str, int, int], AudioSource],
-                 event_bus: EventBus, resource_manager: ResourceManager):
+                 event_bus: EventBus, resource_manager: ResourceManager,
+                 batch_size: int = 1, batch_wait: float = 0, metrics: Optional[MetricsSink] = None,
+                 prefetch: int = 0):
         """
         Service to create TextSignals from voice activity detections.
 
@@ -70,6 +126,24 @@ class AsrService:
             Event bus of the application
         resource_manager: ResourceManager
             ResourceManager of the application
+        batch_size: int
+            Maximum number of voice activity events that are transcribed together in a single call to
+            :py:meth:`~cltl.asr.api.ASR.speech_to_texts`. If set to 1, events are transcribed one by one.
+            With batching enabled, events that arrive during processing are buffered (at least batch_size
+            events) and not dropped.
+        batch_wait: float
+            Maximum time in seconds to wait for further events before a batch that is not full is transcribed.
+        metrics: MetricsSink
+            Optional sink for per-event metrics: durations of `audio_fetch`, `asr`, `scenario_lookup` and
+            `create_payload`, the `audio` duration of transcribed events, the `queue_depth` of the topic
+            worker, counts of `events_received`, `events_dropped` (arrived while an event was processed
+            without buffer), `gap_continuations` and `gap_merges`. If the sink is a
+            :py:class:`~cltl.asr.metrics.PrometheusSink`, the metrics are exposed at `/metrics` of the
+            service :py:attr:`app`.
+        prefetch: int
+            Maximum number of events for which audio is fetched ahead on a background thread when they arrive,
+            while earlier events are still transcribed. Events are still processed in the order they arrived.
+            If set to 0, audio is fetched when the event is processed.
         """
         self._asr = asr
         self._emissor_data = emissor_data
@@ -81,46 +155,186 @@ class AsrService:
 
         self._gap_timeout = gap_timeout
         self._buffer = buffer
+        self._batch_size = max(batch_size, 1)
+        self._batch_wait = batch_wait
+        self._pending = []
+        self._pending_since = None
         self._transcript = []
         self._mentions_transcript = []
 
         self._last_event = timestamp_now()
 
+        self._metrics = metrics
+        # Arrival sequence numbers of the events that can still be in the queue of the topic worker
+        self._arrived: OrderedDict[str, int] = OrderedDict()
+        # Events that were processed before their arrival was counted
+        self._processed_early: OrderedDict[str, None] = OrderedDict()
+        self._received = 0
+        self._processed_seq = -1
+        self._arrival_lock = threading.Lock()
+        self._queue_size = 1
+
+        self._prefetch = prefetch
+        # Arrived events in order of arrival, with the future of their audio if it is prefetched
+        self._prefetched: OrderedDict[str, Optional[Future]] = OrderedDict()
+        self._last_loaded = None
+        self._prefetch_lock = threading.Lock()
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-prefetch") \
+            if prefetch > 0 else None
+
         self._topic_worker = None
+        self._app = None
 
     @property
     def app(self):
-        return None
+        if self._app is None and isinstance(self._metrics, PrometheusSink):
+            from flask import Flask, Response
+
+            self._app = Flask(__name__)
+
+            @self._app.route('/metrics', methods=['GET'])
+            def metrics():
+                return Response(self._metrics.exposition(), mimetype='text/plain; version=0.0.4')
+
+        return self._app
 
     def start(self, timeout=30):
         # If gap_timeout is configured, still add a buffer to catch continuation events
         buffer_size = self._buffer if self._gap_timeout == 0 else max(self._buffer, 4)
+        # When batching, buffer at least a full batch and get scheduled invocations to flush incomplete batches
+        buffer_size = buffer_size if self._batch_size == 1 else max(buffer_size, self._batch_size)
+        scheduled = None if self._batch_size == 1 else max(self._batch_wait, 0.01)
+        # TopicWorker always queues at least one event
+        self._queue_size = max(buffer_size, 1)
         self._topic_worker = TopicWorker([self._vad_topic], self._event_bus, provides=[self._asr_topic],
                                          resource_manager=self._resource_manager, processor=self._process,
                                          buffer_size=buffer_size, name=self.__class__.__name__,
-                                         interval=self._gap_timeout)
+                                         interval=self._gap_timeout, scheduled=scheduled)
         self._topic_worker.start().wait()
 
+        if self._metrics is not None:
+            # Subscribe after the topic worker, such that events are counted after they are queued
+            self._event_bus.subscribe(self._vad_topic, self._count_received)
+        if self._prefetch_executor is not None:
+            self._event_bus.subscribe(self._vad_topic, self._prefetch_audio)
+
     def stop(self):
         if not self._topic_worker:
             pass
 
+        if self._metrics is not None:
+            self._event_bus.unsubscribe(self._vad_topic, self._count_received)
+        if self._prefetch_executor is not None:
+            self._event_bus.unsubscribe(self._vad_topic, self._prefetch_audio)
         self._topic_worker.stop()
         self._topic_worker.await_stop()
         self._topic_worker = None
 
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True, cancel_futures=True)
+            self._prefetched.clear()
+
+    def _count_received(self, event: Event[VadMentionEvent]):
+        with self._arrival_lock:
+            seq = self._received
+            self._received += 1
+            if event.id in self._processed_early:
+                del self._processed_early[event.id]
+                dropped = self._processed(seq)
+            else:
+                dropped = 0
+                self._arrived[event.id] = seq
+                # The topic worker holds at most the event it took from its queue and a full queue
+                # of the most recent events, keep the oldest entry as it may be in process
+                while len(self._arrived) > self._queue_size + 1:
+                    del self._arrived[next(itertools.islice(self._arrived, 1, None))]
+        self._metrics.increment("events_received")
+        if dropped > 0:
+            self._metrics.increment("events_dropped", dropped)
+
+    def _record_queue(self, event: Event[VadMentionEvent]):
+        if self._metrics is None:
+            return
+
+        dropped = 0
+        with self._arrival_lock:
+            seq = self._arrived.pop(event.id, None)
+            if seq is not None:
+                dropped = self._processed(seq)
+            else:
+                # The event was processed before its arrival was counted
+                self._processed_early[event.id] = None
+                while len(self._processed_early) > self._queue_size + 1:
+                    self._processed_early.popitem(last=False)
+            depth = min(len(self._arrived), self._queue_size)
+
+        self._metrics.gauge("queue_depth", depth)
+        if dropped > 0:
+            self._metrics.increment("events_dropped", dropped)
+
+    def _processed(self, seq: int) -> int:
+        """Record that the event that arrived as `seq` was processed, returns the number of dropped events."""
+        # Events are processed in order of arrival, events between the previously processed
+        # event and this one were dropped by the topic worker
+        dropped = seq - self._processed_seq - 1
+        self._processed_seq = max(self._processed_seq, seq)
+        while self._arrived and next(iter(self._arrived.values())) < seq:
+            self._arrived.popitem(last=False)
+
+        return dropped
+
     def _process(self, event: Event[VadMentionEvent]):
+        if event is not None:
+            self._record_queue(event)
+
+        if self._batch_size > 1:
+            self._process_batch(event)
+            return
+
         if self._gap_timeout > 0 and self._buffer == 0:
             # Manually drop events that arrived during processing, but only if we don't expect continuation
             # We consider 10ms as instantaneous invocation
             event_buffered_during_execution = timestamp_now() - self._last_event < 10
             if event_buffered_during_execution and not self._transcript:
                 self._last_event = timestamp_now()
+                if self._metrics is not None:
+                    self._metrics.increment("events_dropped")
                 return
 
-        transcript = None
+        transcript = self._transcribe(event) if event is not None else None
+        self._handle_transcript(event, transcript)
+
+        self._last_event = timestamp_now()
+
+    def _process_batch(self, event: Optional[Event[VadMentionEvent]]):
+        if event is not None:
+            if not self._pending:
+                self._pending_since = timestamp_now()
+            self._pending.append(event)
+
+        if not self._pending:
+            return
+
+        # Without gap_timeout the topic worker blocks for batch_wait, scheduled invocations (event is None)
+        # then only happen if no further events arrived within batch_wait. With gap_timeout it polls the
+        # queue every gap_timeout and is invoked whenever the queue is empty, wait for batch_wait instead.
+        batch_complete = ((event is None and self._gap_timeout == 0)
+                          or len(self._pending) >= self._batch_size
+                          or timestamp_now() - self._pending_since >= self._batch_wait * 1000)
+        if not batch_complete:
+            return
+
+        events = self._pending
+        self._pending = []
+        self._pending_since = None
+
+        for batch_event, transcript in zip(events, self._transcribe_batch(events)):
+            self._handle_transcript(batch_event, transcript)
+
+        self._last_event = timestamp_now()
+
+    def _handle_transcript(self, event: Optional[Event[VadMentionEvent]], transcript: Optional[str]):
         if event is not None:
-            transcript = self._transcribe(event)
             self._mentions_transcript.append(event.payload.mentions[0])
             if transcript:
                 self._transcript.append(transcript)
@@ -133,9 +347,14 @@ class AsrService:
         elif self._gap_timeout and event is not None and self._transcript and self._transcript[-1].endswith(ASR.GAP_INDICATOR):
             # Ignore empty transcripts while waiting for continuation
             logger.debug("Partially transcribed event %s to %s", event.id, self._transcript[-1])
+            if self._metrics is not None:
+                self._metrics.increment("gap_continuations")
         else:
             # Full (potentially empty) utterance or gap timeout reached
-            asr_event = self._create_payload()
+            with timed(self._metrics, "create_payload"):
+                asr_event = self._create_payload()
+            if self._metrics is not None and len(self._transcript) > 1:
+                self._metrics.increment("gap_merges")
             self._event_bus.publish(self._asr_topic, Event.for_payload(asr_event))
             logger.info("Transcribed event %s to %s %s", event.id, asr_event.signal.text,
                         f"({self._transcript})" if len(self._transcript) > 1 else "")
@@ -143,9 +362,61 @@ class AsrService:
             self._transcript = []
             self._mentions_transcript = []
 
-        self._last_event = timestamp_now()
+    def _transcribe(self, event: Event[VadMentionEvent]) -> Optional[str]:
+        audio = self._load_audio(event)
+        if audio is None:
+            return None
+
+        with timed(self._metrics, "asr"):
+            return self._asr.speech_to_text(*audio)
+
+    def _transcribe_batch(self, events: List[Event[VadMentionEvent]]) -> List[Optional[str]]:
+        audios = [self._load_audio(event) for event in events]
+
+        transcripts = [None] * len(events)
+        for rate in {audio[1] for audio in audios if audio is not None}:
+            batch = [idx for idx, audio in enumerate(audios) if audio is not None and audio[1] == rate]
+            with timed(self._metrics, "asr"):
+                batch_transcripts = self._asr.speech_to_texts([audios[idx][0] for idx in batch], rate)
+            for idx, transcript in zip(batch, batch_transcripts):
+                transcripts[idx] = transcript
+
+        logger.debug("Transcribed batch of %s events", len(events))
+
+        return transcripts
+
+    def _prefetch_audio(self, event: Event[VadMentionEvent]):
+        with self._prefetch_lock:
+            if event.id == self._last_loaded:
+                # The topic worker processed the event before it was announced here
+                return
+
+            if sum(future is not None for future in self._prefetched.values()) >= self._prefetch:
+                logger.debug("Skip prefetching audio for event %s (%s events prefetched)", event.id, self._prefetch)
+                self._prefetched[event.id] = None
+                return
 
-    def _transcribe(self, event: Event[VadMentionEvent]):
+            self._prefetched[event.id] = self._prefetch_executor.submit(self._fetch_audio, event)
+
+    def _load_audio(self, event: Event[VadMentionEvent]) -> Optional[Tuple[np.ndarray, int]]:
+        if self._prefetch_executor is None:
+            return self._fetch_audio(event)
+
+        with self._prefetch_lock:
+            if event.id in self._prefetched:
+                # Events are processed in order, events that arrived earlier were dropped by the topic worker
+                while next(iter(self._prefetched)) != event.id:
+                    dropped = self._prefetched.popitem(last=False)[1]
+                    if dropped is not None:
+                        dropped.cancel()
+                prefetched = self._prefetched.pop(event.id)
+            else:
+                prefetched = None
+                self._last_loaded = event.id
+
+        return prefetched.result() if prefetched is not None else self._fetch_audio(event)
+
+    def _fetch_audio(self, event: Event[VadMentionEvent]) -> Optional[Tuple[np.ndarray, int]]:
         payload = event.payload
         # Ignore empty VAD events
         if not payload.mentions or not payload.mentions[0].segment:
@@ -160,11 +431,22 @@ class AsrService:
 
         url = f"{STORAGE_SCHEME}:{Modality.AUDIO.name.lower()}/{segment.container_id}"
 
-        with self._audio_loader(url, segment.start, segment.stop - segment.start) as source:
-            return self._asr.speech_to_text(np.concatenate(tuple(source.audio)), source.rate)
+        with timed(self._metrics, "audio_fetch"):
+            with self._audio_loader(url, segment.start, segment.stop - segment.start) as source:
+                audio = _read_audio(source.audio, segment.stop - segment.start), source.rate
+
+        if audio[0] is None:
+            logger.info("No audio available for event %s", event.id)
+            return None
+
+        if self._metrics is not None:
+            self._metrics.observe("audio", len(audio[0]) / audio[1])
+
+        return audio
 
     def _create_payload(self):
-        scenario_id = self._emissor_data.get_scenario_for_id(self._mentions_transcript[0].id)
+        with timed(self._metrics, "scenario_lookup"):
+            scenario_id = self._emissor_data.get_scenario_for_id(self._mentions_transcript[0].id)
         signal_id = str(uuid.uuid4())
         transcript = " ".join(self._strip(part) for part in self._transcript)
         segments = [segment for mention in self._mentions_transcript for segment in mention.segment]
@@ -178,4 +460,27 @@ class AsrService:
         text = text[len(ASR.GAP_INDICATOR):] if text.startswith(ASR.GAP_INDICATOR) else text
         text = text[:-len(ASR.GAP_INDICATOR)] if text.endswith(ASR.GAP_INDICATOR) else text
 
-        return text.strip()
\ No newline at end of file
+        return text.strip()
+
+
+def _read_audio(frames: Iterable[np.ndarray], length: int) -> Optional[np.ndarray]:
+    """
+    Read audio frames into a single array that is allocated for `length` samples up front.
+
+    The array is only reallocated if the frames contain more than `length` samples.
+    Returns None if there are no frames.
+    """
+    audio = None
+    filled = 0
+    for frame in frames:
+        if audio is None:
+            audio = np.empty((max(length, len(frame)),) + frame.shape[1:], dtype=frame.dtype)
+        elif filled + len(frame) > len(audio):
+            grown = np.empty((max(2 * len(audio), filled + len(frame)),) + audio.shape[1:], dtype=audio.dtype)
+            grown[:filled] = audio[:filled]
+            audio = grown
+
+        audio[filled:filled + len(frame)] = frame
+        filled += len(frame)
+
+    return audio[:filled] if audio is not None else None
@@ -0,0 +1,110 @@
+"""
+Manual benchmark: allocations per pushed second of audio in the pending audio buffer.
+
+Usage:
+    cd cltl-asr
+    source venv/bin/activate
+    python tests/manual/benchmark_pending_audio.py --seconds 60 --packet-ms 20
+
+Replays the pending audio handling of LocalParakeetRNNTStreamingASR without a
+model: int16 packets are pushed and a step of chunk + right context samples is
+taken whenever enough audio is available. Two implementations are compared:
+  - concat: the previous approach, converting every packet to a float32 tensor
+    and appending it with torch.cat
+  - ring:   the pre-allocated AudioRingBuffer used by the streaming engine
+
+Reported per pushed second of audio are the number of torch CPU allocations
+(counted with torch.profiler) and the peak of numpy/Python allocations (traced
+with tracemalloc). The numpy peak of the ring buffer is its one-off pre-allocation
+of 2 x (2 x step) float32 samples.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.profiler import ProfilerActivity, profile
+
+# Allow running from the repo root without installing the package.
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from cltl.asr.audio_buffer import AudioRingBuffer
+
+SAMPLE_RATE = 16_000
+
+
+def _run_concat(packets, step_samples):
+    pending = torch.empty(0, dtype=torch.float32)
+    for packet in packets:
+        audio = torch.from_numpy(packet.astype(np.float32) / 32768.0)
+        pending = torch.cat([pending, audio])
+        while pending.numel() >= step_samples:
+            step_audio = pending[:step_samples]
+            pending = pending[step_samples:]
+            step_audio.sum()
+
+
+def _run_ring(packets, step_samples):
+    pending = AudioRingBuffer(2 * step_samples)
+    for packet in packets:
+        pending.write(packet)
+        while len(pending) >= step_samples:
+            step_audio = torch.from_numpy(pending.consume(step_samples))
+            step_audio.sum()
+
+
+def _count_torch_allocations(run, packets, step_samples):
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        run(packets, step_samples)
+
+    return sum(1 for event in prof.events() if event.self_cpu_memory_usage > 0)
+
+
+def _trace_peak(run, packets, step_samples):
+    tracemalloc.start()
+    try:
+        run(packets, step_samples)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def _time(run, packets, step_samples):
+    start = time.perf_counter()
+    run(packets, step_samples)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark allocations of the pending audio buffer.")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of audio to push")
+    parser.add_argument("--packet-ms", type=float, default=20.0, help="Packet size in milliseconds")
+    parser.add_argument("--chunk-secs", type=float, default=0.5, help="Chunk size in seconds")
+    parser.add_argument("--right-context-secs", type=float, default=2.0, help="Right context in seconds")
+    args = parser.parse_args()
+
+    packet_samples = int(args.packet_ms * SAMPLE_RATE / 1000)
+    step_samples = int((args.chunk_secs + args.right_context_secs) * SAMPLE_RATE)
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-32768, 32767, int(args.seconds * SAMPLE_RATE), dtype=np.int16)
+    packets = [audio[i:i + packet_samples] for i in range(0, len(audio), packet_samples)]
+
+    print(f"{args.seconds:.0f}s of audio in {len(packets)} packets of {args.packet_ms:.0f}ms, "
+          f"step of {step_samples} samples")
+    print(f"{'buffer':<8} {'torch allocs/s':>15} {'numpy peak (KiB)':>17} {'time (ms)':>10}")
+    for name, run in (("concat", _run_concat), ("ring", _run_ring)):
+        allocations = _count_torch_allocations(run, packets, step_samples)
+        peak = _trace_peak(run, packets, step_samples)
+        duration = _time(run, packets, step_samples)
+        print(f"{name:<8} {allocations / args.seconds:>15.1f} {peak / 1024:>17.1f} {duration * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
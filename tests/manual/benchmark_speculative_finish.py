@@ -0,0 +1,106 @@
+"""
+Manual benchmark: cost of saving and restoring decoder state in speculative finalisation.
+
+Usage:
+    cd cltl-asr
+    source venv/bin/activate
+    python tests/manual/benchmark_speculative_finish.py --tokens 100 1000 10000
+
+Speculative finalisation decodes the right context of the last step and then
+restores the decoder to its previous state. The benchmark compares, for turns
+of increasing length (number of tokens in the hypotheses):
+  - deepcopy: the previous approach, deep-copying decoder state and hypotheses
+  - snapshot: LocalParakeetRNNTStreamingASR._snapshot_decoder/_restore_decoder,
+    cloning only the fixed-size state and truncating the hypotheses
+
+Each iteration saves the state, merges a chunk of speculative tokens into the
+hypotheses (as the decoder would) and restores. The decoder itself is not run,
+so the reported times are the overhead added to each speculative finish.
+"""
+
+import argparse
+import copy
+import sys
+import timeit
+from pathlib import Path
+
+import torch
+from nemo.collections.asr.parts.submodules.transducer_decoding.label_looping_base import BatchedLabelLoopingState
+from nemo.collections.asr.parts.utils.rnnt_utils import BatchedHyps
+
+# Allow running from the repo root without installing the package.
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from cltl.asr.parakeet_stream import LocalParakeetRNNTStreamingASR
+
+# Prediction network of parakeet-tdt-0.6b: 2 LSTM layers with 640 hidden units
+PRED_LAYERS = 2
+PRED_HIDDEN = 640
+CHUNK_TOKENS = 8
+BLANK_ID = 1024
+
+
+def _hyps(num_tokens: int) -> BatchedHyps:
+    hyps = BatchedHyps(batch_size=1, init_length=num_tokens + 1, device=torch.device("cpu"),
+                       float_dtype=torch.float32, with_durations=True, blank_id=BLANK_ID)
+    hyps.transcript[0, :num_tokens] = torch.randint(1, 1024, (num_tokens,))
+    hyps.timestamps[0, :num_tokens] = torch.arange(num_tokens)
+    hyps.current_lengths.fill_(num_tokens)
+
+    return hyps
+
+
+def _state() -> BatchedLabelLoopingState:
+    return BatchedLabelLoopingState(
+        predictor_states=(torch.zeros(PRED_LAYERS, 1, PRED_HIDDEN), torch.zeros(PRED_LAYERS, 1, PRED_HIDDEN)),
+        predictor_outputs=torch.zeros(1, 1, PRED_HIDDEN),
+        labels=torch.zeros(1, dtype=torch.long),
+        decoded_lengths=torch.zeros(1, dtype=torch.long),
+    )
+
+
+class _Stream:
+    """Carries the attributes used by the snapshot methods of LocalParakeetRNNTStreamingASR."""
+    _snapshot_decoder = LocalParakeetRNNTStreamingASR._snapshot_decoder
+    _restore_decoder = LocalParakeetRNNTStreamingASR._restore_decoder
+
+    def __init__(self, num_tokens: int):
+        self.state = _state()
+        self.current_batched_hyps = _hyps(num_tokens)
+        self.chunk_hyps = _hyps(CHUNK_TOKENS)
+
+
+def _deepcopy(stream: _Stream) -> None:
+    saved_state = copy.deepcopy(stream.state)
+    saved_hyps = copy.deepcopy(stream.current_batched_hyps)
+    stream.current_batched_hyps.merge_(stream.chunk_hyps)
+    stream.state = saved_state
+    stream.current_batched_hyps = saved_hyps
+
+
+def _snapshot(stream: _Stream) -> None:
+    snapshot = stream._snapshot_decoder()
+    stream.current_batched_hyps.merge_(stream.chunk_hyps)
+    stream._restore_decoder(snapshot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state save/restore in speculative finalisation.")
+    parser.add_argument("--tokens", type=int, nargs="+", default=[100, 1_000, 10_000],
+                        help="Number of tokens in the hypotheses")
+    parser.add_argument("--repeat", type=int, default=1_000, help="Iterations per measurement")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    print(f"{'tokens':>8} {'deepcopy (us)':>14} {'snapshot (us)':>14} {'speed-up':>9}")
+    for num_tokens in args.tokens:
+        timings = []
+        for run in (_deepcopy, _snapshot):
+            stream = _Stream(num_tokens)
+            seconds = min(timeit.repeat(lambda: run(stream), number=args.repeat, repeat=3))
+            timings.append(seconds / args.repeat * 1e6)
+        print(f"{num_tokens:>8} {timings[0]:>14.1f} {timings[1]:>14.1f} {timings[0] / timings[1]:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import unittest
+
+import numpy as np
+
+from cltl.asr.api import ASR
+
+
+class LengthASR(ASR):
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return f"{len(audio)}@{sampling_rate}"
+
+
+class TestASR(unittest.TestCase):
+    def test_speech_to_texts_defaults_to_sequential_transcription(self):
+        audios = [np.zeros((16, 1), dtype=np.int16), np.zeros((32, 1), dtype=np.int16)]
+
+        transcripts = LengthASR().speech_to_texts(audios, 16000)
+
+        self.assertEqual(["16@16000", "32@16000"], transcripts)
+
+    def test_speech_to_texts_accepts_iterables(self):
+        audios = (np.zeros((n, 1), dtype=np.int16) for n in (8, 4, 2))
+
+        self.assertEqual(["8@16000", "4@16000", "2@16000"], LengthASR().speech_to_texts(audios, 16000))
+
+    def test_speech_to_texts_empty_batch(self):
+        self.assertEqual([], LengthASR().speech_to_texts([], 16000))
@@ -0,0 +1,201 @@
+import io
+import json
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from app.asr import _read_frames, _to_json_lines, asr_app
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+from cltl.asr.cpu import available_cpus
+from cltl.asr.warm_start import ModelCache
+
+CONTENT_TYPE = "audio/L16; rate=16000; channels=1; frame_size=4"
+
+
+class LengthASR(ASR):
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return f"{len(audio)}@{sampling_rate}"
+
+
+class SumASR(BufferedASR):
+    """Reports the number of samples received so far after each push."""
+
+    def __init__(self):
+        self.samples = 0
+
+    def push_audio(self, audio, sampling_rate=None):
+        self.samples += sum(len(frame) for frame in audio)
+
+        return [StreamTranscription(str(self.samples), False, 0, self.samples)]
+
+    def finish(self):
+        return StreamTranscription(str(self.samples), True, 0, self.samples)
+
+
+class MultiStreamSumASR:
+    def __init__(self):
+        self.streams = {}
+        self.calls = []
+
+    def open_stream(self, stream_id):
+        self.streams[stream_id] = SumASR()
+
+    def close_stream(self, stream_id):
+        return self.streams.pop(stream_id).finish()
+
+    def push_audio(self, audio, sampling_rate=None):
+        self.calls.append(len(audio))
+
+        return {stream_id: self.streams[stream_id].push_audio(frames, sampling_rate)
+                for stream_id, frames in audio.items()}
+
+
+class ChunkedStream(io.BytesIO):
+    """Request body that is received in the given chunks."""
+
+    def __init__(self, chunks):
+        super().__init__(b''.join(chunks))
+        self.boundaries = np.cumsum([len(chunk) for chunk in chunks]).tolist()
+
+    def read(self, size=-1):
+        chunk_end = next((boundary for boundary in self.boundaries if boundary > self.tell()), self.tell())
+        available = chunk_end - self.tell()
+
+        return super().read(available if size < 0 else min(size, available))
+
+
+class TestReadFrames(unittest.TestCase):
+    def test_frames(self):
+        data = np.arange(8, dtype=np.int16).tobytes()
+
+        frames = list(_read_frames(ChunkedStream([data]), 8, 1))
+
+        self.assertEqual([[0, 1, 2, 3], [4, 5, 6, 7]], [frame[:, 0].tolist() for frame in frames])
+
+    def test_partial_frames(self):
+        data = np.arange(6, dtype=np.int16).tobytes()
+
+        frames = list(_read_frames(ChunkedStream([data[:4], data[4:]]), 8, 1))
+
+        self.assertEqual([[0, 1], [2, 3, 4, 5]], [frame[:, 0].tolist() for frame in frames])
+
+    def test_odd_byte_counts(self):
+        data = np.arange(4, dtype=np.int16).tobytes()
+
+        frames = list(_read_frames(ChunkedStream([data[:3], data[3:5], data[5:]]), 8, 1))
+
+        self.assertEqual([0, 1, 2, 3], np.concatenate(frames)[:, 0].tolist())
+
+    def test_samples_are_not_split_across_channels(self):
+        data = np.arange(6, dtype=np.int16).tobytes()
+
+        frames = list(_read_frames(ChunkedStream([data[:6], data[6:]]), 12, 2))
+
+        self.assertEqual([(1, 2), (2, 2)], [frame.shape for frame in frames])
+        self.assertEqual([[0, 1], [2, 3], [4, 5]], np.concatenate(frames).tolist())
+
+    def test_incomplete_trailing_sample_is_dropped(self):
+        data = np.arange(2, dtype=np.int16).tobytes() + b'\x01'
+
+        frames = list(_read_frames(ChunkedStream([data]), 8, 1))
+
+        self.assertEqual([[0, 1]], [frame[:, 0].tolist() for frame in frames])
+
+
+class TestToJsonLines(unittest.TestCase):
+    def test_json_lines(self):
+        lines = list(_to_json_lines([StreamTranscription("hi", False, 0, 10), StreamTranscription("hi", True, 0, 16)]))
+
+        self.assertTrue(all(line.endswith('\n') for line in lines))
+        self.assertEqual([{"text": "hi", "is_final": False, "start": 0, "end": 10, "speaker": None},
+                          {"text": "hi", "is_final": True, "start": 0, "end": 16, "speaker": None}],
+                         [json.loads(line) for line in lines])
+
+    def test_empty(self):
+        self.assertEqual([], list(_to_json_lines([])))
+
+
+class TestStreamEndpoint(unittest.TestCase):
+    def app(self, stream_asr):
+        with patch("app.asr.create_backend", return_value=LengthASR()), patch("app.asr.configure_process"):
+            return asr_app("model", stream_asr=stream_asr)
+
+    def stream(self, client, chunks):
+        # Like WSGI servers that decode the chunked request body
+        response = client.post("/stream", input_stream=ChunkedStream(chunks),
+                               headers={"Content-Type": CONTENT_TYPE, "Transfer-Encoding": "chunked"},
+                               environ_overrides={"wsgi.input_terminated": True})
+
+        return response.status_code, [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    def test_stream(self):
+        data = np.arange(10, dtype=np.int16).tobytes()
+
+        status, transcripts = self.stream(self.app(SumASR).test_client(), [data[:5], data[5:12], data[12:]])
+
+        self.assertEqual(200, status)
+        self.assertEqual(["2", "6", "10", "10"], [transcript["text"] for transcript in transcripts])
+        self.assertEqual([False] * 3 + [True], [transcript["is_final"] for transcript in transcripts])
+
+    def test_stream_factory_is_serialized(self):
+        with self.assertLogs("app.asr", "WARNING"):
+            self.app(SumASR)
+
+    def test_stream_without_stream_asr(self):
+        response = self.app(None).test_client().post("/stream", data=b'', headers={"Content-Type": CONTENT_TYPE})
+
+        self.assertEqual(404, response.status_code)
+
+    def test_multi_stream_sessions(self):
+        asr = MultiStreamSumASR()
+        app = self.app(asr)
+        data = np.arange(8, dtype=np.int16).tobytes()
+
+        results = [None, None]
+
+        def session(index):
+            results[index] = self.stream(app.test_client(), [data])
+
+        threads = [threading.Thread(target=session, args=(index,)) for index in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        for status, transcripts in results:
+            self.assertEqual(200, status)
+            self.assertEqual(["4", "8", "8"], [transcript["text"] for transcript in transcripts])
+            self.assertTrue(transcripts[-1]["is_final"])
+        self.assertEqual({}, asr.streams)
+
+    def test_single_replica_threads(self):
+        with patch("app.asr.create_backend", return_value=LengthASR()), \
+                patch("app.asr.configure_process") as configure_process:
+            asr_app("model", threads=2)
+            asr_app("model", pin_cpus=True)
+            asr_app("model")
+
+        self.assertEqual(2, configure_process.call_count)
+        self.assertEqual(2, configure_process.call_args_list[0].kwargs["threads"])
+        self.assertIsNone(configure_process.call_args_list[0].kwargs["cpus"])
+        self.assertEqual(available_cpus(), configure_process.call_args_list[1].kwargs["cpus"])
+
+    def test_model_cache(self):
+        model_cache = ModelCache("cache")
+        with patch("app.asr.create_backend", return_value=LengthASR()) as create_backend:
+            asr_app("model", model_cache=model_cache)
+
+        self.assertIs(model_cache, create_backend.call_args.kwargs["model_cache"])
+
+    def test_transcribe(self):
+        response = self.app(None).test_client().post("/transcribe", data=np.zeros(8, dtype=np.int16).tobytes(),
+                                                     headers={"Content-Type": CONTENT_TYPE})
+
+        self.assertEqual({"transcript": "8@16000"}, response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,17 +1,21 @@
 import threading
 import unittest
+from configparser import ConfigParser
 from queue import Queue, Empty
-from typing import Iterable
+from typing import Iterable, List
+from unittest.mock import MagicMock
 
 import numpy as np
 from cltl.backend.spi.audio import AudioSource
+from cltl.combot.infra.config.local import LocalConfigurationManager
 from cltl.combot.infra.event import Event
 from cltl.combot.infra.event.memory import SynchronousEventBus
 from cltl_service.vad.schema import VadAnnotation, VadMentionEvent
 from emissor.representation.container import Index
 
 from cltl.asr.api import ASR
-from cltl_service.asr.service import AsrService
+from cltl.asr.metrics import HistogramSink, PrometheusSink
+from cltl_service.asr.service import AsrService, _read_audio, asr_from_config
 
 
 def wait(lock: threading.Event):
@@ -58,6 +62,38 @@ class DummyASR(ASR):
         return "test transcript" if len(audio) == 4 * 16 and np.array_equal(audio[:16], frame) else None
 
 
+class BatchASR(ASR):
+    def __init__(self):
+        self.batches = []
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        raise unittest.TestCase.failureException("Expected batched transcription")
+
+    def speech_to_texts(self, audios: Iterable[np.ndarray], sampling_rate: int) -> List[str]:
+        audios = list(audios)
+        self.batches.append(len(audios))
+
+        return [f"transcript {len(audio)}" for audio in audios]
+
+
+class LengthASR(ASR):
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return f"transcript {len(audio)}"
+
+
+def sized_source(url, offset, length):
+    class SizedSource(AudioSource):
+        @property
+        def audio(self) -> Iterable[np.array]:
+            return [np.zeros((length, 1), dtype=np.int16)]
+
+        @property
+        def rate(self):
+            return 16000
+
+    return SizedSource()
+
+
 class TestASR(unittest.TestCase):
     def setUp(self) -> None:
         self.event_bus = SynchronousEventBus()
@@ -95,3 +131,343 @@ class TestASR(unittest.TestCase):
         self.assertEqual("test transcript", event.payload.text)
         self.assertEqual("signal_id", event.payload.audio_segment[0].container_id)
 
+
+class TestBatchedASRService(unittest.TestCase):
+    def setUp(self) -> None:
+        self.event_bus = SynchronousEventBus()
+        self.events = []
+        self.event_bus.subscribe("asr_topic", self.events.append)
+
+        emissor_data = MagicMock()
+        emissor_data.get_scenario_for_id.return_value = "scenario_id"
+
+        self.asr = BatchASR()
+        self.asr_service = AsrService("vad_topic", "asr_topic", self.asr, 0, 0, emissor_data, sized_source,
+                                      self.event_bus, None, batch_size=3, batch_wait=10)
+
+    def vad_event(self, length):
+        segment = Index.from_range("signal_id", 0, length)
+        annotation = VadAnnotation.for_activation(1.0, "test_source")
+
+        return Event.for_payload(VadMentionEvent.create(segment, annotation))
+
+    def test_full_batch_is_transcribed_in_order(self):
+        self.asr_service._process(self.vad_event(10))
+        self.asr_service._process(self.vad_event(20))
+        self.assertEqual([], self.asr.batches)
+        self.assertEqual([], self.events)
+
+        self.asr_service._process(self.vad_event(30))
+
+        self.assertEqual([3], self.asr.batches)
+        self.assertEqual(["transcript 10", "transcript 20", "transcript 30"],
+                         [event.payload.signal.text for event in self.events])
+
+    def test_scheduled_invocation_flushes_incomplete_batch(self):
+        self.asr_service._process(self.vad_event(10))
+        self.asr_service._process(None)
+
+        self.assertEqual([1], self.asr.batches)
+        self.assertEqual(["transcript 10"], [event.payload.signal.text for event in self.events])
+
+    def test_polled_invocation_waits_for_batch_wait(self):
+        self.asr_service._gap_timeout = 0.5
+
+        self.asr_service._process(self.vad_event(10))
+        self.asr_service._process(None)
+
+        self.assertEqual([], self.asr.batches)
+
+        self.asr_service._pending_since -= 10 * 1000
+        self.asr_service._process(None)
+
+        self.assertEqual([1], self.asr.batches)
+        self.assertEqual(["transcript 10"], [event.payload.signal.text for event in self.events])
+
+    def test_scheduled_invocation_without_pending_events(self):
+        self.asr_service._process(None)
+
+        self.assertEqual([], self.asr.batches)
+        self.assertEqual([], self.events)
+
+
+class GapASR(ASR):
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return "first" + ASR.GAP_INDICATOR if len(audio) == 10 else "second"
+
+
+class TestASRServiceMetrics(unittest.TestCase):
+    def setUp(self) -> None:
+        self.event_bus = SynchronousEventBus()
+        self.events = []
+        self.event_bus.subscribe("asr_topic", self.events.append)
+
+        self.emissor_data = MagicMock()
+        self.emissor_data.get_scenario_for_id.return_value = "scenario_id"
+
+        self.metrics = HistogramSink()
+
+    def vad_event(self, length):
+        segment = Index.from_range("signal_id", 0, length)
+        annotation = VadAnnotation.for_activation(1.0, "test_source")
+
+        return Event.for_payload(VadMentionEvent.create(segment, annotation))
+
+    def test_event_timings(self):
+        asr_service = AsrService("vad_topic", "asr_topic", BatchASR(), 0, 0, self.emissor_data, sized_source,
+                                 self.event_bus, None, batch_size=2, batch_wait=10, metrics=self.metrics)
+
+        asr_service._process(self.vad_event(16000))
+        asr_service._process(self.vad_event(8000))
+
+        histograms = self.metrics.histograms()
+        self.assertEqual(2, histograms["audio_fetch"].count)
+        self.assertEqual(1, histograms["asr"].count)
+        self.assertEqual(2, histograms["scenario_lookup"].count)
+        self.assertEqual(2, histograms["create_payload"].count)
+        self.assertAlmostEqual(1.5, histograms["audio"].sum)
+
+    def test_gap_merges_are_counted(self):
+        asr_service = AsrService("vad_topic", "asr_topic", GapASR(), 0.1, 1, self.emissor_data, sized_source,
+                                 self.event_bus, None, metrics=self.metrics)
+
+        asr_service._process(self.vad_event(10))
+        asr_service._process(self.vad_event(20))
+
+        self.assertEqual(["first second"], [event.payload.signal.text for event in self.events])
+        self.assertEqual({"gap_continuations": 1, "gap_merges": 1}, self.metrics.counters())
+
+    def test_dropped_events_are_counted(self):
+        asr_service = AsrService("vad_topic", "asr_topic", LengthASR(), 0, 0, self.emissor_data, sized_source,
+                                 self.event_bus, None, metrics=self.metrics)
+        asr_service._queue_size = 1
+        events = [self.vad_event(16000) for _ in range(4)]
+
+        for event in events:
+            asr_service._count_received(event)
+        asr_service._process(events[0])
+
+        self.assertEqual({"events_received": 4}, self.metrics.counters())
+        self.assertEqual({"queue_depth": 1}, self.metrics.gauges())
+
+        asr_service._process(events[3])
+
+        self.assertEqual({"events_received": 4, "events_dropped": 2}, self.metrics.counters())
+        self.assertEqual({"queue_depth": 0}, self.metrics.gauges())
+
+    def test_arrivals_are_bounded(self):
+        asr_service = AsrService("vad_topic", "asr_topic", LengthASR(), 0, 0, self.emissor_data, sized_source,
+                                 self.event_bus, None, metrics=self.metrics)
+        asr_service._queue_size = 2
+        events = [self.vad_event(16000) for _ in range(100)]
+
+        for event in events:
+            asr_service._count_received(event)
+
+        self.assertEqual(3, len(asr_service._arrived))
+
+        asr_service._process(events[0])
+        asr_service._process(events[99])
+
+        self.assertEqual({"events_received": 100, "events_dropped": 98}, self.metrics.counters())
+        self.assertEqual({"queue_depth": 0}, self.metrics.gauges())
+        self.assertEqual(0, len(asr_service._arrived))
+
+    def test_events_processed_before_counted(self):
+        asr_service = AsrService("vad_topic", "asr_topic", LengthASR(), 0, 0, self.emissor_data, sized_source,
+                                 self.event_bus, None, metrics=self.metrics)
+        asr_service._queue_size = 1
+        events = [self.vad_event(16000) for _ in range(3)]
+
+        asr_service._count_received(events[0])
+        asr_service._count_received(events[1])
+        asr_service._process(events[2])
+        asr_service._count_received(events[2])
+
+        self.assertEqual({"events_received": 3, "events_dropped": 2}, self.metrics.counters())
+        self.assertEqual(0, len(asr_service._arrived))
+        self.assertEqual(0, len(asr_service._processed_early))
+
+    def test_metrics_endpoint(self):
+        metrics = PrometheusSink()
+        asr_service = AsrService("vad_topic", "asr_topic", BatchASR(), 0, 0, self.emissor_data, sized_source,
+                                 self.event_bus, None, metrics=metrics)
+        metrics.increment("events_received")
+
+        response = asr_service.app.test_client().get("/metrics")
+
+        self.assertEqual(200, response.status_code)
+        self.assertIn("cltl_asr_events_received_total 1", response.get_data(as_text=True))
+
+    def test_no_app_without_prometheus_sink(self):
+        asr_service = AsrService("vad_topic", "asr_topic", BatchASR(), 0, 0, self.emissor_data, sized_source,
+                                 self.event_bus, None, metrics=self.metrics)
+
+        self.assertIsNone(asr_service.app)
+
+
+class TestReadAudio(unittest.TestCase):
+    def frames(self, sizes):
+        offsets = np.cumsum([0] + sizes)
+        return [np.arange(start, end, dtype=np.int16).reshape(-1, 1) for start, end in zip(offsets, offsets[1:])]
+
+    def test_read_presized(self):
+        audio = _read_audio(self.frames([16, 16, 8]), 40)
+
+        self.assertEqual((40, 1), audio.shape)
+        self.assertEqual(np.int16, audio.dtype)
+        np.testing.assert_array_equal(np.arange(40).reshape(-1, 1), audio)
+
+    def test_read_less_than_length(self):
+        audio = _read_audio(self.frames([16, 8]), 40)
+
+        np.testing.assert_array_equal(np.arange(24).reshape(-1, 1), audio)
+
+    def test_read_more_than_length(self):
+        audio = _read_audio(self.frames([16, 16, 16, 16]), 10)
+
+        np.testing.assert_array_equal(np.arange(64).reshape(-1, 1), audio)
+
+    def test_read_without_frames(self):
+        self.assertIsNone(_read_audio([], 10))
+
+
+class TestPrefetchASRService(unittest.TestCase):
+    def setUp(self) -> None:
+        self.event_bus = SynchronousEventBus()
+        self.events = []
+        self.event_bus.subscribe("asr_topic", self.events.append)
+
+        self.emissor_data = MagicMock()
+        self.emissor_data.get_scenario_for_id.return_value = "scenario_id"
+
+        self.loaded = []
+        self.asr_service = None
+
+    def tearDown(self) -> None:
+        if self.asr_service:
+            self.asr_service._prefetch_executor.shutdown()
+
+    def audio_loader(self, url, offset, length):
+        self.loaded.append((length, threading.current_thread().name))
+
+        return sized_source(url, offset, length)
+
+    def vad_event(self, length):
+        segment = Index.from_range("signal_id", 0, length)
+        annotation = VadAnnotation.for_activation(1.0, "test_source")
+
+        return Event.for_payload(VadMentionEvent.create(segment, annotation))
+
+    def service(self, prefetch):
+        self.asr_service = AsrService("vad_topic", "asr_topic", LengthASR(), 0, 2, self.emissor_data,
+                                      self.audio_loader, self.event_bus, None, prefetch=prefetch)
+
+        return self.asr_service
+
+    def test_prefetched_events_are_processed_in_order(self):
+        asr_service = self.service(prefetch=2)
+        events = [self.vad_event(10), self.vad_event(20)]
+
+        for event in events:
+            asr_service._prefetch_audio(event)
+        for event in events:
+            asr_service._process(event)
+
+        self.assertEqual(["transcript 10", "transcript 20"], [event.payload.signal.text for event in self.events])
+        self.assertEqual([10, 20], [length for length, _ in self.loaded])
+        self.assertTrue(all(thread.startswith("asr-prefetch") for _, thread in self.loaded))
+
+    def test_prefetch_is_bounded(self):
+        asr_service = self.service(prefetch=1)
+        events = [self.vad_event(10), self.vad_event(20)]
+
+        for event in events:
+            asr_service._prefetch_audio(event)
+        for event in events:
+            asr_service._process(event)
+
+        self.assertEqual(["transcript 10", "transcript 20"], [event.payload.signal.text for event in self.events])
+        self.assertTrue(self.loaded[0][1].startswith("asr-prefetch"))
+        self.assertEqual(threading.current_thread().name, self.loaded[1][1])
+
+    def test_prefetched_audio_of_dropped_events_is_discarded(self):
+        asr_service = self.service(prefetch=2)
+        dropped, event = self.vad_event(10), self.vad_event(20)
+
+        asr_service._prefetch_audio(dropped)
+        asr_service._prefetch_audio(event)
+        asr_service._process(event)
+
+        self.assertEqual(["transcript 20"], [event.payload.signal.text for event in self.events])
+        self.assertEqual({}, asr_service._prefetched)
+
+    def test_prefetch_continues_after_dropped_events(self):
+        asr_service = self.service(prefetch=1)
+        dropped, event, later = self.vad_event(10), self.vad_event(20), self.vad_event(30)
+
+        asr_service._prefetch_audio(dropped)
+        asr_service._prefetch_audio(event)
+        asr_service._process(event)
+        asr_service._prefetch_audio(later)
+        asr_service._process(later)
+
+        self.assertEqual(["transcript 20", "transcript 30"], [event.payload.signal.text for event in self.events])
+        self.assertEqual(threading.current_thread().name, self.loaded[-2][1])
+        self.assertEqual(30, self.loaded[-1][0])
+        self.assertTrue(self.loaded[-1][1].startswith("asr-prefetch"))
+        self.assertEqual({}, asr_service._prefetched)
+
+    def test_event_processed_before_prefetch_is_not_prefetched(self):
+        asr_service = self.service(prefetch=1)
+        event = self.vad_event(10)
+
+        asr_service._process(event)
+        asr_service._prefetch_audio(event)
+
+        self.assertEqual(["transcript 10"], [event.payload.signal.text for event in self.events])
+        self.assertEqual({}, asr_service._prefetched)
+
+
+class ModelASR(ASR):
+    def __init__(self, model_id: str, sampling_rate: int, chunk_secs: float = 1.0):
+        self.model_id = model_id
+        self.sampling_rate = sampling_rate
+        self.chunk_secs = chunk_secs
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return self.model_id
+
+
+class TestAsrFromConfig(unittest.TestCase):
+    def setUp(self) -> None:
+        parser = ConfigParser()
+        parser.read_string("""
+            [cltl.asr]
+            implementation: tests.test_asr_service:ModelASR
+            model: large
+            sample_rate: 16000
+            vad_topic: vad
+            asr_topic: asr
+            batch_wait: 10
+
+            [cltl.asr.partial]
+            model: tiny
+            chunk_secs: 0.2
+            """)
+        self.config_manager = LocalConfigurationManager(parser)
+
+    def test_default_instance(self):
+        asr = asr_from_config(self.config_manager)
+
+        self.assertIsInstance(asr, ModelASR)
+        self.assertEqual("large", asr.model_id)
+        self.assertEqual(16000, asr.sampling_rate)
+        self.assertEqual(1.0, asr.chunk_secs)
+
+    def test_named_instance(self):
+        asr = asr_from_config(self.config_manager, "partial")
+
+        self.assertEqual("tiny", asr.model_id)
+        self.assertEqual(16000, asr.sampling_rate)
+        self.assertEqual(0.2, asr.chunk_secs)
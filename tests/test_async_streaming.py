@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+import unittest
+from typing import Iterable, List
+
+import numpy as np
+
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+from cltl.asr.async_streaming import AsyncBufferedASR
+
+
+class CountingASR(BufferedASR):
+    """Emits a partial transcript with the number of samples for every call to push_audio."""
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.calls = []
+        self.threads = set()
+        self.samples = 0
+
+    def push_audio(self, audio_frames: Iterable[np.ndarray], sampling_rate: int = None) -> List[StreamTranscription]:
+        self.threads.add(threading.current_thread().name)
+        frames = list(audio_frames)
+        self.calls.append(len(frames))
+        time.sleep(self.delay)
+        self.samples += sum(len(frame) for frame in frames)
+
+        return [StreamTranscription(str(self.samples), False, 0, self.samples)]
+
+    def finish(self) -> StreamTranscription:
+        return StreamTranscription("final", True, 0, self.samples)
+
+
+async def frames(count: int, delay: float = 0):
+    for _ in range(count):
+        await asyncio.sleep(delay)
+        yield np.zeros(160, dtype=np.int16)
+
+
+class TestAsyncBufferedASR(unittest.IsolatedAsyncioTestCase):
+    async def test_transcribe_yields_partials_and_final(self):
+        asr = CountingASR()
+        async with AsyncBufferedASR(asr) as async_asr:
+            transcripts = [transcript async for transcript in async_asr.transcribe(frames(3, 0.01), 16000)]
+
+        self.assertEqual(["160", "320", "480", "final"], [transcript.text for transcript in transcripts])
+        self.assertTrue(transcripts[-1].is_final)
+
+    async def test_model_runs_on_executor(self):
+        asr = CountingASR()
+        async with AsyncBufferedASR(asr) as async_asr:
+            await async_asr.push_audio([np.zeros(160)], 16000)
+
+        self.assertNotIn(threading.current_thread().name, asr.threads)
+        self.assertEqual(1, len(asr.threads))
+
+    async def test_frames_are_read_while_model_runs(self):
+        asr = CountingASR(delay=0.1)
+        async with AsyncBufferedASR(asr) as async_asr:
+            transcripts = [transcript async for transcript in async_asr.transcribe(frames(10, 0.01), 16000)]
+
+        self.assertEqual(10, sum(asr.calls))
+        self.assertLess(len(asr.calls), 10)
+        self.assertEqual("1600", transcripts[-2].text)
+
+    async def test_event_loop_is_not_blocked(self):
+        asr = CountingASR(delay=0.2)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        async with AsyncBufferedASR(asr) as async_asr:
+            await async_asr.push_audio([np.zeros(160)], 16000)
+        ticker.cancel()
+
+        self.assertGreater(ticks, 5)
+
+    async def test_close_does_not_block_event_loop(self):
+        asr = CountingASR(delay=0.2)
+        async_asr = AsyncBufferedASR(asr)
+        push = asyncio.ensure_future(async_asr.push_audio([np.zeros(160)], 16000))
+        await asyncio.sleep(0.01)
+
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await async_asr.close()
+        ticker.cancel()
+
+        self.assertTrue(push.done())
+        self.assertGreater(ticks, 5)
+
+    async def test_errors_in_input_stream_are_raised(self):
+        async def failing_frames():
+            yield np.zeros(160)
+            raise ValueError("broken input")
+
+        async with AsyncBufferedASR(CountingASR()) as async_asr:
+            with self.assertRaises(ValueError):
+                async for _ in async_asr.transcribe(failing_frames(), 16000):
+                    pass
+
+    async def test_finish_without_support(self):
+        class PlainASR(BufferedASR):
+            def push_audio(self, audio_frames, sampling_rate=None):
+                return []
+
+        async with AsyncBufferedASR(PlainASR()) as async_asr:
+            transcripts = [transcript async for transcript in async_asr.transcribe(frames(2), 16000)]
+
+        self.assertEqual([], transcripts)
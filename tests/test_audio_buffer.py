@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+
+from cltl.asr.audio_buffer import AudioRingBuffer
+
+
+class TestAudioRingBuffer(unittest.TestCase):
+    def test_write_and_consume(self):
+        buffer = AudioRingBuffer(8)
+        buffer.write(np.arange(5, dtype=np.float32))
+
+        self.assertEqual(5, len(buffer))
+        np.testing.assert_array_equal([0, 1, 2], buffer.consume(3))
+        self.assertEqual(2, len(buffer))
+        np.testing.assert_array_equal([3, 4], buffer.peek())
+
+    def test_wraparound_is_contiguous(self):
+        buffer = AudioRingBuffer(8)
+        buffer.write(np.arange(6, dtype=np.float32))
+        buffer.consume(5)
+        buffer.write(np.arange(6, 12, dtype=np.float32))
+
+        samples = buffer.peek()
+
+        np.testing.assert_array_equal(np.arange(5, 12), samples)
+        self.assertTrue(samples.flags["C_CONTIGUOUS"])
+        self.assertIs(samples.base, buffer._samples)
+
+    def test_peek_does_not_consume(self):
+        buffer = AudioRingBuffer(4)
+        buffer.write(np.ones(3, dtype=np.float32))
+
+        buffer.peek(2)
+
+        self.assertEqual(3, len(buffer))
+
+    def test_peek_more_than_available(self):
+        buffer = AudioRingBuffer(4)
+        buffer.write(np.ones(3, dtype=np.float32))
+
+        with self.assertRaises(ValueError):
+            buffer.peek(4)
+
+    def test_grow_keeps_samples(self):
+        buffer = AudioRingBuffer(4)
+        buffer.write(np.arange(3, dtype=np.float32))
+        buffer.consume(2)
+        buffer.write(np.arange(3, 10, dtype=np.float32))
+
+        self.assertEqual(8, buffer.capacity)
+        np.testing.assert_array_equal(np.arange(2, 10), buffer.peek())
+
+    def test_clear(self):
+        buffer = AudioRingBuffer(4)
+        buffer.write(np.ones(3, dtype=np.float32))
+
+        buffer.clear()
+
+        self.assertEqual(0, len(buffer))
+        self.assertEqual(0, buffer.peek().shape[0])
+
+    def test_int16_is_normalised(self):
+        buffer = AudioRingBuffer(4)
+        buffer.write(np.array([16384, -32768], dtype=np.int16))
+
+        np.testing.assert_allclose([0.5, -1.0], buffer.peek())
+
+    def test_stereo_is_downmixed(self):
+        buffer = AudioRingBuffer(4)
+        buffer.write(np.array([[16384, 0], [8192, 8192]], dtype=np.int16))
+
+        np.testing.assert_allclose([0.25, 0.25], buffer.peek())
+
+    def test_reject_more_than_two_dimensions(self):
+        buffer = AudioRingBuffer(4)
+
+        with self.assertRaises(ValueError):
+            buffer.write(np.zeros((2, 1, 1), dtype=np.float32))
@@ -0,0 +1,149 @@
+import unittest
+from typing import List
+from unittest.mock import patch
+
+import numpy as np
+
+from cltl.asr import backends
+from cltl.asr.api import ASR
+from cltl.asr.cache import CachedASR
+from cltl.asr.metrics import HistogramSink
+
+
+class EchoASR(ASR):
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+
+    def speech_to_text(self, audio, sampling_rate: int) -> str:
+        return f"{self.prefix}{len(audio)}"
+
+
+class ConfiguredASR(ASR):
+    def __init__(self, model_id: str, sampling_rate: int, device: str = "cpu", beam: float = 1.0,
+                 enabled: bool = False, hints: List[str] = (), metrics=None):
+        self.model_id = model_id
+        self.sampling_rate = sampling_rate
+        self.device = device
+        self.beam = beam
+        self.enabled = enabled
+        self.hints = hints
+        self.metrics = metrics
+        self.calls = 0
+
+    def speech_to_text(self, audio, sampling_rate: int) -> str:
+        self.calls += 1
+        return self.model_id
+
+
+class TestBackends(unittest.TestCase):
+    def tearDown(self):
+        backends._BACKENDS.pop("echo", None)
+
+    def test_registered_backends(self):
+        registered = backends.backends()
+
+        self.assertEqual("cltl.asr.wav2vec_asr:Wav2Vec2ASR", registered["wav2vec2"])
+        self.assertEqual("cltl.asr.parakeet_stream:LocalParakeetRNNTStreamingASR", registered["parakeet_stream"])
+        for path in registered.values():
+            self.assertIn(":", path)
+
+    def test_register_and_create_backend(self):
+        backends.register_backend("echo", "tests.test_backends:EchoASR")
+
+        asr = backends.create_backend("echo", prefix="len=")
+
+        self.assertIsInstance(asr, EchoASR)
+        self.assertEqual("len=3", asr.speech_to_text([0, 0, 0], 16000))
+
+    def test_create_backend_from_path(self):
+        asr = backends.create_backend("tests.test_backends:EchoASR")
+
+        self.assertIsInstance(asr, EchoASR)
+
+    def test_backend_class(self):
+        from cltl.asr.whisper_cpp_asr import WhisperCppASR
+
+        self.assertIs(WhisperCppASR, backends.backend_class("whisper_cpp"))
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            backends.backend_class("unknown")
+        with self.assertRaises(ValueError):
+            backends.register_backend("echo", "tests.test_backends")
+        self.assertNotIn("echo", backends.backends())
+
+
+class TestBackendSettings(unittest.TestCase):
+    SETTINGS = {
+        "implementation": "tests.test_backends:ConfiguredASR",
+        "model": "tiny",
+        "sample_rate": "16000",
+        "device": "cuda:1",
+        "beam": "2.5",
+        "enabled": "true",
+        "hints": "yes, no",
+        "unknown": "ignored",
+    }
+
+    def test_settings_are_converted(self):
+        asr = backends.create_backend_from_settings(self.SETTINGS)
+
+        self.assertIsInstance(asr, ConfiguredASR)
+        self.assertEqual("tiny", asr.model_id)
+        self.assertEqual(16000, asr.sampling_rate)
+        self.assertEqual("cuda:1", asr.device)
+        self.assertEqual(2.5, asr.beam)
+        self.assertTrue(asr.enabled)
+        self.assertEqual(["yes", "no"], asr.hints)
+
+    def test_keyword_arguments_take_precedence(self):
+        metrics = HistogramSink()
+
+        asr = backends.create_backend_from_settings(self.SETTINGS, device="cpu", metrics=metrics, other=1)
+
+        self.assertEqual("cpu", asr.device)
+        self.assertIs(metrics, asr.metrics)
+
+    def test_transcript_cache(self):
+        metrics = HistogramSink()
+
+        asr = backends.create_backend_from_settings(dict(self.SETTINGS, transcript_cache="8"), metrics=metrics)
+        audio = np.zeros((16,), dtype=np.int16)
+        asr.speech_to_text(audio, 16000)
+        asr.speech_to_text(audio, 16000)
+
+        self.assertIsInstance(asr, CachedASR)
+        self.assertEqual(1, asr.asr.calls)
+        self.assertEqual({"cache_hits": 1, "cache_misses": 1}, metrics.counters())
+
+    def test_threads_of_backend_without_threads_are_set_for_the_process(self):
+        with patch.object(backends, "configure_process") as configure_process:
+            backends.create_backend_from_settings(dict(self.SETTINGS, threads="2"))
+
+        configure_process.assert_called_once_with(threads=2, interop_threads=None, cpus=None, numa_node=None)
+
+    def test_threads_are_not_set_by_default(self):
+        with patch.object(backends, "configure_process") as configure_process:
+            backends.create_backend_from_settings(self.SETTINGS)
+
+        configure_process.assert_not_called()
+
+    def test_warm_up(self):
+        asr = backends.create_backend_from_settings(dict(self.SETTINGS, warm_up="0.5"))
+
+        self.assertEqual(1, asr.calls)
+
+    def test_no_warm_up_by_default(self):
+        asr = backends.create_backend_from_settings(dict(self.SETTINGS, warm_up=""))
+
+        self.assertEqual(0, asr.calls)
+
+    def test_transcript_cache_is_not_warmed_up(self):
+        asr = backends.create_backend_from_settings(dict(self.SETTINGS, transcript_cache="8", warm_up="1"))
+
+        self.assertEqual(1, asr.asr.calls)
+        self.assertEqual(0, len(asr._entries))
+
+    def test_missing_implementation(self):
+        with self.assertRaises(ValueError):
+            backends.create_backend_from_settings({"model": "tiny"})
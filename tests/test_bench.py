@@ -0,0 +1,136 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import requests
+import soundfile as sf
+
+from cltl.asr import bench
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+
+
+class EchoASR(ASR):
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return "hello world"
+
+
+class PrecisionASR(ASR):
+    def __init__(self, precision: str = "float32"):
+        self.precision = precision
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return "hello world" if self.precision == "float32" else "hello word"
+
+
+class ChunkASR(BufferedASR):
+    def __init__(self):
+        self.chunks = 0
+
+    def new_stream(self):
+        return ChunkASR()
+
+    def push_audio(self, audio_frames, sampling_rate=None):
+        self.chunks += len(list(audio_frames))
+        return [StreamTranscription("hello", False, 0)] if self.chunks == 2 else []
+
+    def finish(self):
+        return StreamTranscription("Hello, world!", True, 0)
+
+
+class TestBench(unittest.TestCase):
+    def setUp(self):
+        self.corpus_dir = tempfile.TemporaryDirectory()
+        corpus = Path(self.corpus_dir.name)
+        sf.write(corpus / "a.wav", np.zeros(16000, dtype=np.int16), 16000)
+        sf.write(corpus / "b.wav", np.zeros(8000, dtype=np.int16), 16000)
+        (corpus / "a.txt").write_text("Hello world")
+
+    def tearDown(self):
+        self.corpus_dir.cleanup()
+
+    def test_load_corpus(self):
+        corpus = bench.load_corpus(self.corpus_dir.name)
+
+        self.assertEqual(["a", "b"], [utterance.name for utterance in corpus])
+        self.assertEqual((16000, 1), corpus[0].audio.shape)
+        self.assertEqual(np.int16, corpus[0].audio.dtype)
+        self.assertEqual("Hello world", corpus[0].reference)
+        self.assertIsNone(corpus[1].reference)
+        self.assertEqual(0.5, corpus[1].duration)
+
+    def test_batch_benchmark(self):
+        report = bench.benchmark(EchoASR(), bench.load_corpus(self.corpus_dir.name))
+
+        summary = report["summary"]
+        self.assertEqual("batch", report["mode"])
+        self.assertEqual(2, summary["utterances"])
+        self.assertEqual(1.5, summary["audio_secs"])
+        self.assertGreater(summary["rtf"], 0)
+        self.assertEqual(["p50", "p95", "p99"], list(summary["latency"]))
+        self.assertIsNone(summary["chunk_latency"])
+        self.assertEqual(0.0, summary["wer"])
+        self.assertGreater(summary["peak_rss_mb"], 0)
+        json.dumps(report)
+
+    def test_streaming_benchmark(self):
+        report = bench.benchmark(ChunkASR(), bench.load_corpus(self.corpus_dir.name), chunk_secs=0.25)
+
+        summary = report["summary"]
+        self.assertEqual("streaming", report["mode"])
+        self.assertEqual([4, 2], [len(result["chunk_latencies"]) for result in report["utterances"]])
+        self.assertEqual("Hello, world!", report["utterances"][0]["transcript"])
+        self.assertIsNotNone(summary["chunk_latency"])
+        self.assertIsNotNone(summary["first_partial"])
+        self.assertIsNotNone(summary["final"])
+        self.assertEqual(0.0, summary["wer"])
+
+    def test_word_error_rate(self):
+        results = [bench.UtteranceResult("a", 1.0, 0.1, "hello there", "Hello, world."),
+                   bench.UtteranceResult("b", 1.0, 0.1, "ignored", None)]
+
+        self.assertEqual(0.5, bench.word_error_rate(results))
+        self.assertIsNone(bench.word_error_rate(results[1:]))
+
+    def test_create_backend(self):
+        asr = bench.create_backend("tests.test_bench:EchoASR", {})
+
+        self.assertIsInstance(asr, EchoASR)
+        with self.assertRaises(ValueError):
+            bench.create_backend("tests.test_bench", {})
+
+    def test_stub_server(self):
+        with bench.StubServer("stub transcript") as stub:
+            response = requests.post(stub.url("whispercpp"), files={"file": ("a.wav", b"data", "audio/wav")})
+
+        self.assertEqual({"text": "stub transcript"}, response.json())
+        self.assertEqual(1, stub.requests)
+
+    def test_main_writes_json(self):
+        output = Path(self.corpus_dir.name) / "bench.json"
+
+        bench.main([self.corpus_dir.name, "--backend", "tests.test_bench:EchoASR", "--output", str(output)])
+
+        report = json.loads(output.read_text())
+        self.assertEqual("EchoASR", report["backend"])
+        self.assertEqual(2, len(report["utterances"]))
+
+    def test_compare_precisions(self):
+        output = Path(self.corpus_dir.name) / "bench.json"
+
+        bench.main([self.corpus_dir.name, "--backend", "tests.test_bench:PrecisionASR",
+                    "--precisions", "float32,int8", "--max-baseline-wer", "0.5", "--output", str(output)])
+
+        report = json.loads(output.read_text())["precisions"]
+        self.assertEqual(["float32", "int8"], list(report))
+        self.assertNotIn("comparison", report["float32"])
+        self.assertEqual(0.5, report["int8"]["comparison"]["wer_vs_baseline"])
+
+    def test_precision_exceeds_max_baseline_wer(self):
+        with self.assertRaises(SystemExit) as context:
+            bench.main([self.corpus_dir.name, "--backend", "tests.test_bench:PrecisionASR",
+                        "--precisions", "float32,int8", "--max-baseline-wer", "0.1"])
+
+        self.assertEqual(1, context.exception.code)
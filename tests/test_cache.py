@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from cltl.asr.api import ASR
+from cltl.asr.cache import CachedASR
+from cltl.asr.metrics import HistogramSink
+
+
+class CountingASR(ASR):
+    def __init__(self):
+        self.transcribed = []
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        self.transcribed.append(len(audio))
+
+        return f"{len(audio)}@{sampling_rate}"
+
+
+def audio(length, value=1):
+    return np.full((length, 1), value, dtype=np.int16)
+
+
+class TestCachedASR(unittest.TestCase):
+    def setUp(self):
+        self.asr = CountingASR()
+        self.metrics = HistogramSink()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_repeated_audio_is_transcribed_once(self):
+        cached = CachedASR(self.asr, metrics=self.metrics)
+
+        self.assertEqual("16@16000", cached.speech_to_text(audio(16), 16000))
+        self.assertEqual("16@16000", cached.speech_to_text(audio(16), 16000))
+
+        self.assertEqual([16], self.asr.transcribed)
+        self.assertEqual({"cache_hits": 1, "cache_misses": 1}, self.metrics.counters())
+
+    def test_key_depends_on_content_rate_model_and_language(self):
+        cached = CachedASR(self.asr, model_id="model", language="en")
+        key = cached.key(audio(16), 16000)
+
+        self.assertEqual(key, cached.key(audio(16), 16000))
+        self.assertNotEqual(key, cached.key(audio(16, value=2), 16000))
+        self.assertNotEqual(key, cached.key(audio(16), 8000))
+        self.assertNotEqual(key, cached.key(audio(16).astype(np.float32), 16000))
+        self.assertNotEqual(key, CachedASR(self.asr, model_id="other", language="en").key(audio(16), 16000))
+        self.assertNotEqual(key, CachedASR(self.asr, model_id="model", language="nl").key(audio(16), 16000))
+
+    def test_least_recently_used_is_evicted(self):
+        cached = CachedASR(self.asr, max_entries=2)
+
+        cached.speech_to_text(audio(1), 16000)
+        cached.speech_to_text(audio(2), 16000)
+        cached.speech_to_text(audio(1), 16000)
+        cached.speech_to_text(audio(3), 16000)
+        cached.speech_to_text(audio(1), 16000)
+        cached.speech_to_text(audio(2), 16000)
+
+        self.assertEqual([1, 2, 3, 2], self.asr.transcribed)
+
+    def test_batch_transcribes_only_misses(self):
+        cached = CachedASR(self.asr)
+        cached.speech_to_text(audio(2), 16000)
+
+        transcripts = cached.speech_to_texts([audio(1), audio(2), audio(3)], 16000)
+
+        self.assertEqual(["1@16000", "2@16000", "3@16000"], transcripts)
+        self.assertEqual([2, 1, 3], self.asr.transcribed)
+
+    def test_disk_tier_survives_restart(self):
+        path = os.path.join(self.tmp.name, "transcripts.db")
+        cached = CachedASR(self.asr, path=path)
+        cached.speech_to_text(audio(16), 16000)
+        cached.close()
+
+        cached = CachedASR(self.asr, path=path, metrics=self.metrics)
+        self.assertEqual("16@16000", cached.speech_to_text(audio(16), 16000))
+        self.assertEqual("16@16000", cached.speech_to_text(audio(16), 16000))
+        cached.close()
+
+        self.assertEqual([16], self.asr.transcribed)
+        self.assertEqual({"cache_disk_hits": 1, "cache_hits": 1}, self.metrics.counters())
+
+    def test_disk_tier_is_bounded(self):
+        path = os.path.join(self.tmp.name, "transcripts.db")
+        cached = CachedASR(self.asr, max_entries=1, path=path, max_disk_entries=2)
+
+        for length in (1, 2, 3):
+            cached.speech_to_text(audio(length), 16000)
+
+        self.assertEqual(2, cached._db.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0])
+        cached.speech_to_text(audio(1), 16000)
+        cached.close()
+
+        self.assertEqual([1, 2, 3, 1], self.asr.transcribed)
+
+    def test_clear(self):
+        cached = CachedASR(self.asr)
+        cached.speech_to_text(audio(16), 16000)
+
+        cached.clear()
+        cached.speech_to_text(audio(16), 16000)
+
+        self.assertEqual([16, 16], self.asr.transcribed)
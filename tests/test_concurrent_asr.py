@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from cltl.asr.concurrent import ConcurrentASR
+
+
+class SlowASR(ConcurrentASR):
+    def __init__(self, max_concurrency, latency=0.05):
+        super().__init__(max_concurrency)
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Later requests finish first
+        time.sleep(self.latency / max(len(audio), 1))
+        with self.lock:
+            self.in_flight -= 1
+
+        if len(audio) == 0:
+            raise ValueError("Empty audio")
+
+        return f"{len(audio)}@{sampling_rate}"
+
+
+class TestConcurrentASR(unittest.TestCase):
+    def setUp(self):
+        self.asr = None
+
+    def tearDown(self):
+        if self.asr:
+            self.asr.close()
+
+    def audios(self, n):
+        return [np.zeros((length, 1), dtype=np.int16) for length in range(1, n + 1)]
+
+    def test_results_in_order(self):
+        self.asr = SlowASR(max_concurrency=4)
+
+        transcripts = self.asr.speech_to_texts(self.audios(8), 16000)
+
+        self.assertEqual([f"{length}@16000" for length in range(1, 9)], transcripts)
+
+    def test_concurrency_is_limited(self):
+        self.asr = SlowASR(max_concurrency=3)
+
+        self.asr.speech_to_texts(self.audios(9), 16000)
+
+        self.assertEqual(3, self.asr.max_in_flight)
+
+    def test_sequential_without_concurrency(self):
+        self.asr = SlowASR(max_concurrency=1)
+
+        transcripts = self.asr.speech_to_texts(self.audios(3), 16000)
+
+        self.assertEqual(["1@16000", "2@16000", "3@16000"], transcripts)
+        self.assertEqual(1, self.asr.max_in_flight)
+
+    def test_failed_request_raises(self):
+        self.asr = SlowASR(max_concurrency=2, latency=0.0)
+
+        with self.assertRaises(ValueError):
+            self.asr.speech_to_texts([np.zeros((1, 1)), np.zeros((0, 1))], 16000)
+
+    def test_empty_batch(self):
+        self.asr = SlowASR(max_concurrency=2)
+
+        self.assertEqual([], self.asr.speech_to_texts([], 16000))
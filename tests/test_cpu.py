@@ -0,0 +1,41 @@
+import os
+import threading
+import unittest
+
+import torch
+
+from cltl.asr.cpu import available_cpus, configure_process, parse_cpu_list, partition_cpus
+
+
+class TestCpu(unittest.TestCase):
+    def test_parse_cpu_list(self):
+        self.assertEqual([0, 1, 2, 3, 8, 10, 11], parse_cpu_list("0-3,8,10-11\n"))
+        self.assertEqual([], parse_cpu_list(""))
+
+    def test_partition_cpus(self):
+        self.assertEqual([[0, 1, 2], [3, 4], [5, 6]], partition_cpus(3, range(7)))
+        self.assertEqual([[4], [5]], partition_cpus(2, [4, 5]))
+        self.assertEqual([available_cpus()], partition_cpus(1))
+        with self.assertRaises(ValueError):
+            partition_cpus(3, [0, 1])
+
+    @unittest.skipUnless(hasattr(os, "sched_setaffinity"), "CPU affinity not supported")
+    def test_configure_process(self):
+        previous = torch.get_num_threads()
+        cpus = available_cpus()[:1]
+        result = []
+
+        # On Linux the affinity of the calling thread is set, don't pin the test process
+        thread = threading.Thread(target=lambda: result.append(configure_process(cpus=",".join(map(str, cpus)))))
+        thread.start()
+        thread.join()
+
+        try:
+            self.assertEqual([cpus], result)
+            self.assertEqual(len(cpus), torch.get_num_threads())
+        finally:
+            torch.set_num_threads(previous)
+
+    def test_unknown_numa_node(self):
+        with self.assertRaises(ValueError):
+            configure_process(numa_node=4096)
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Generous upper bound for slow CI machines, most of it is spent importing numpy
+IMPORT_BUDGET_SEC = 1.5
+
+LIGHTWEIGHT_MODULES = [
+    "cltl.asr",
+    "cltl.asr.api",
+    "cltl.asr.api_streaming",
+    "cltl.asr.audio_buffer",
+    "cltl.asr.backends",
+    "cltl.asr.cache",
+    "cltl.asr.chunked_stream",
+    "cltl.asr.concurrent",
+    "cltl.asr.cpu",
+    "cltl.asr.metrics",
+    "cltl.asr.parakeet_onnx",
+    "cltl.asr.warm_start",
+    "cltl_service.asr",
+]
+
+HEAVY_MODULES = ["torch", "nemo", "onnxruntime", "transformers", "whisper", "speechbrain", "sounddevice", "openai",
+                 "google"]
+
+_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for module in sys.argv[1:]:
+    importlib.import_module(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_time(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        result = subprocess.run([sys.executable, "-c", _SCRIPT, *LIGHTWEIGHT_MODULES],
+                                capture_output=True, text=True, env=env, check=True)
+        report = json.loads(result.stdout)
+
+        self.assertEqual([], [module for module in HEAVY_MODULES if module in report["modules"]])
+        self.assertLess(report["elapsed"], IMPORT_BUDGET_SEC)
@@ -0,0 +1,120 @@
+import logging
+import unittest
+
+from cltl.asr.metrics import HistogramSink, LoggingSink, MultiSink, PrometheusSink, timed
+
+
+class TestHistogramSink(unittest.TestCase):
+    def test_observe_fills_buckets(self):
+        sink = HistogramSink(buckets=(0.1, 1.0))
+
+        for seconds in (0.05, 0.1, 0.5, 2.0):
+            sink.observe("step", seconds)
+
+        histogram = sink.histograms()["step"]
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 2.65)
+        self.assertEqual(histogram.max, 2.0)
+
+    def test_percentile(self):
+        sink = HistogramSink(buckets=(0.1, 1.0))
+        for _ in range(9):
+            sink.observe("step", 0.05)
+        sink.observe("step", 3.0)
+
+        histogram = sink.histograms()["step"]
+        self.assertEqual(histogram.percentile(50), 0.1)
+        self.assertEqual(histogram.percentile(90), 0.1)
+        self.assertEqual(histogram.percentile(99), 3.0)
+
+    def test_clear(self):
+        sink = HistogramSink()
+        sink.observe("step", 0.0)
+        sink.clear()
+
+        self.assertEqual(sink.histograms(), {})
+
+    def test_counters(self):
+        sink = HistogramSink()
+
+        sink.increment("finals")
+        sink.increment("finals", 2)
+
+        self.assertEqual(sink.counters(), {"finals": 3})
+
+    def test_gauges(self):
+        sink = HistogramSink()
+
+        sink.gauge("queue_depth", 3)
+        sink.gauge("queue_depth", 1)
+
+        self.assertEqual(sink.gauges(), {"queue_depth": 1})
+
+    def test_timed(self):
+        sink = HistogramSink()
+
+        with timed(sink, "step"):
+            pass
+
+        self.assertEqual(sink.histograms()["step"].count, 1)
+
+    def test_timed_without_sink(self):
+        with timed(None, "step"):
+            pass
+
+
+class TestPrometheusSink(unittest.TestCase):
+    def test_exposition(self):
+        sink = PrometheusSink(namespace="test", buckets=(0.1, 1.0))
+        sink.observe("encoder", 0.05)
+        sink.observe("encoder", 0.5)
+        sink.increment("forced_finals")
+        sink.gauge("queue_depth", 2)
+
+        self.assertEqual(sink.exposition(), "\n".join([
+            "# TYPE test_encoder_seconds histogram",
+            'test_encoder_seconds_bucket{le="0.1"} 1',
+            'test_encoder_seconds_bucket{le="1.0"} 2',
+            'test_encoder_seconds_bucket{le="+Inf"} 2',
+            "test_encoder_seconds_sum 0.55",
+            "test_encoder_seconds_count 2",
+            "# TYPE test_forced_finals_total counter",
+            "test_forced_finals_total 1",
+            "# TYPE test_queue_depth gauge",
+            "test_queue_depth 2",
+        ]) + "\n")
+
+
+class TestLoggingSink(unittest.TestCase):
+    def test_logs_measurements(self):
+        log = logging.getLogger("test.metrics")
+        sink = LoggingSink(level=logging.INFO, log=log)
+
+        with self.assertLogs(log, logging.INFO) as logs:
+            sink.observe("encoder", 0.0125)
+            sink.increment("forced_finals")
+            sink.gauge("queue_depth", 2)
+
+        self.assertEqual(logs.output, ["INFO:test.metrics:encoder took 12.50 ms",
+                                       "INFO:test.metrics:forced_finals +1",
+                                       "INFO:test.metrics:queue_depth = 2"])
+
+
+class TestMultiSink(unittest.TestCase):
+    def test_reports_to_all_sinks(self):
+        first, second = HistogramSink(), HistogramSink()
+        sink = MultiSink(first, second)
+
+        sink.observe("encoder", 0.1)
+        sink.increment("forced_finals")
+        sink.gauge("queue_depth", 2)
+
+        for target in (first, second):
+            self.assertEqual(target.histograms()["encoder"].count, 1)
+            self.assertEqual(target.counters(), {"forced_finals": 1})
+            self.assertEqual(target.gauges(), {"queue_depth": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
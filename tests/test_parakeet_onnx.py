@@ -0,0 +1,272 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import torch
+
+from cltl.asr.api_streaming import StreamTranscription
+from cltl.asr.backends import create_backend_from_settings
+from cltl.asr.metrics import HistogramSink
+from cltl.asr.parakeet_onnx import (CONFIG_FILE, DECODER_JOINT_FILE, ENCODER_FILE, FEATURES_FILE,
+                                    OnnxParakeetRNNTStreamingASR, _AudioWindow, _Context, _DecoderState,
+                                    _greedy_decode, _LogMelFeatures)
+
+VOCABULARY = ["<unk>", "▁hi", "▁there"]
+BLANK = len(VOCABULARY)
+DURATIONS = [0, 1, 2]
+
+
+def _logits(token, duration):
+    logits = np.zeros(BLANK + 1 + len(DURATIONS), dtype=np.float32)
+    logits[token] = 1.0
+    logits[BLANK + 1 + DURATIONS.index(duration)] = 1.0
+
+    return logits
+
+
+class TestLogMelFeatures(unittest.TestCase):
+    def test_matches_torch_stft(self):
+        rng = np.random.default_rng(0)
+        samples = rng.standard_normal(16000).astype(np.float32) * 0.1
+        window = torch.hann_window(400, periodic=False)
+        filterbank = rng.random((80, 257)).astype(np.float32)
+
+        features = _LogMelFeatures(window.numpy(), filterbank, n_fft=512, hop_length=160)(samples)
+
+        signal = torch.from_numpy(samples)
+        signal = torch.cat((signal[:1], signal[1:] - 0.97 * signal[:-1]))
+        spectrum = torch.stft(signal, n_fft=512, hop_length=160, win_length=400, window=window, center=True,
+                              pad_mode="constant", return_complex=True).abs() ** 2
+        expected = torch.log(torch.from_numpy(filterbank) @ spectrum + 2 ** -24)
+        expected = (expected - expected.mean(dim=1, keepdim=True)) / (expected.std(dim=1, keepdim=True) + 1e-5)
+
+        self.assertEqual((80, 16000 // 160 + 1), features.shape)
+        self.assertEqual(np.float32, features.dtype)
+        np.testing.assert_allclose(expected.numpy(), features, atol=1e-3)
+
+    def test_short_input(self):
+        features = _LogMelFeatures(np.hanning(400), np.ones((4, 257)), n_fft=512, hop_length=160)(np.zeros(10))
+
+        self.assertEqual((4, 1), features.shape)
+        self.assertFalse(np.isnan(features).any())
+
+
+class TestAudioWindow(unittest.TestCase):
+    def test_first_step(self):
+        window = _AudioWindow(_Context(left=8, chunk=2, right=4))
+        window.add(np.arange(6, dtype=np.float32), False)
+
+        self.assertEqual(_Context(0, 2, 4), window.context)
+        self.assertEqual(6, len(window.samples))
+
+    def test_left_context_is_limited(self):
+        window = _AudioWindow(_Context(left=4, chunk=2, right=4))
+        window.add(np.arange(6, dtype=np.float32), False)
+        for start in range(6, 14, 2):
+            window.add(np.arange(start, start + 2, dtype=np.float32), False)
+
+        self.assertEqual(_Context(4, 2, 4), window.context)
+        np.testing.assert_array_equal(np.arange(4, 14), window.samples)
+
+    def test_final_step_decodes_right_context(self):
+        window = _AudioWindow(_Context(left=8, chunk=2, right=4))
+        window.add(np.arange(6, dtype=np.float32), False)
+        window.add(np.arange(6, 7, dtype=np.float32), True)
+
+        self.assertEqual(_Context(2, 5, 0), window.context)
+        self.assertEqual(7, len(window.samples))
+
+    def test_final_step_without_audio(self):
+        window = _AudioWindow(_Context(left=8, chunk=2, right=4))
+        window.add(np.arange(6, dtype=np.float32), False)
+        window.add(np.zeros(0, dtype=np.float32), True)
+
+        self.assertEqual(_Context(2, 4, 0), window.context)
+
+
+class TestGreedyDecode(unittest.TestCase):
+    def _state(self):
+        return _DecoderState((np.zeros(1),), BLANK, [])
+
+    def _joint(self, emissions):
+        """Emit the (token, duration) pairs per frame, blank with duration 1 once they are used up."""
+        calls = []
+
+        def joint(frame, token, states):
+            emitted = sum(1 for call_frame, _ in calls if call_frame == int(frame[0]))
+            calls.append((int(frame[0]), token))
+            pairs = emissions.get(int(frame[0]), [])
+            token, duration = pairs[emitted] if emitted < len(pairs) else (BLANK, 1)
+            return _logits(token, duration), (states[0] + 1,)
+
+        return joint, calls
+
+    def test_tokens_and_durations(self):
+        joint, _ = self._joint({0: [(1, 0), (2, 2)]})
+        frames = np.arange(4, dtype=np.float32)[:, None]
+
+        state = _greedy_decode(joint, frames, self._state(), BLANK, DURATIONS)
+
+        self.assertEqual([1, 2], state.tokens)
+        self.assertEqual(2, state.last_token)
+        self.assertEqual(0, state.skip)
+        # States are only advanced by emitted tokens
+        self.assertEqual(2, state.rnn_states[0][0])
+
+    def test_duration_beyond_frames_is_skipped_in_next_step(self):
+        joint, calls = self._joint({1: [(1, 2)]})
+
+        state = _greedy_decode(joint, np.arange(2, dtype=np.float32)[:, None], self._state(), BLANK, DURATIONS)
+        self.assertEqual(1, state.skip)
+
+        _greedy_decode(joint, np.arange(2, 4, dtype=np.float32)[:, None], state, BLANK, DURATIONS)
+        self.assertEqual([0, 1, 3], [frame for frame, _ in calls])
+
+    def test_max_symbols_per_frame(self):
+        joint, _ = self._joint({0: [(1, 0)] * 5})
+
+        state = _greedy_decode(joint, np.zeros((1, 1), dtype=np.float32), self._state(), BLANK, DURATIONS,
+                               max_symbols=3)
+
+        self.assertEqual([1, 1, 1], state.tokens)
+
+    def test_rnnt_without_durations(self):
+        def joint(frame, token, states):
+            return np.eye(BLANK + 1)[1 if token == BLANK else BLANK], states
+
+        state = _greedy_decode(joint, np.zeros((3, 1), dtype=np.float32), self._state(), BLANK)
+
+        self.assertEqual([1], state.tokens)
+
+    def test_state_is_not_modified(self):
+        joint, _ = self._joint({0: [(1, 1)]})
+        state = self._state()
+
+        _greedy_decode(joint, np.zeros((1, 1), dtype=np.float32), state, BLANK, DURATIONS)
+
+        self.assertEqual([], state.tokens)
+        self.assertEqual(BLANK, state.last_token)
+
+
+class FakeEncoder:
+    """Encoder that subsamples features by 8, with one output dimension."""
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="audio_signal", shape=["B", 80, "T"]),
+                SimpleNamespace(name="length", shape=["B"])]
+
+    def run(self, output_names, inputs):
+        features, length = inputs["audio_signal"], inputs["length"]
+        assert features.shape[2] == length[0]
+        frames = (int(length[0]) + 7) // 8
+
+        return [np.ones((1, 1, frames), dtype=np.float32), np.array([frames])]
+
+
+class FakeDecoderJoint:
+    """Emits 'hi' once per turn, then blanks."""
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_states_1", shape=[2, "B", 4])]
+
+    def run(self, output_names, inputs):
+        token = 1 if inputs["targets"][0, 0] == BLANK else BLANK
+        logits = _logits(token, 1)[None, None, None]
+
+        return [logits, inputs["input_states_1"] + 1, inputs["input_states_2"]]
+
+
+class TestOnnxParakeetRNNTStreamingASR(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.model_dir = self.tmp_dir.name
+        config = {
+            "sample_rate": 16000, "window_stride": 0.01, "subsampling_factor": 8, "n_fft": 512, "hop_length": 160,
+            "preemph": 0.97, "mag_power": 2.0, "log": True, "log_zero_guard": 2 ** -24, "log_zero_guard_type": "add",
+            "vocabulary": VOCABULARY, "blank_id": BLANK, "durations": DURATIONS, "max_symbols": 10,
+        }
+        with open(os.path.join(self.model_dir, CONFIG_FILE), "w") as config_file:
+            json.dump(config, config_file)
+        np.savez(os.path.join(self.model_dir, FEATURES_FILE), window=np.hanning(400), filterbank=np.ones((80, 257)))
+        for file in (ENCODER_FILE, DECODER_JOINT_FILE):
+            open(os.path.join(self.model_dir, file), "w").close()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _asr(self, **kwargs):
+        with patch.object(OnnxParakeetRNNTStreamingASR, "_session", self._session):
+            return OnnxParakeetRNNTStreamingASR(self.model_dir, **kwargs)
+
+    @staticmethod
+    def _session(asr, path):
+        return FakeDecoderJoint() if path.endswith(DECODER_JOINT_FILE) else FakeEncoder()
+
+    def test_create_from_settings(self):
+        with patch.object(OnnxParakeetRNNTStreamingASR, "_session", self._session):
+            asr = create_backend_from_settings({"implementation": "parakeet_onnx", "model": self.model_dir,
+                                                "threads": "2", "chunk_secs": "1.0"})
+
+        self.assertIsInstance(asr, OnnxParakeetRNNTStreamingASR)
+        self.assertEqual(2, asr._threads)
+        self.assertEqual(12 * 1280, asr.context_samples.chunk)
+
+    def test_context_sizes(self):
+        asr = self._asr()
+
+        self.assertEqual(1280, asr.encoder_frame2audio_samples)
+        self.assertEqual(_Context(left=62 * 1280, chunk=6 * 1280, right=25 * 1280), asr.context_samples)
+
+    def test_stream(self):
+        asr = self._asr(metrics=HistogramSink())
+        audio = np.zeros(8 * asr.sample_rate, dtype=np.int16)
+
+        results = []
+        for start in range(0, len(audio), 1600):
+            results.extend(asr.push_audio([audio[start:start + 1600]], asr.sample_rate))
+        final = asr.finish()
+
+        finals = [result for result in results if result.is_final]
+        self.assertTrue(finals)
+        self.assertTrue(all(result.text == "hi" for result in finals))
+        self.assertTrue(all(result.start <= result.end <= len(audio) for result in finals))
+        self.assertIsInstance(final, StreamTranscription)
+        self.assertTrue(final.is_final)
+        self.assertEqual("hi", final.text)
+        self.assertLessEqual(asr.get_current_sample_position(), len(audio))
+        self.assertGreater(asr._metrics.histograms()["encoder"].count, 0)
+
+    def test_speculative_finish_keeps_state(self):
+        asr = self._asr()
+        asr.push_audio([np.zeros(asr.context_samples.chunk + asr.context_samples.right, dtype=np.float32)])
+        state = asr.state
+
+        self.assertEqual("hi", asr._speculative_finish())
+        self.assertIs(state, asr.state)
+        self.assertEqual([1], asr.state.tokens)
+
+    def test_new_stream_shares_sessions(self):
+        asr = self._asr()
+        stream = asr.new_stream()
+
+        self.assertIs(asr._encoder, stream._encoder)
+        self.assertIsNot(asr.state, stream.state)
+
+    def test_empty_stream(self):
+        self.assertEqual(StreamTranscription("", True, 0, 0), self._asr().finish())
+
+    def test_int8_requires_quantized_encoder(self):
+        with self.assertRaises(ValueError):
+            self._asr(precision="int8")
+        with self.assertRaises(ValueError):
+            self._asr(precision="bfloat16")
+
+    def test_requires_decoder(self):
+        os.remove(os.path.join(self.model_dir, DECODER_JOINT_FILE))
+
+        with self.assertRaises(ValueError):
+            self._asr()
@@ -11,6 +11,7 @@ Run with:
 """
 
 import array
+import dataclasses
 import math
 import string
 import sys
@@ -325,7 +326,10 @@ _install_all_stubs()
 # ---------------------------------------------------------------------------
 # Safe to import the module under test now
 # ---------------------------------------------------------------------------
-from cltl.asr.parakeet_stream import LocalParakeetRNNTStreamingASR  # noqa: E402
+from cltl.asr.audio_buffer import AudioRingBuffer  # noqa: E402
+from cltl.asr.metrics import HistogramSink  # noqa: E402
+from cltl.asr.parakeet_stream import (LocalParakeetRNNTStreamingASR, MultiStreamParakeetRNNTStreamingASR,  # noqa: E402
+                                      _clone_state, _select_hyps)
 
 
 def make_divisible_by(num: int, factor: int) -> int:
@@ -349,6 +353,7 @@ def _make_asr(*, turn_threshold_chunks: int = 3, vad=None, vad_threshold: int =
     asr.sample_rate   = 16_000
     asr.device        = "cpu"
     asr.compute_dtype = torch.float32
+    asr.precision     = "float32"
 
     asr.context_samples = ContextSize(left=80_000, chunk=8_000, right=32_000)
 
@@ -361,7 +366,7 @@ def _make_asr(*, turn_threshold_chunks: int = 3, vad=None, vad_threshold: int =
     buffer_mock.context_size_batch.left = 0
     asr.buffer = buffer_mock
 
-    asr.pending_audio                        = torch.empty(0, dtype=torch.float32)
+    asr.pending_audio                        = AudioRingBuffer(2 * (8_000 + 32_000))
     asr.partial_transcripts                  = deque([], maxlen=turn_threshold_chunks)
     asr.current_batched_hyps                 = None
     asr.state                                = None
@@ -375,6 +380,12 @@ def _make_asr(*, turn_threshold_chunks: int = 3, vad=None, vad_threshold: int =
     asr._total_samples_consumed              = 0
     asr._transcript_onset_sample             = None
     asr._replay_offset                       = 0
+    asr._cache_encoder                       = False
+    asr._encoder_cache                       = None
+    asr._word_starts                         = None
+    asr._decoded_tokens                      = 0
+    asr._decoded_text                        = ""
+    asr._metrics                             = None
 
     asr.model             = MagicMock()
     asr.decoding_computer = MagicMock()
@@ -402,14 +413,14 @@ class TestMakeDivisibleBy(unittest.TestCase):
         self.assertEqual(make_divisible_by(7, 1), 7)
 
 
-class TestToMonoFloat32(unittest.TestCase):
-    """Tests for _to_mono_float32, which replaced the separate _concat_to_mono
-    and _normalize_input methods."""
+class TestAddPendingAudio(unittest.TestCase):
+    """Frames are downmixed and normalised to float32 while written to the pending audio buffer."""
 
     def test_mono_int16_frames_scaled_to_float32(self):
         asr    = _make_asr()
         frame  = np.array([32767, -32768, 0], dtype=np.int16)
-        result = asr._to_mono_float32([frame])
+        asr._add_pending_audio([frame], None)
+        result = asr.pending_audio.peek()
         self.assertAlmostEqual(float(result[0]),  32767 / 32768.0,  places=4)
         self.assertAlmostEqual(float(result[1]), -32768 / 32768.0,  places=4)
         self.assertAlmostEqual(float(result[2]),  0.0,              places=4)
@@ -417,7 +428,8 @@ class TestToMonoFloat32(unittest.TestCase):
     def test_mono_float32_values_unchanged(self):
         asr    = _make_asr()
         frame  = np.array([0.5, -0.5, 0.0], dtype=np.float32)
-        result = asr._to_mono_float32([frame])
+        asr._add_pending_audio([frame], None)
+        result = asr.pending_audio.peek()
         self.assertAlmostEqual(float(result[0]),  0.5, places=4)
         self.assertAlmostEqual(float(result[1]), -0.5, places=4)
 
@@ -425,28 +437,35 @@ class TestToMonoFloat32(unittest.TestCase):
         asr    = _make_asr()
         f1     = np.array([0.1, 0.2], dtype=np.float32)
         f2     = np.array([0.3, 0.4], dtype=np.float32)
-        result = asr._to_mono_float32([f1, f2])
-        self.assertEqual(result.numel(), 4)
+        asr._add_pending_audio([f1, f2], None)
+        self.assertEqual(len(asr.pending_audio), 4)
 
     def test_2d_mono_frame_flattened(self):
         asr    = _make_asr()
         frame  = np.array([[0.1], [0.2], [0.3]], dtype=np.float32)
-        result = asr._to_mono_float32([frame])
-        self.assertEqual(result.numel(), 3)
+        asr._add_pending_audio([frame], None)
+        self.assertEqual(asr.pending_audio.peek().shape, (3,))
 
-    @unittest.skipIf(
-        not hasattr(np, "__version__"),
-        "Stereo test requires real numpy (stub always flattens to 1-D)"
-    )
     def test_stereo_averaged_to_mono(self):
         """Stereo frame [1000, -1000] averages to 0 per sample."""
         asr    = _make_asr()
         frame  = np.array([[1000, -1000], [2000, -2000]], dtype=np.int16)
-        result = asr._to_mono_float32([frame])
-        self.assertEqual(result.numel(), 2)
+        asr._add_pending_audio([frame], None)
+        result = asr.pending_audio.peek()
+        self.assertEqual(result.shape, (2,))
         self.assertAlmostEqual(float(result[0]), 0.0, places=4)
         self.assertAlmostEqual(float(result[1]), 0.0, places=4)
 
+    def test_step_audio_is_consumed_from_pending_audio(self):
+        asr = _make_asr()
+        asr._add_pending_audio([np.zeros(8_000 + 32_000 + 10, dtype=np.float32)], None)
+
+        step_audio = asr._next_step_audio()
+
+        self.assertEqual(step_audio.numel(), 8_000 + 32_000)
+        self.assertEqual(len(asr.pending_audio), 10)
+        self.assertEqual(asr._total_samples_consumed, 8_000 + 32_000)
+
 
 class TestDetectSilence(unittest.TestCase):
     def _asr_with_vad(self):
@@ -748,6 +767,47 @@ class TestTryFinalize(unittest.TestCase):
         self.assertFalse(finalized)
 
 
+class TestMetrics(unittest.TestCase):
+    def _full_deque_asr(self, current: str, speculative: str) -> object:
+        asr = _make_asr(turn_threshold_chunks=3)
+        asr._metrics = HistogramSink()
+        asr._transcript_onset_sample = 0
+        asr._speculative_finish = MagicMock(return_value=speculative)
+        asr.reset = MagicMock()
+        for _ in range(3):
+            asr.partial_transcripts.append(current)
+        return asr
+
+    def test_speculative_final_is_counted(self):
+        asr = self._full_deque_asr("stable text", "stable text.")
+
+        asr._try_finalize("stable text", [])
+
+        self.assertEqual(asr._metrics.counters(), {"speculative_finals": 1})
+
+    def test_forced_final_is_counted(self):
+        asr = self._full_deque_asr("partial text", "partial text with more words")
+
+        asr._try_finalize("partial text", [])
+
+        self.assertEqual(asr._metrics.counters(), {"forced_finals": 1})
+
+    def test_speculative_finish_is_timed(self):
+        asr = _make_asr()
+        asr._metrics = HistogramSink()
+        asr._decode_text = MagicMock(return_value="")
+
+        asr._speculative_finish()
+
+        self.assertEqual(asr._metrics.histograms()["speculative_finish"].count, 1)
+
+    def test_no_metrics_without_sink(self):
+        asr = _make_asr()
+        asr._decode_text = MagicMock(return_value="")
+
+        self.assertEqual(asr._speculative_finish(), "")
+
+
 class TestPushAudioGuards(unittest.TestCase):
     def test_raises_when_stream_is_closed(self):
         asr        = _make_asr()
@@ -774,5 +834,395 @@ class TestPushAudioGuards(unittest.TestCase):
         self.assertIsInstance(asr.push_audio(tiny), list)
 
 
+def _make_multi_stream(max_batch_size: int = 8):
+    engine = object.__new__(MultiStreamParakeetRNNTStreamingASR)
+    engine._asr             = _make_asr()
+    engine._max_batch_size  = max_batch_size
+    engine._streams         = {}
+
+    return engine
+
+
+class TestNewStream(unittest.TestCase):
+    def test_new_stream_shares_model_with_independent_state(self):
+        asr = _make_asr()
+        asr._total_samples_consumed = 16_000
+
+        with patch("cltl.asr.parakeet_stream.StreamingBatchedAudioBuffer"):
+            stream = asr.new_stream()
+
+        self.assertIs(stream.model, asr.model)
+        self.assertIs(stream.decoding_computer, asr.decoding_computer)
+        self.assertIsNot(stream.partial_transcripts, asr.partial_transcripts)
+        self.assertEqual(stream._total_samples_consumed, 0)
+        self.assertEqual(asr._total_samples_consumed, 16_000)
+
+    def test_new_stream_with_vad_sets_silence_threshold(self):
+        asr = _make_asr()
+
+        with patch("cltl.asr.parakeet_stream.StreamingBatchedAudioBuffer"):
+            stream = asr.new_stream(vad=MagicMock())
+
+        self.assertEqual(stream._vad_silence_threshold, asr.context_samples.right)
+        self.assertIsNone(asr._vad)
+
+
+class TestMultiStreamPushAudio(unittest.TestCase):
+    def _open(self, engine, *stream_ids):
+        with patch("cltl.asr.parakeet_stream.StreamingBatchedAudioBuffer"):
+            for stream_id in stream_ids:
+                engine.open_stream(stream_id)
+
+    def test_open_stream_twice_raises(self):
+        engine = _make_multi_stream()
+        self._open(engine, "a")
+        with self.assertRaises(ValueError):
+            self._open(engine, "a")
+
+    def test_insufficient_audio_does_not_decode(self):
+        engine = _make_multi_stream()
+        self._open(engine, "a", "b")
+        engine._run_batched_step = MagicMock()
+
+        results = engine.push_audio({"a": np.zeros(10, dtype=np.float32)})
+
+        self.assertEqual(results, {"a": []})
+        engine._run_batched_step.assert_not_called()
+
+    def test_ready_streams_are_decoded_in_one_batch(self):
+        engine = _make_multi_stream()
+        self._open(engine, "a", "b", "c")
+        engine._run_batched_step = MagicMock(side_effect=lambda steps: ["hello"] * len(steps))
+
+        first_step = 8_000 + 32_000
+        results = engine.push_audio({
+            "a": np.zeros(first_step, dtype=np.float32),
+            "b": np.zeros(first_step, dtype=np.float32),
+            "c": np.zeros(10, dtype=np.float32),
+        })
+
+        engine._run_batched_step.assert_called_once()
+        self.assertEqual(len(engine._run_batched_step.call_args[0][0]), 2)
+        self.assertEqual([r.text for r in results["a"]], ["hello"])
+        self.assertEqual([r.text for r in results["b"]], ["hello"])
+        self.assertEqual(results["c"], [])
+
+    def test_batches_are_limited_to_max_batch_size(self):
+        engine = _make_multi_stream(max_batch_size=2)
+        self._open(engine, "a", "b", "c")
+        engine._run_batched_step = MagicMock(side_effect=lambda steps: [""] * len(steps))
+
+        first_step = 8_000 + 32_000
+        engine.push_audio({stream_id: np.zeros(first_step, dtype=np.float32) for stream_id in "abc"})
+
+        self.assertEqual([len(call[0][0]) for call in engine._run_batched_step.call_args_list], [2, 1])
+
+    def test_close_stream_removes_stream(self):
+        engine = _make_multi_stream()
+        self._open(engine, "a")
+
+        result = engine.close_stream("a")
+
+        self.assertTrue(result.is_final)
+        self.assertEqual(engine.streams, [])
+
+
+@unittest.skipIf(not hasattr(torch, "__version__"), "Requires real torch")
+class TestSelectHyps(unittest.TestCase):
+    class _Hyps:
+        def __init__(self, transcript, lengths):
+            self.batch_size      = transcript.shape[0]
+            self.transcript      = transcript
+            self.current_lengths = lengths
+            self._max_length     = transcript.shape[1]
+
+    def test_selects_row_as_batch_of_one(self):
+        hyps = self._Hyps(torch.tensor([[1, 2, 0], [3, 4, 5]]), torch.tensor([2, 3]))
+
+        selected = _select_hyps(hyps, 1)
+
+        self.assertEqual(selected.batch_size, 1)
+        self.assertEqual(selected.transcript.tolist(), [[3, 4, 5]])
+        self.assertEqual(selected.current_lengths.tolist(), [3])
+        self.assertEqual(selected._max_length, 3)
+        self.assertEqual(hyps.batch_size, 2)
+
+    def test_batch_of_one_is_returned_as_is(self):
+        hyps = self._Hyps(torch.tensor([[1, 2]]), torch.tensor([2]))
+
+        self.assertIs(_select_hyps(hyps, 0), hyps)
+
+
+@unittest.skipIf(not hasattr(torch, "__version__"), "Requires real torch")
+class TestCachedEncoder(unittest.TestCase):
+    @dataclasses.dataclass
+    class _Context:
+        left: object
+        chunk: object
+        right: object
+
+        def total(self):
+            return self.left + self.chunk + self.right
+
+        def subsample(self, factor):
+            return TestCachedEncoder._Context(self.left // factor, self.chunk // factor, self.right // factor)
+
+    def _cached_asr(self, left_samples):
+        asr = _make_asr()
+        asr._cache_encoder               = True
+        asr.encoder_subsampling_factor   = 8
+        asr.features_frame2audio_samples = 160
+        asr.encoder_frame2audio_samples  = 1280
+        asr.buffer.context_size          = self._Context(left_samples, 8_000, 32_000)
+        asr.buffer.context_size_batch    = self._Context(torch.tensor([left_samples]), torch.tensor([8_000]),
+                                                         torch.tensor([32_000]))
+
+        streaming_cfg = MagicMock(pre_encode_cache_size=[0, 9], drop_extra_pre_encoded=2,
+                                  last_channel_cache_size=4)
+        asr.model.encoder.streaming_cfg = streaming_cfg
+        asr.model.preprocessor.return_value = (torch.zeros(1, 80, 500), torch.tensor([500]))
+        asr.model.encoder.return_value = (torch.zeros(1, 16, 31), torch.tensor([31]),
+                                          torch.zeros(2, 1, 10, 16), torch.zeros(2, 1, 16, 4), torch.tensor([10]))
+        asr._encoder_cache = (torch.zeros(2, 1, 4, 16), torch.zeros(2, 1, 16, 4), torch.tensor([0]))
+
+        return asr
+
+    def test_encodes_from_chunk_start_with_pre_encode_cache(self):
+        asr = self._cached_asr(left_samples=16_000)  # chunk starts at feature frame 100
+
+        asr._run_cached_encoder()
+
+        kwargs = asr.model.encoder.call_args.kwargs
+        self.assertEqual(kwargs["audio_signal"].shape[-1], 500 - (100 - 9))
+        self.assertEqual(kwargs["length"].tolist(), [500 - (100 - 9)])
+        # The temporary drop setting is restored after the call
+        self.assertEqual(asr.model.encoder.streaming_cfg.drop_extra_pre_encoded, 2)
+
+    def test_first_step_encodes_all_features(self):
+        asr = self._cached_asr(left_samples=0)
+
+        asr._run_cached_encoder()
+
+        self.assertEqual(asr.model.encoder.call_args.kwargs["audio_signal"].shape[-1], 500)
+
+    def test_cache_is_trimmed_to_left_context(self):
+        asr = self._cached_asr(left_samples=16_000)
+
+        asr._run_cached_encoder()
+
+        self.assertEqual(asr._encoder_cache[0].shape[2], 4)
+
+    def test_chunk_output_without_left_context_is_not_sliced(self):
+        asr = self._cached_asr(left_samples=16_000)
+        encoder_output = torch.zeros(1, 31, 16)
+
+        chunk, out_len = asr._chunk_encoder_output(encoder_output, torch.tensor([31]), torch.tensor([True]),
+                                                   includes_left_context=False)
+
+        self.assertEqual(chunk.shape[1], 31)
+        self.assertEqual(out_len.tolist(), [31])
+        self.assertEqual(asr._last_encoder_context.left, 0)
+
+
+@unittest.skipIf(not hasattr(torch, "__version__"), "Requires real torch")
+class TestDecoderSnapshot(unittest.TestCase):
+    class _Hyps:
+        """Minimal BatchedHyps: merge_ appends behind current_lengths and reallocates when full."""
+        def __init__(self, tokens, max_length):
+            self.batch_size              = 1
+            self._max_length             = max_length
+            self.transcript              = torch.zeros(1, max_length, dtype=torch.long)
+            self.timestamps              = torch.zeros(1, max_length, dtype=torch.long)
+            self.token_durations         = None
+            self.step_confidence         = None
+            self.logits                  = None
+            self.current_lengths         = torch.tensor([len(tokens)])
+            self.scores                  = torch.tensor([1.0])
+            self.last_nb_timestamp       = torch.tensor([-1])
+            self.last_nb_timestamp_lasts = torch.tensor([0])
+            self.last_nb_labels          = torch.tensor([-1])
+            self.transcript[0, :len(tokens)] = torch.tensor(tokens, dtype=torch.long)
+
+        def merge_(self, other):
+            length, other_length = int(self.current_lengths[0]), int(other.current_lengths[0])
+            if length + other_length >= self._max_length:
+                self.transcript = torch.cat((self.transcript, torch.zeros_like(self.transcript)), dim=-1)
+                self.timestamps = torch.cat((self.timestamps, torch.zeros_like(self.timestamps)), dim=-1)
+                self._max_length *= 2
+            self.transcript[0, length:length + other_length] = other.transcript[0, :other_length]
+            self.current_lengths += other.current_lengths
+            self.scores += other.scores
+            self.last_nb_labels.copy_(torch.tensor([other.transcript[0, other_length - 1]]))
+
+    @dataclasses.dataclass
+    class _State:
+        predictor_states: tuple
+        labels: torch.Tensor
+
+    def _speculative_asr(self, hyps, chunk_tokens):
+        asr = _make_asr()
+        asr.current_batched_hyps         = hyps
+        asr.state                        = self._State((torch.zeros(1, 2),), torch.tensor([7]))
+        asr._last_encoder_output         = torch.zeros(1, 10, 4)
+        asr._last_encoder_output_len     = torch.tensor([10])
+        asr._last_encoder_context        = MagicMock(left=2)
+        asr._last_encoder_context_batch  = MagicMock(left=torch.tensor([2]))
+        asr.model.tokenizer.ids_to_text.side_effect = lambda ids: " ".join(map(str, ids))
+
+        def decode(x, out_len, prev_batched_state, multi_biasing_ids):
+            # Mutate the previous state in place, as the CUDA graph decoders do
+            prev_batched_state.predictor_states[0].fill_(1)
+            prev_batched_state.labels.fill_(9)
+            return self._Hyps(chunk_tokens, 8), None, prev_batched_state
+
+        asr.decoding_computer = MagicMock(side_effect=decode)
+
+        return asr
+
+    def test_speculative_finish_returns_extended_text(self):
+        asr = self._speculative_asr(self._Hyps([1, 2], 8), [3, 4])
+
+        self.assertEqual(asr._speculative_finish(), "1 2 3 4")
+
+    def test_speculative_finish_restores_hyps(self):
+        hyps = self._Hyps([1, 2], 8)
+        asr  = self._speculative_asr(hyps, [3, 4])
+
+        asr._speculative_finish()
+
+        self.assertIs(asr.current_batched_hyps, hyps)
+        self.assertEqual(hyps.current_lengths.tolist(), [2])
+        self.assertEqual(hyps.scores.tolist(), [1.0])
+        self.assertEqual(hyps.last_nb_labels.tolist(), [-1])
+        self.assertEqual(hyps.transcript[0].tolist(), [1, 2, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(asr._decode_text(), "1 2")
+
+    def test_speculative_finish_without_bookkeeping_fields(self):
+        hyps = self._Hyps([1, 2], 8)
+        hyps.last_nb_timestamp_lasts = None
+        asr  = self._speculative_asr(hyps, [3, 4])
+
+        self.assertEqual(asr._speculative_finish(), "1 2 3 4")
+
+        self.assertEqual(hyps.current_lengths.tolist(), [2])
+        self.assertIsNone(hyps.last_nb_timestamp_lasts)
+
+    def test_speculative_finish_restores_hyps_after_reallocation(self):
+        hyps = self._Hyps([1, 2, 3], 4)
+        asr  = self._speculative_asr(hyps, [4, 5])
+
+        self.assertEqual(asr._speculative_finish(), "1 2 3 4 5")
+
+        self.assertEqual(hyps.current_lengths.tolist(), [3])
+        self.assertEqual(hyps.transcript[0, 3:].tolist(), [0] * 5)
+        self.assertEqual(asr._decode_text(), "1 2 3")
+
+    def test_speculative_finish_restores_state(self):
+        asr   = self._speculative_asr(self._Hyps([1], 8), [2])
+        state = asr.state
+
+        asr._speculative_finish()
+
+        self.assertIsNot(asr.state, state)
+        self.assertEqual(asr.state.labels.tolist(), [7])
+        self.assertEqual(asr.state.predictor_states[0].tolist(), [[0.0, 0.0]])
+
+    def test_speculative_finish_without_hyps(self):
+        asr = self._speculative_asr(None, [2, 3])
+
+        self.assertEqual(asr._speculative_finish(), "2 3")
+        self.assertIsNone(asr.current_batched_hyps)
+
+    def test_clone_state_clones_nested_tensors(self):
+        state = self._State((torch.zeros(2), [torch.ones(1)]), torch.tensor([1]))
+
+        cloned = _clone_state(state)
+        state.predictor_states[0].fill_(5)
+        state.predictor_states[1][0].fill_(5)
+
+        self.assertEqual(cloned.predictor_states[0].tolist(), [0.0, 0.0])
+        self.assertEqual(cloned.predictor_states[1][0].tolist(), [1.0])
+        self.assertIsNone(_clone_state(None))
+
+
+@unittest.skipIf(not hasattr(torch, "__version__"), "Requires real torch")
+class TestIncrementalDecodeText(unittest.TestCase):
+    PIECES = ["\u2581hello", "\u2581wor", "ld", ".", "\u2581how", "\u2581are", "\u2581you"]
+
+    def _ids_to_text(self, ids):
+        return "".join(self.PIECES[i] for i in ids).replace("\u2581", " ").strip()
+
+    def _asr(self, tokens):
+        asr = _make_asr()
+        asr.model.tokenizer.ids_to_text = MagicMock(side_effect=self._ids_to_text)
+        asr._word_starts = [piece.startswith("\u2581") for piece in self.PIECES]
+        self._hyps(asr, tokens)
+
+        return asr
+
+    def _hyps(self, asr, tokens):
+        transcript = torch.zeros(1, 16, dtype=torch.long)
+        transcript[0, :len(tokens)] = torch.tensor(tokens, dtype=torch.long)
+        asr.current_batched_hyps = MagicMock(transcript=transcript, current_lengths=torch.tensor([len(tokens)]))
+
+    def test_decodes_word_pieces_across_chunks(self):
+        asr = self._asr([0, 1])
+        self.assertEqual(asr._decode_text(), "hello wor")
+
+        self._hyps(asr, [0, 1, 2, 3])
+        self.assertEqual(asr._decode_text(), "hello world.")
+
+        self._hyps(asr, [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(asr._decode_text(), "hello world. how are you")
+
+    def test_only_new_tokens_are_decoded(self):
+        asr = self._asr([0, 1, 2, 3])
+        asr._decode_text()
+
+        self._hyps(asr, [0, 1, 2, 3, 4, 5, 6])
+        asr._decode_text()
+
+        decoded = [call.args[0] for call in asr.model.tokenizer.ids_to_text.call_args_list]
+        self.assertEqual(decoded, [[0], [1, 2, 3], [1, 2, 3, 4, 5], [6]])
+        self.assertEqual(asr._decoded_tokens, 6)
+
+    def test_shorter_hypothesis_is_decoded_from_start(self):
+        asr = self._asr([0, 1, 2, 4, 5])
+        asr._decode_text()
+
+        self._hyps(asr, [4])
+        self.assertEqual(asr._decode_text(), "how")
+
+    def test_restore_decoder_restores_decoded_text(self):
+        asr = self._asr([0, 1, 2])
+        asr._decode_text()
+        snapshot = asr._snapshot_decoder()
+
+        self._hyps(asr, [0, 1, 2, 4, 5])
+        asr._decode_text()
+        asr._restore_decoder(snapshot)
+
+        self.assertEqual((asr._decoded_tokens, asr._decoded_text), (1, "hello"))
+
+    def test_decode_text_is_timed(self):
+        asr = self._asr([0, 1])
+        asr._metrics = HistogramSink()
+
+        asr._decode_text()
+        asr._decode_text()
+
+        self.assertEqual(asr._metrics.histograms()["decode_text"].count, 2)
+
+    def test_reset_clears_decoded_text(self):
+        asr = self._asr([0, 4, 5])
+        asr._decode_text()
+
+        asr.reset()
+
+        self.assertEqual(asr._decoded_tokens, 0)
+        self.assertEqual(asr._decoded_text, "")
+        self.assertEqual(asr._decode_text(), "")
+
+
 if __name__ == "__main__":
     unittest.main()
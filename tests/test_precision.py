@@ -0,0 +1,73 @@
+import unittest
+import warnings
+
+import torch
+from torch.ao.nn.quantized import dynamic
+
+from cltl.asr.precision import apply_precision, autocast, check_precision
+
+
+class SubclassLinear(torch.nn.Linear):
+    pass
+
+
+class Model(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(32, 32)
+        self.norm = torch.nn.LayerNorm(32)
+        self.lstm = torch.nn.LSTM(32, 16, batch_first=True)
+        self.custom = SubclassLinear(16, 4)
+
+    def forward(self, x):
+        y, _ = self.lstm(self.norm(self.linear(x)))
+        return self.custom(y)
+
+
+class TestPrecision(unittest.TestCase):
+    def setUp(self):
+        torch.manual_seed(0)
+        self.model = Model().eval()
+        self.input = torch.randn(2, 10, 32)
+        with torch.inference_mode():
+            self.expected = self.model(self.input)
+
+    def test_check_precision(self):
+        self.assertEqual("int8", check_precision("int8"))
+        with self.assertRaises(ValueError):
+            check_precision("float16")
+        with self.assertRaises(ValueError):
+            check_precision("int8", "cuda")
+
+    def test_float32_is_unchanged(self):
+        self.assertIs(self.model, apply_precision(self.model, "float32"))
+        self.assertIsInstance(autocast("float32"), type(autocast("int8")))
+
+    def test_int8_quantizes_linear_and_lstm(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            quantized = apply_precision(self.model, "int8")
+            with torch.inference_mode():
+                actual = quantized(self.input)
+
+        self.assertIsInstance(quantized.linear, dynamic.Linear)
+        self.assertIsInstance(quantized.lstm, dynamic.LSTM)
+        self.assertIs(SubclassLinear, type(quantized.custom))
+        self.assertEqual(torch.float32, actual.dtype)
+        self.assertLess((actual - self.expected).abs().max().item(), 0.1)
+
+    def test_int8_modules(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            quantized = apply_precision(self.model, "int8", modules=(torch.nn.Linear,))
+
+        self.assertIsInstance(quantized.linear, dynamic.Linear)
+        self.assertIs(torch.nn.LSTM, type(quantized.lstm))
+
+    def test_bfloat16_autocast(self):
+        with torch.inference_mode(), autocast("bfloat16"):
+            actual = self.model(self.input)
+
+        self.assertEqual(torch.bfloat16, actual.dtype)
+        self.assertEqual(torch.float32, self.model.linear.weight.dtype)
+        self.assertLess((actual.float() - self.expected).abs().max().item(), 0.1)
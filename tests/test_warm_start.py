@@ -0,0 +1,154 @@
+import os
+import tempfile
+import unittest
+from typing import List
+
+import numpy as np
+import torch
+
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import BufferedASR, StreamTranscription
+from cltl.asr.warm_start import ModelCache, cached, warm_up
+
+
+class TinyModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.linear = torch.nn.Linear(4, 2)
+        self.configured = False
+
+
+class RecordingASR(ASR):
+    def __init__(self):
+        self.calls = []
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        self.calls.append((audio.shape, sampling_rate))
+        return ""
+
+
+class RecordingStream(BufferedASR):
+    sample_rate = 8000
+
+    def __init__(self):
+        self.pushed = []
+        self.finished = False
+        self.streams = []
+
+    def new_stream(self):
+        stream = RecordingStream()
+        self.streams.append(stream)
+        return stream
+
+    def push_audio(self, audio_frames, sampling_rate: int = None) -> List[StreamTranscription]:
+        self.pushed.extend((frame.shape, sampling_rate) for frame in audio_frames)
+        return []
+
+    def finish(self) -> StreamTranscription:
+        self.finished = True
+        return StreamTranscription("", True, 0)
+
+
+class TestModelCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ModelCache(self.tmp.name)
+        self.created = 0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def create(self):
+        self.created += 1
+        model = TinyModel()
+        model.configured = True
+        return model
+
+    def test_prepared_model_is_cached(self):
+        model = self.cache.load(self.create, backend="test", model_id="org/tiny")
+        loaded = self.cache.load(self.create, backend="test", model_id="org/tiny")
+
+        self.assertEqual(1, self.created)
+        self.assertTrue(loaded.configured)
+        self.assertTrue(torch.equal(model.linear.weight, loaded.linear.weight))
+        self.assertTrue(os.path.basename(self.cache.path(backend="test", model_id="org/tiny")).startswith("org_tiny-"))
+
+    def test_key_distinguishes_models(self):
+        self.cache.load(self.create, backend="test", model_id="tiny", dtype="float32")
+        self.cache.load(self.create, backend="test", model_id="tiny", dtype="bfloat16")
+
+        self.assertEqual(2, self.created)
+
+    def test_corrupt_artifact_is_recreated(self):
+        path = self.cache.path(backend="test", model_id="tiny")
+        with open(path, "wb") as artifact:
+            artifact.write(b"corrupt")
+
+        model = self.cache.load(self.create, backend="test", model_id="tiny")
+
+        self.assertEqual(1, self.created)
+        self.assertTrue(model.configured)
+        self.assertIsInstance(torch.load(path, weights_only=False), TinyModel)
+
+    def test_unpicklable_model_is_not_cached(self):
+        def create():
+            model = self.create()
+            model.hook = lambda: None
+            return model
+
+        self.cache.load(create, backend="test", model_id="tiny")
+        self.cache.load(create, backend="test", model_id="tiny")
+
+        self.assertEqual(2, self.created)
+        self.assertEqual([], os.listdir(self.tmp.name))
+
+    def test_cached_without_cache(self):
+        cached(None, self.create, backend="test", model_id="tiny")
+        cached(None, self.create, backend="test", model_id="tiny")
+
+        self.assertEqual(2, self.created)
+
+
+class RecordingMultiStream:
+    def __init__(self):
+        self.streams = {}
+        self.pushed = {}
+
+    def open_stream(self, stream_id):
+        self.streams[stream_id] = []
+
+    def close_stream(self, stream_id):
+        self.pushed[stream_id] = self.streams.pop(stream_id)
+        return StreamTranscription("", True, 0)
+
+    def push_audio(self, audio, sampling_rate: int = None):
+        for stream_id, frames in audio.items():
+            self.streams[stream_id].extend((frame.shape, sampling_rate) for frame in frames)
+        return {stream_id: [] for stream_id in audio}
+
+
+class TestWarmUp(unittest.TestCase):
+    def test_warm_up_asr(self):
+        asr = RecordingASR()
+
+        warm_up(asr, 16000, seconds=0.5)
+
+        self.assertEqual([((8000, 1), 16000)], asr.calls)
+
+    def test_warm_up_streaming_asr_on_new_stream(self):
+        asr = RecordingStream()
+
+        warm_up(asr)
+
+        self.assertEqual([], asr.pushed)
+        self.assertEqual([((8000, 1), 8000)], asr.streams[0].pushed)
+        self.assertTrue(asr.streams[0].finished)
+
+    def test_warm_up_multi_stream_asr(self):
+        asr = RecordingMultiStream()
+
+        warm_up(asr)
+
+        self.assertEqual(1, len(asr.pushed))
+        self.assertEqual([((16000, 1), 16000)], list(asr.pushed.values())[0])
+        self.assertEqual({}, asr.streams)
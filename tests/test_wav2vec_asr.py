@@ -40,4 +40,12 @@ class TestWav2Vec2ASR(unittest.TestCase):
             speech_array, sampling_rate = sf.read(wav, dtype=np.int16)
 
         transcript = self.asr.speech_to_text(speech_array, sampling_rate)
-        self.assertEqual("IT'S HEALTHIER TO COOK WITHOUT SUGAR", transcript.upper())
\ No newline at end of file
+        self.assertEqual("IT'S HEALTHIER TO COOK WITHOUT SUGAR", transcript.upper())
+
+    def test_speech_to_texts(self):
+        with path("resources", "test.wav") as wav:
+            speech_array, sampling_rate = sf.read(wav, dtype=np.int16)
+
+        transcripts = self.asr.speech_to_texts([speech_array, speech_array[:sampling_rate // 2]], sampling_rate)
+        self.assertEqual(2, len(transcripts))
+        self.assertEqual("IT'S HEALTHIER TO COOK WITHOUT SUGAR", transcripts[0].upper())
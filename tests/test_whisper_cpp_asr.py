@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+import numpy as np
+
+from cltl.asr.bench import StubServer
+from cltl.asr.whisper_cpp_asr import WhisperCppASR
+
+
+AUDIO = np.zeros(16000, dtype=np.int16)
+
+
+class TestWhisperCppASR(unittest.TestCase):
+    def setUp(self):
+        self.stubs = []
+
+    def tearDown(self):
+        for stub in self.stubs:
+            stub.stop()
+
+    def stub(self, **kwargs) -> StubServer:
+        stub = StubServer("stub transcript", **kwargs).start()
+        self.stubs.append(stub)
+
+        return stub
+
+    def test_transcribe(self):
+        stub = self.stub()
+        asr = WhisperCppASR(stub.url("whispercpp"))
+
+        self.assertEqual("stub transcript", asr.speech_to_text(AUDIO, 16000))
+
+    def test_connection_is_kept_alive(self):
+        stub = self.stub()
+        asr = WhisperCppASR(stub.url("whispercpp"))
+
+        for _ in range(3):
+            asr.speech_to_text(AUDIO, 16000)
+        asr.close()
+
+        self.assertEqual(3, stub.requests)
+        self.assertEqual(1, stub.connections)
+
+    def test_retries_server_errors(self):
+        stub = self.stub(failures=2)
+        asr = WhisperCppASR(stub.url("whispercpp"), retries=2, backoff=0.01)
+
+        self.assertEqual("stub transcript", asr.speech_to_text(AUDIO, 16000))
+        self.assertEqual(3, stub.requests)
+
+    def test_fails_after_retries(self):
+        stub = self.stub(failures=3)
+        asr = WhisperCppASR(stub.url("whispercpp"), retries=1, backoff=0.01)
+
+        with self.assertRaises(ValueError):
+            asr.speech_to_text(AUDIO, 16000)
+        self.assertEqual(2, stub.requests)
+
+    def test_timeout(self):
+        stub = self.stub(latency=0.5)
+        asr = WhisperCppASR(stub.url("whispercpp"), timeout=0.1, retries=0)
+
+        with self.assertRaises(Exception):
+            asr.speech_to_text(AUDIO, 16000)
+
+    def test_round_robin(self):
+        stubs = [self.stub(), self.stub()]
+        asr = WhisperCppASR([stub.url("whispercpp") for stub in stubs], dispatch="round_robin")
+
+        for _ in range(4):
+            asr.speech_to_text(AUDIO, 16000)
+
+        self.assertEqual([2, 2], [stub.requests for stub in stubs])
+
+    def test_least_loaded(self):
+        slow, fast = self.stub(latency=0.3), self.stub(latency=0.01)
+        asr = WhisperCppASR([slow.url("whispercpp"), fast.url("whispercpp")])
+
+        threads = [threading.Thread(target=asr.speech_to_text, args=(AUDIO, 16000)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, slow.requests)
+        self.assertEqual(1, fast.requests)
+
+    def test_retry_on_other_server(self):
+        failing, healthy = self.stub(failures=1), self.stub()
+        asr = WhisperCppASR([failing.url("whispercpp"), healthy.url("whispercpp")], backoff=0.01)
+
+        self.assertEqual("stub transcript", asr.speech_to_text(AUDIO, 16000))
+        self.assertEqual(1, failing.requests)
+        self.assertEqual(1, healthy.requests)
+
+    def test_requests_in_batch_are_concurrent(self):
+        stub = self.stub(latency=0.1)
+        asr = WhisperCppASR(stub.url("whispercpp"), max_concurrency=4)
+
+        transcripts = asr.speech_to_texts([AUDIO] * 8, 16000)
+        asr.close()
+
+        self.assertEqual(["stub transcript"] * 8, transcripts)
+        self.assertEqual(4, stub.max_in_flight)
+
+    def test_unknown_dispatch(self):
+        with self.assertRaises(ValueError):
+            WhisperCppASR("http://localhost:8080/inference", dispatch="random")
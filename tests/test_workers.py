@@ -0,0 +1,218 @@
+import os
+import threading
+import unittest
+
+import numpy as np
+
+from app.workers import BatchingWorkerPool, PoolFull, ProcessWorkerPool, StreamingWorker
+from cltl.asr.api import ASR
+from cltl.asr.api_streaming import StreamTranscription
+
+
+class LengthASR(ASR):
+    def __init__(self, block: threading.Event = None):
+        self.block = block
+        self.started = threading.Event()
+        self.batches = []
+
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        return f"{len(audio)}@{sampling_rate}"
+
+    def speech_to_texts(self, audios, sampling_rate):
+        self.started.set()
+        if self.block:
+            self.block.wait()
+        audios = list(audios)
+        self.batches.append(len(audios))
+
+        return super().speech_to_texts(audios, sampling_rate)
+
+
+class AffinityASR(ASR):
+    def speech_to_text(self, audio: np.array, sampling_rate: int) -> str:
+        import torch
+
+        return f"{sorted(os.sched_getaffinity(0))}:{torch.get_num_threads()}"
+
+
+class TestBatchingWorkerPool(unittest.TestCase):
+    def test_transcribe(self):
+        pool = BatchingWorkerPool(LengthASR())
+
+        self.assertEqual("16@16000", pool.submit(np.zeros(16), 16000).result(timeout=1))
+
+        pool.shutdown()
+
+    def test_requests_are_batched(self):
+        block = threading.Event()
+        asr = LengthASR(block)
+        pool = BatchingWorkerPool(asr, batch_size=4, batch_wait=0.5)
+
+        futures = [pool.submit(np.zeros(length), 16000) for length in range(1, 6)]
+        block.set()
+
+        self.assertEqual([f"{length}@16000" for length in range(1, 6)],
+                         [future.result(timeout=2) for future in futures])
+        self.assertEqual(5, sum(asr.batches))
+        self.assertLess(len(asr.batches), 5)
+
+        pool.shutdown()
+
+    def test_full_queue_is_rejected(self):
+        block = threading.Event()
+        asr = LengthASR(block)
+        pool = BatchingWorkerPool(asr, max_queue=2, batch_size=1)
+
+        pool.submit(np.zeros(1), 16000)
+        # Wait until the first request is taken by the worker
+        self.assertTrue(asr.started.wait(timeout=1))
+        pool.submit(np.zeros(1), 16000)
+        pool.submit(np.zeros(1), 16000)
+        with self.assertRaises(PoolFull):
+            pool.submit(np.zeros(1), 16000)
+
+        block.set()
+        pool.shutdown()
+
+    def test_shutdown_with_full_queue(self):
+        block = threading.Event()
+        asr = LengthASR(block)
+        pool = BatchingWorkerPool(asr, max_queue=1, batch_size=1)
+
+        first = pool.submit(np.zeros(1), 16000)
+        self.assertTrue(asr.started.wait(timeout=1))
+        queued = pool.submit(np.zeros(2), 16000)
+
+        shutdown = threading.Thread(target=pool.shutdown)
+        shutdown.start()
+        block.set()
+        shutdown.join(timeout=2)
+
+        self.assertFalse(shutdown.is_alive())
+        self.assertEqual(["1@16000", "2@16000"], [first.result(timeout=1), queued.result(timeout=1)])
+        with self.assertRaises(RuntimeError):
+            pool.submit(np.zeros(1), 16000)
+
+    def test_errors_are_set_on_futures(self):
+        class FailingASR(LengthASR):
+            def speech_to_texts(self, audios, sampling_rate):
+                raise ValueError("failed")
+
+        pool = BatchingWorkerPool(FailingASR())
+
+        with self.assertRaises(ValueError):
+            pool.submit(np.zeros(1), 16000).result(timeout=1)
+
+        pool.shutdown()
+
+
+class MultiStreamASR:
+    def __init__(self, block: threading.Event = None):
+        self.block = block
+        self.started = threading.Event()
+        self.samples = {}
+        self.calls = []
+
+    def open_stream(self, stream_id):
+        self.samples[stream_id] = 0
+
+    def close_stream(self, stream_id):
+        return StreamTranscription(str(self.samples.pop(stream_id)), True, 0, 0)
+
+    def push_audio(self, audio, sampling_rate=None):
+        self.started.set()
+        if self.block:
+            self.block.wait()
+        self.calls.append(sorted(audio))
+        for stream_id, frames in audio.items():
+            self.samples[stream_id] += sum(len(frame) for frame in frames)
+
+        return {stream_id: [StreamTranscription(str(self.samples[stream_id]), False, 0, 0)] for stream_id in audio}
+
+
+class TestStreamingWorker(unittest.TestCase):
+    def test_stream(self):
+        asr = MultiStreamASR()
+        worker = StreamingWorker(asr)
+
+        stream = worker.open_stream()
+        self.assertEqual(["4"], [result.text for result in stream.push_audio([np.zeros(4)], 16000)])
+        self.assertEqual(["6"], [result.text for result in stream.push_audio([np.zeros(2)], 16000)])
+        self.assertEqual("6", stream.finish().text)
+        self.assertEqual({}, asr.samples)
+
+        worker.shutdown()
+
+    def test_streams_are_decoded_together(self):
+        block = threading.Event()
+        asr = MultiStreamASR(block)
+        worker = StreamingWorker(asr)
+        streams = [worker.open_stream() for _ in range(3)]
+
+        first = worker.push_audio(streams[0]._stream_id, [np.zeros(1)], 16000)
+        # Wait until the first push is taken by the worker
+        self.assertTrue(asr.started.wait(timeout=1))
+        futures = [worker.push_audio(stream._stream_id, [np.zeros(2)], 16000) for stream in streams]
+        block.set()
+
+        self.assertEqual(["1"], [result.text for result in first.result(timeout=1)])
+        self.assertEqual([["3"], ["2"], ["2"]], [[result.text for result in future.result(timeout=1)]
+                                                for future in futures])
+        self.assertEqual([[0], [0, 1, 2]], asr.calls)
+
+        worker.shutdown()
+
+    def test_close_unfinished_stream(self):
+        asr = MultiStreamASR()
+        worker = StreamingWorker(asr)
+
+        stream = worker.open_stream()
+        stream.close()
+        worker.shutdown()
+
+        self.assertEqual({}, asr.samples)
+
+    def test_errors_are_set_on_futures(self):
+        class FailingASR(MultiStreamASR):
+            def push_audio(self, audio, sampling_rate=None):
+                raise ValueError("failed")
+
+        worker = StreamingWorker(FailingASR())
+        stream = worker.open_stream()
+
+        with self.assertRaises(ValueError):
+            stream.push_audio([np.zeros(1)], 16000)
+
+        worker.shutdown()
+
+
+class TestProcessWorkerPool(unittest.TestCase):
+    def test_transcribe_in_replicas(self):
+        pool = ProcessWorkerPool(LengthASR, replicas=2, threads=None)
+
+        futures = [pool.submit(np.zeros(length), 16000) for length in range(1, 5)]
+
+        self.assertEqual([f"{length}@16000" for length in range(1, 5)],
+                         [future.result(timeout=30) for future in futures])
+
+        pool.shutdown()
+
+    def test_full_queue_is_rejected(self):
+        pool = ProcessWorkerPool(LengthASR, replicas=1, max_queue=0, threads=None)
+        pool._slots.acquire()
+
+        with self.assertRaises(PoolFull):
+            pool.submit(np.zeros(1), 16000)
+
+        pool._slots.release()
+        pool.shutdown()
+
+    @unittest.skipUnless(hasattr(os, "sched_getaffinity"), "CPU affinity not supported")
+    def test_replicas_are_pinned(self):
+        cpus = sorted(os.sched_getaffinity(0))
+        pool = ProcessWorkerPool(AffinityASR, replicas=1, threads=None, pin_cpus=True)
+
+        result = pool.submit(np.zeros(1), 16000).result(timeout=60)
+
+        self.assertEqual(f"{cpus}:{len(cpus)}", result)
+        pool.shutdown()